@@ -1,58 +1,78 @@
+# Run from the repo root: python -m Travel.app [--src DIR] [--out DIR] [--workers N]
+import argparse
 import os
-from moviepy.editor import VideoFileClip, TextClip, CompositeVideoClip
-from moviepy.config import change_settings
 
-change_settings({"IMAGEMAGICK_BINARY": r"C:\Program Files\ImageMagick-7.1.2-Q8\magick.exe"})
+import family  # noqa: F401  (puts the shared helpers on sys.path)
+from caption_overlay import CAPTION_STYLE, caption_job, hex_color, run_captioned
+from encoder_profiles import DEFAULT_PROFILE, PROFILE_NAMES
+from media_index import get_index
 
 videos_dir = r"D:\Travel"
 output_dir = r"D:\Travel\Reengineered"
-os.makedirs(output_dir, exist_ok=True)
 
-video_files = [f for f in os.listdir(videos_dir) if f.lower().endswith(('.mp4', '.mov', '.avi', '.mkv'))]
+# white Arial Bold 70 on navy blue, 15% of the height above the bottom edge
+TRAVEL_STYLE = dict(CAPTION_STYLE, bg_color=hex_color('#001f3f'))
+CAPTION_Y_RATIO = 0.15
 
-processed_count = 0
-output_files = []
 
-for filename in video_files:
+def hook_for(filename):
     # Only process files whose name (without extension) starts with M-W (case insensitive)
     base_name = os.path.splitext(filename)[0]
     first_letter = base_name[0].upper()
     if first_letter < 'M' or first_letter > 'W':
-        continue
-
+        return None
     # Remove underscores and numbers from hook name
     hook_words = base_name.replace("_", " ").split()
     hook_words = [word for word in hook_words if not word.isdigit()]
-    hook_text = " ".join(hook_words)
-
-    video_path = os.path.join(videos_dir, filename)
-    try:
-        clip = VideoFileClip(video_path)
-        vertical_pos = int(clip.h - clip.h * 0.15)
-        txt_clip = TextClip(
-            hook_text,
-            fontsize=70,
-            color='white',
-            font='Arial-Bold',
-            bg_color='#001f3f',  # Navy blue
-            method='caption',
-            size=(clip.w - 100, None)
-        ).set_duration(clip.duration).set_position(('center', vertical_pos))
-        final = CompositeVideoClip([clip, txt_clip])
-        output_path = os.path.join(output_dir, f"travel_{filename}")
-        final.write_videofile(output_path, codec="libx264", audio_codec="aac")
-        final.close()
-        clip.close()
-        processed_count += 1
-        output_files.append(output_path)
-        print(f"Overlay added to '{filename}' as '{output_path}'")
-    except Exception as e:
-        print(f"Error processing {filename}: {e}")
-
-print(f"\nTotal videos processed: {processed_count}")
-if output_files:
-    print("Output files:")
-    for out in output_files:
-        print(out)
-else:
-    print("No videos were processed.")
\ No newline at end of file
+    return " ".join(hook_words)
+
+
+def plan(src_dir, out_dir, backend, profile=None):
+    # source metadata comes from the media index; only new or changed files get probed
+    jobs = []
+    for rec in get_index().refresh(src_dir):
+        filename = rec['name']
+        hook_text = hook_for(filename)
+        if hook_text is None:
+            continue
+        if rec['status'] == 'invalid':
+            print(f"Skipping {filename}: {rec['error']}")
+            continue
+        media = rec if rec['status'] == 'ok' else None
+        jobs.append(caption_job(os.path.join(src_dir, filename), os.path.join(out_dir, f"travel_{filename}"),
+                                hook_text, TRAVEL_STYLE, CAPTION_Y_RATIO, media=media, backend=backend, profile=profile))
+    return jobs
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Add the hook caption to Travel clips named M-W')
+    ap.add_argument('--src', default=videos_dir, help='folder of source clips')
+    ap.add_argument('--out', default=output_dir, help='folder for captioned clips')
+    ap.add_argument('--workers', type=int, default=1, help='clips rendered in parallel processes')
+    ap.add_argument('--backend', choices=('ffmpeg', 'moviepy'), default='ffmpeg', help='ffmpeg overlays the caption PNG in one pass')
+    ap.add_argument('--profile', choices=PROFILE_NAMES, default=DEFAULT_PROFILE, help='encoder profile (see encoder_profiles.py)')
+    args = ap.parse_args(argv)
+    os.makedirs(args.out, exist_ok=True)
+
+    output_files = []
+
+    def on_result(res):
+        if res['ok']:
+            output_files.append(res['output_path'])
+            print(f"Overlay added to '{os.path.basename(res['video_path'])}' as '{res['output_path']}'")
+        else:
+            print(f"Error processing {os.path.basename(res['video_path'])}: {res['error']}")
+
+    run_captioned(plan(args.src, args.out, args.backend, args.profile), args.workers, on_result)
+
+    print(f"\nTotal videos processed: {len(output_files)}")
+    if output_files:
+        print("Output files:")
+        for out in output_files:
+            print(out)
+    else:
+        print("No videos were processed.")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,71 @@
-from moviepy.editor import VideoFileClip, AudioFileClip
+# Run from the repo root: python -m Travel.edit_vid_app [--src PATH] [--audio PATH]
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import family  # noqa: F401  (puts the shared helpers on sys.path)
+from encoder_profiles import DEFAULT_PROFILE, PROFILE_NAMES, get_profile
+from ffmpeg_backend import replace_audio
 
 video_path = r"D:\Travel\Reengineered\travel_Adventure_Awaits_20.mp4"
 audio_path = r"D:\Travel\music\travel_audio.mp3"
-output_path = r"D:\Travel\Reengineered\travel_Adventure_Awaits_20_with_audio.mp4"
 
-# Load video and audio
-video_clip = VideoFileClip(video_path)
-audio_clip = AudioFileClip(audio_path).subclip(0, min(AudioFileClip(audio_path).duration, video_clip.duration))
+VIDEO_EXTS = (".mp4", ".mov", ".mkv")
+SUFFIX = "_with_audio"
+
+
+def plan(src, out, suffix):
+    # (video, output) pairs: a single file, or every clip in a folder that isn't already an output
+    if os.path.isfile(src):
+        return [(src, out)]
+    out_dir = out or src
+    pairs = []
+    for name in sorted(os.listdir(src)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in VIDEO_EXTS or stem.endswith(suffix):
+            continue
+        pairs.append((os.path.join(src, name), os.path.join(out_dir, f"{stem}{suffix}{ext}")))
+    return pairs
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Replace the soundtrack of rendered reels; the video stream is copied, only the audio is encoded')
+    ap.add_argument('--src', default=video_path, help='a reel, or a folder of reels')
+    ap.add_argument('--audio', default=audio_path, help='new soundtrack')
+    ap.add_argument('--out', default=None, help=f'output file (single reel) or folder (default: next to the source, "{SUFFIX}" added)')
+    ap.add_argument('--workers', type=int, default=4, help='reels remuxed in parallel')
+    ap.add_argument('--no-loop', action='store_true', help="don't loop a soundtrack shorter than the reel; it just ends")
+    ap.add_argument('--profile', choices=PROFILE_NAMES, default=DEFAULT_PROFILE, help='encoder profile for the audio bitrate')
+    args = ap.parse_args(argv)
+
+    out = args.out
+    if out is None and os.path.isfile(args.src):
+        stem, ext = os.path.splitext(args.src)
+        out = f"{stem}{SUFFIX}{ext}"
+    if out and os.path.isdir(args.src):
+        os.makedirs(out, exist_ok=True)
+    pairs = plan(args.src, out, SUFFIX)
+    if not pairs:
+        print("No videos found in", args.src)
+        return 1
 
-# Set audio to video
-final_clip = video_clip.set_audio(audio_clip)
-final_clip.write_videofile(output_path, codec="libx264", audio_codec="aac")
+    profile = get_profile(args.profile)
+    failed = 0
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {pool.submit(replace_audio, src, args.audio, dst, not args.no_loop, profile): (src, dst) for src, dst in pairs}
+        for fut in as_completed(futures):
+            src, dst = futures[fut]
+            try:
+                fut.result()
+                print(f"Audio added. Output saved to: {dst}")
+            except Exception as e:
+                failed += 1
+                print(f"Error processing {os.path.basename(src)}: {e}")
+    print(f"{len(pairs) - failed} of {len(pairs)} reels remuxed in {time.time() - t0:.1f}s")
+    return 1 if failed else 0
 
-# Cleanup
-video_clip.close()
-audio_clip.close()
-final_clip.close()
 
-print(f"Audio added. Output saved to: {output_path}")
\ No newline at end of file
+if __name__ == '__main__':
+    raise SystemExit(main())
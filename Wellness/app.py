@@ -1,39 +1,60 @@
+# Run from the repo root: python -m Wellness.app [--src DIR] [--out DIR] [--workers N]
+import argparse
 import os
-from moviepy.editor import VideoFileClip, TextClip, CompositeVideoClip
-from moviepy.config import change_settings
 
-change_settings({"IMAGEMAGICK_BINARY": r"C:\Program Files\ImageMagick-7.1.2-Q8\magick.exe"})
+import family  # noqa: F401  (puts the shared helpers on sys.path)
+from caption_overlay import CAPTION_STYLE, caption_job, hex_color, run_captioned
+from encoder_profiles import DEFAULT_PROFILE, PROFILE_NAMES
+from media_index import get_index
 
 input_dir = r"D:\wellness\reengineered"
 output_dir = r"D:\wellness\reengineered\overlay"
-os.makedirs(output_dir, exist_ok=True)
 
-video_files = [f for f in os.listdir(input_dir) if f.lower().endswith(('.mp4', '.mov', '.avi', '.mkv'))]
+# white Arial Bold 70 on bright purple, 25% of the height above the bottom edge
+WELLNESS_STYLE = dict(CAPTION_STYLE, bg_color=hex_color('#7c69e3'))
+CAPTION_Y_RATIO = 0.25
 
-for filename in video_files:
-    video_path = os.path.join(input_dir, filename)
+
+def hook_for(filename):
     # Remove "wellness_" and underscores, then strip extension
     base_name = os.path.splitext(filename)[0]
-    hook_text = base_name.replace("wellness_", "").replace("_", " ").strip()
-    try:
-        clip = VideoFileClip(video_path)
-        vertical_pos = int(clip.h - clip.h * 0.25)
-        txt_clip = TextClip(
-            hook_text,
-            fontsize=70,
-            color='white',
-            font='Arial-Bold',
-            bg_color='#7c69e3',  # Bright purple
-            method='caption',
-            size=(clip.w - 100, None)
-        ).set_duration(clip.duration).set_position(('center', vertical_pos))
-        final = CompositeVideoClip([clip, txt_clip])
-        output_path = os.path.join(output_dir, f"{filename}")
-        final.write_videofile(output_path, codec="libx264", audio_codec="aac")
-        final.close()
-        clip.close()
-        print(f"Overlay added to '{filename}' as '{output_path}'")
-    except Exception as e:
-        print(f"Error processing {filename}: {e}")
-
-print("All overlays processed and saved to:", output_dir)
\ No newline at end of file
+    return base_name.replace("wellness_", "").replace("_", " ").strip()
+
+
+def plan(src_dir, out_dir, backend, profile=None):
+    # source metadata comes from the media index; only new or changed files get probed
+    jobs = []
+    for rec in get_index().refresh(src_dir):
+        filename = rec['name']
+        if rec['status'] == 'invalid':
+            print(f"Skipping {filename}: {rec['error']}")
+            continue
+        media = rec if rec['status'] == 'ok' else None
+        jobs.append(caption_job(os.path.join(src_dir, filename), os.path.join(out_dir, filename),
+                                hook_for(filename), WELLNESS_STYLE, CAPTION_Y_RATIO, media=media, backend=backend, profile=profile))
+    return jobs
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description='Add the hook caption to every Wellness clip')
+    ap.add_argument('--src', default=input_dir, help='folder of source clips')
+    ap.add_argument('--out', default=output_dir, help='folder for captioned clips')
+    ap.add_argument('--workers', type=int, default=1, help='clips rendered in parallel processes')
+    ap.add_argument('--backend', choices=('ffmpeg', 'moviepy'), default='ffmpeg', help='ffmpeg overlays the caption PNG in one pass')
+    ap.add_argument('--profile', choices=PROFILE_NAMES, default=DEFAULT_PROFILE, help='encoder profile (see encoder_profiles.py)')
+    args = ap.parse_args(argv)
+    os.makedirs(args.out, exist_ok=True)
+
+    def on_result(res):
+        name = os.path.basename(res['video_path'])
+        if res['ok']:
+            print(f"Overlay added to '{name}' as '{res['output_path']}'")
+        else:
+            print(f"Error processing {name}: {res['error']}")
+
+    run_captioned(plan(args.src, args.out, args.backend, args.profile), args.workers, on_result)
+    print("All overlays processed and saved to:", args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -11,7 +11,12 @@ try:
 except Exception:
     audio_loop = None
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont
+
+# cached fonts and the word-wrap engine are shared with the family pipeline
+import family  # noqa: F401  (puts the shared helpers on sys.path)
+from text_overlay import make_rounded_text_image
+from encoder_profiles import get_profile, moviepy_kwargs, output_fps
+from geometry import fill_clip, plan_fill
 
 
 # Configuration
@@ -21,6 +26,8 @@ video_src_dir = r"C:\software\autoreels\AutoReels\family\reels"
 audio_path = r"C:\software\autoreels\AutoReels\family\audio\samsmith.mp3"
 target_dir = r"C:\software\autoreels\AutoReels\family\output_reel"
 os.makedirs(target_dir, exist_ok=True)
+# encoder settings shared with the family pipeline (REELS_PROFILE overrides the default)
+encoder_profile = get_profile()
 
 
 # Read CSV rows
@@ -46,86 +53,6 @@ if os.path.isdir(video_src_dir):
     video_files = [f for f in os.listdir(video_src_dir) if f.lower().endswith((".mp4", ".mov", ".avi", ".mkv"))]
 
 
-def get_font_variant(size, bold=False):
-    try:
-        if bold:
-            return ImageFont.truetype("arialbd.ttf", size)
-        return ImageFont.truetype("arial.ttf", size)
-    except Exception:
-        try:
-            if bold:
-                return ImageFont.truetype(r"C:\Windows\Fonts\arialbd.ttf", size)
-            return ImageFont.truetype(r"C:\Windows\Fonts\arial.ttf", size)
-        except Exception:
-            return ImageFont.load_default()
-
-
-def make_rounded_text_image(text, max_width, font_size=16, padding=(12, 8), radius=3, bg_color=(255, 255, 255, 128), text_color=(0, 0, 0, 255), prefix_words=2, prefix_color=(102, 0, 153, 255)):
-    words = text.split()
-    draw = ImageDraw.Draw(Image.new("RGBA", (10, 10)))
-    lines_words = []
-    cur = []
-    normal_font = get_font_variant(font_size, bold=False)
-    for w in words:
-        test = " ".join(cur + [w])
-        w_size = draw.textbbox((0, 0), test, font=normal_font)[2]
-        if w_size <= max_width - 2 * padding[0]:
-            cur.append(w)
-        else:
-            if cur:
-                lines_words.append(cur)
-            cur = [w]
-    if cur:
-        lines_words.append(cur)
-
-    line_heights = []
-    text_w = 0
-    for lw in lines_words:
-        line_text = " ".join(lw)
-        bbox = draw.textbbox((0, 0), line_text, font=normal_font)
-        line_heights.append(bbox[3] - bbox[1])
-        text_w = max(text_w, bbox[2] - bbox[0])
-    text_h = sum(line_heights) + (len(lines_words) - 1) * 4
-
-    img_w = text_w + 2 * padding[0]
-    img_h = text_h + 2 * padding[1]
-    img = Image.new("RGBA", (img_w, img_h), (0, 0, 0, 0))
-    d = ImageDraw.Draw(img)
-
-    rect = [0, 0, img_w, img_h]
-    try:
-        d.rounded_rectangle(rect, radius=radius, fill=bg_color)
-    except Exception:
-        d.rectangle(rect, fill=bg_color)
-
-    remaining_prefix = prefix_words
-    y = padding[1]
-    space_w = d.textbbox((0, 0), " ", font=normal_font)[2]
-    for i, lw in enumerate(lines_words):
-        line_text = " ".join(lw)
-        bbox = d.textbbox((0, 0), line_text, font=normal_font)
-        total_w = bbox[2] - bbox[0]
-        x = (img_w - total_w) // 2
-
-        if remaining_prefix > 0:
-            num_prefix = min(remaining_prefix, len(lw))
-            prefix_text = " ".join(lw[:num_prefix])
-            rest_text = " ".join(lw[num_prefix:]) if num_prefix < len(lw) else ""
-            prefix_font = get_font_variant(font_size, bold=True)
-            d.text((x, y), prefix_text, font=prefix_font, fill=prefix_color)
-            prefix_bbox = d.textbbox((0, 0), prefix_text, font=prefix_font)
-            prefix_w = prefix_bbox[2] - prefix_bbox[0]
-            if rest_text:
-                d.text((x + prefix_w + space_w, y), rest_text, font=normal_font, fill=text_color)
-            remaining_prefix -= num_prefix
-        else:
-            d.text((x, y), line_text, font=normal_font, fill=text_color)
-
-        y += line_heights[i] + 4
-
-    return img
-
-
 # Process rows
 for idx, row in enumerate(rows):
     fp = (row.get("FilePath") or "").strip()
@@ -161,32 +88,27 @@ for idx, row in enumerate(rows):
     # Target portrait (mobile) size: 9:16 aspect ratio (width x height)
     portrait_w, portrait_h = 1080, 1920
 
-    # Scale clip to fill portrait frame
-    try:
-        scale = max(portrait_w / clip.w, portrait_h / clip.h)
-    except Exception:
-        scale = 1.0
-
+    # Fill the portrait frame: crop the visible window first, then resize only that
+    geom = plan_fill(clip.w, clip.h, portrait_w, portrait_h)
     try:
-        clip_resized = clip.resize(scale)
+        clip_resized = fill_clip(clip, geom)
     except Exception:
-        try:
-            from moviepy.video.fx.all import resize
-            clip_resized = resize(clip, scale)
-        except Exception:
-            clip_resized = clip
+        clip_resized = clip
 
-    # Ensure duration preserved and create a portrait background
+    # Ensure duration preserved
     try:
         clip_resized = clip_resized.set_duration(clip.duration)
     except Exception:
         pass
 
-    try:
-        from moviepy.video.VideoClip import ColorClip
-        bg = ColorClip(size=(portrait_w, portrait_h), color=(0, 0, 0)).set_duration(getattr(clip, 'duration', None) or clip_resized.duration)
-    except Exception:
-        bg = None
+    # black background only when the video doesn't cover the canvas
+    bg = None
+    if not geom['covers'] or clip_resized is clip:
+        try:
+            from moviepy.video.VideoClip import ColorClip
+            bg = ColorClip(size=(portrait_w, portrait_h), color=(0, 0, 0)).set_duration(getattr(clip, 'duration', None) or clip_resized.duration)
+        except Exception:
+            bg = None
 
     # Center the resized clip on the portrait canvas
     video_layer = clip_resized.with_position(('center', 'center'))
@@ -243,12 +165,12 @@ for idx, row in enumerate(rows):
         except Exception as e:
             print(f"Warning: could not load audio {audio_path}: {e}")
 
-    # Write output (preserve source fps if available)
+    # Write output (source fps, lowered to the profile's ceiling)
     try:
-        fps = getattr(clip, 'fps', None) or 30
+        fps = output_fps(encoder_profile, getattr(clip, 'fps', None))
     except Exception:
         fps = 30
-    final.write_videofile(output_path, codec='libx264', audio_codec='aac', fps=fps)
+    final.write_videofile(output_path, fps=fps, **moviepy_kwargs(encoder_profile))
     print(f"Created: {output_path}")
     # Record the output absolute path into the CSV under the FilePath column (5th column)
     try:
@@ -1,33 +1,228 @@
+# Download the Mixkit videos listed in video_links.txt
+#
+# Pages and videos are fetched by a pool of worker threads sharing one pooled
+# requests.Session. Each video streams into <name>.part and is renamed into
+# place only once complete; an interrupted .part is resumed with an HTTP Range
+# request. download_manifest.json in the output folder records page URL,
+# video URL, size and SHA-256 of every finished file, so reruns skip those
+# without touching the network.
+#
+#   python download-vid-woman.py --workers 6
+#   python fixture_server.py --truncate-rate 0.3 &
+#   python download-vid-woman.py --links /tmp/links.txt --out /tmp/videos
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3Error
 from bs4 import BeautifulSoup
-import os
 
 input_file = r"C:\xampp\htdocs\autoVideoPosts\reels-dev\video_links.txt"
 output_dir = r"D:\reels-dev\mixkit\women"
-os.makedirs(output_dir, exist_ok=True)
+MANIFEST_NAME = "download_manifest.json"
 
-with open(input_file, "r", encoding="utf-8") as f:
-    links = [line.strip() for line in f if line.strip()]
+# read sizes adapt between these bounds to keep each read around TARGET_READ_SECONDS
+MIN_CHUNK = 64 * 1024
+MAX_CHUNK = 4 * 1024 * 1024
+TARGET_READ_SECONDS = 0.25
 
-for idx, page_url in enumerate(links, 1):
-    print(f"[{idx}/{len(links)}] Fetching: {page_url}")
-    try:
-        resp = requests.get(page_url, timeout=15)
+
+class DownloadManifest:
+    # {page_url: {video_url, file, size, sha256, finished}}; saved atomically every `batch_size` records
+    def __init__(self, out_dir, batch_size=10):
+        self.path = os.path.join(out_dir, MANIFEST_NAME)
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                self.entries = json.load(fh) or {}
+        except (OSError, ValueError):
+            pass
+
+    def completed(self, page_url):
+        # entry whose file is still on disk with the recorded size, else None
+        entry = self.entries.get(page_url)
+        if not entry:
+            return None
+        try:
+            if os.path.getsize(entry['file']) == entry['size']:
+                return entry
+        except (OSError, KeyError):
+            pass
+        return None
+
+    def record(self, page_url, entry):
+        with self.lock:
+            self.entries[page_url] = entry
+            self.pending += 1
+            if self.pending >= self.batch_size:
+                self._save()
+
+    def save(self):
+        with self.lock:
+            if self.pending:
+                self._save()
+
+    def _save(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump(self.entries, fh, indent=1)
+        os.replace(tmp, self.path)
+        self.pending = 0
+
+
+def make_session(pool_size):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def find_video_url(session, page_url):
+    resp = session.get(page_url, timeout=15)
+    resp.raise_for_status()
+    soup = BeautifulSoup(resp.text, "html.parser")
+    video_tag = soup.find("video", class_="video-player__viewer")
+    if not video_tag or not video_tag.get("src"):
+        return None
+    return video_tag["src"]
+
+
+def hash_file(path, sha):
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(MAX_CHUNK), b''):
+            sha.update(block)
+
+
+def fetch_to_part(session, video_url, part):
+    # one attempt: resume `part` from its current size; returns (sha256, total bytes)
+    offset = os.path.getsize(part) if os.path.isfile(part) else 0
+    # sizes and Range offsets count bytes on the wire, so ask for (and keep) the unencoded body
+    headers = {'Accept-Encoding': 'identity'}
+    if offset:
+        headers['Range'] = f"bytes={offset}-"
+    with session.get(video_url, stream=True, timeout=30, headers=headers) as resp:
+        if resp.status_code == 416 and offset:
+            # the .part already holds the whole file
+            total = int((resp.headers.get('Content-Range') or '').rpartition('/')[2] or -1)
+            if total == offset:
+                sha = hashlib.sha256()
+                hash_file(part, sha)
+                return sha.hexdigest(), offset
+            offset = 0
+            os.remove(part)
+            return fetch_to_part(session, video_url, part)
         resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html.parser")
-        video_tag = soup.find("video", class_="video-player__viewer")
-        if not video_tag or not video_tag.get("src"):
-            print("  No video src found.")
-            continue
-        video_url = video_tag["src"]
-        filename = os.path.join(output_dir, os.path.basename(video_url))
-        print(f"  Downloading: {video_url} -> {filename}")
-        with requests.get(video_url, stream=True, timeout=30) as vid_resp:
-            vid_resp.raise_for_status()
-            with open(filename, "wb") as out_f:
-                for chunk in vid_resp.iter_content(chunk_size=8192):
-                    if chunk:
-                        out_f.write(chunk)
-        print("  Done.")
-    except Exception as e:
-        print(f"  Error: {e}")
\ No newline at end of file
+        if resp.status_code != 206:
+            # server ignored the Range header; start over
+            offset = 0
+        expected = resp.headers.get('Content-Length')
+        expected = offset + int(expected) if expected and expected.isdigit() else None
+        sha = hashlib.sha256()
+        if offset:
+            hash_file(part, sha)
+        written = offset
+        chunk = MIN_CHUNK
+        with open(part, 'ab' if offset else 'wb') as out_f:
+            while True:
+                t0 = time.perf_counter()
+                data = resp.raw.read(chunk, decode_content=False)
+                if not data:
+                    break
+                out_f.write(data)
+                sha.update(data)
+                written += len(data)
+                # grow reads on fast links, shrink them on slow ones
+                took = time.perf_counter() - t0
+                if took < TARGET_READ_SECONDS / 2 and len(data) == chunk:
+                    chunk = min(chunk * 2, MAX_CHUNK)
+                elif took > TARGET_READ_SECONDS * 2:
+                    chunk = max(chunk // 2, MIN_CHUNK)
+    if expected is not None and written != expected:
+        raise IOError(f"short read: {written} of {expected} bytes")
+    return sha.hexdigest(), written
+
+
+def download(session, video_url, filename, retries):
+    part = filename + '.part'
+    for attempt in range(retries + 1):
+        try:
+            digest, size = fetch_to_part(session, video_url, part)
+            os.replace(part, filename)
+            return digest, size
+        # resp.raw.read() raises urllib3's own errors (ReadTimeoutError on a stalled stream,
+        # ProtocolError/IncompleteRead on a truncated body), which requests doesn't wrap
+        except (requests.RequestException, Urllib3Error, IOError) as e:
+            if attempt == retries:
+                raise
+            delay = 0.5 * (2 ** attempt) * (0.5 + random.random())
+            have = os.path.getsize(part) if os.path.isfile(part) else 0
+            print(f"  retrying {os.path.basename(filename)} in {delay:.1f}s from byte {have} ({e})")
+            time.sleep(delay)
+
+
+def process(session, manifest, page_url, out_dir, retries):
+    # returns 'skipped', 'done', 'missing' or raises
+    if manifest.completed(page_url):
+        return 'skipped'
+    video_url = find_video_url(session, page_url)
+    if not video_url:
+        return 'missing'
+    filename = os.path.join(out_dir, os.path.basename(video_url.split('?', 1)[0]))
+    digest, size = download(session, video_url, filename, retries)
+    manifest.record(page_url, {'video_url': video_url, 'file': filename, 'size': size, 'sha256': digest,
+                               'finished': time.time()})
+    return 'done'
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Download Mixkit videos listed in a links file')
+    ap.add_argument('--links', default=input_file, help='one Mixkit video page URL per line')
+    ap.add_argument('--out', default=output_dir, help='download folder (holds the manifest too)')
+    ap.add_argument('--workers', type=int, default=4, help='parallel downloads')
+    ap.add_argument('--retries', type=int, default=3, help='resume attempts per video')
+    args = ap.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    with open(args.links, "r", encoding="utf-8") as f:
+        links = [line.strip() for line in f if line.strip()]
+
+    workers = max(1, args.workers)
+    session = make_session(workers)
+    manifest = DownloadManifest(args.out)
+    counts = {'done': 0, 'skipped': 0, 'missing': 0, 'failed': 0}
+    t0 = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(process, session, manifest, url, args.out, args.retries): url for url in links}
+            for n, fut in enumerate(as_completed(futures), 1):
+                url = futures[fut]
+                try:
+                    outcome = fut.result()
+                except Exception as e:
+                    outcome = 'failed'
+                    print(f"[{n}/{len(links)}] Error: {url}: {e}")
+                else:
+                    if outcome != 'skipped':
+                        print(f"[{n}/{len(links)}] {outcome}: {url}")
+                counts[outcome] += 1
+    finally:
+        manifest.save()
+    elapsed = time.perf_counter() - t0
+    size = sum(e.get('size', 0) for e in manifest.entries.values())
+    print(f"\n{counts['done']} downloaded, {counts['skipped']} already complete, {counts['missing']} without video, "
+          f"{counts['failed']} failed in {elapsed:.1f}s; manifest covers {len(manifest.entries)} files ({size / 1e6:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,13 @@
+# Shared helpers for the reel scripts (captions, encoder profiles, media index,
+# concat, ffmpeg backend). The modules here import each other by plain name, as
+# scripts run from this folder do, so importing the package puts the folder on
+# sys.path once for everyone else:
+#
+#   import family  # noqa: F401
+#   from encoder_profiles import get_profile
+import os
+import sys
+
+_here = os.path.dirname(os.path.abspath(__file__))
+if _here not in sys.path:
+    sys.path.insert(0, _here)
@@ -1,17 +1,31 @@
 #!/usr/bin/env python3
+import argparse
 import csv
 import os
 import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 try:
-    from moviepy.editor import VideoFileClip, CompositeVideoClip, ImageClip, AudioFileClip
+    from moviepy.editor import VideoFileClip, CompositeVideoClip, ImageClip
 except Exception:
-    from moviepy import VideoFileClip, CompositeVideoClip, ImageClip, AudioFileClip
-try:
-    from moviepy.audio.fx.all import audio_loop
-except Exception:
-    audio_loop = None
+    from moviepy import VideoFileClip, CompositeVideoClip, ImageClip
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image
+
+import ffmpeg_backend
+import progress
+from audio_bed import get_audio_bed
+from csv_writeback import CsvWriteBack
+from encoder_profiles import DEFAULT_PROFILE, PROFILE_NAMES, get_profile, moviepy_kwargs, output_fps
+from geometry import fill_clip, parse_focus, plan_fill
+from media_index import get_index
+from metrics import RunRecorder, timed
+from render_cache import RenderManifest, render_key
+from text_overlay import make_rounded_text_image
+from thumbnails import make_thumbnail
 
 
 # Configuration
@@ -20,7 +34,27 @@ csv_file_path = os.path.join(script_dir, "Calm_ADHD_Blueprint_Hooks2.csv")
 video_src_dir = r"C:\software\autoreels\AutoReels\family\reels"
 audio_path = r"C:\software\autoreels\AutoReels\family\audio\samsmith.mp3"
 target_dir = r"C:\software\autoreels\AutoReels\family\output_reel"
-os.makedirs(target_dir, exist_ok=True)
+VIDEO_EXTS = (".mp4", ".mov", ".avi", ".mkv")
+
+# Target portrait (mobile) size: 9:16 aspect ratio (width x height)
+portrait_w, portrait_h = 1080, 1920
+
+# hook overlay styling passed to make_rounded_text_image (also part of the render cache key)
+OVERLAY_WIDTH_RATIO = 0.85
+OVERLAY_STYLE = dict(font_size=40, padding=(24, 16), radius=10, bg_color=(255, 255, 255, 200), text_color=(0, 0, 0, 255), prefix_words=2, prefix_color=(102, 0, 153, 255))
+
+# draft/proxy renders for review: smaller canvas, 'draft' encoder profile, capped length and fps.
+# They go to <out>/drafts and never update the CSV's FilePath column.
+DRAFT_DEFAULTS = dict(size=(540, 960), fps=15, max_seconds=10.0, profile='draft', audio=True)
+DRAFTS_SUBDIR = 'drafts'
+
+# extra canvases the ffmpeg fan-out can write next to the 9:16 reel (same width, <stem>_4x5.mp4 ...)
+ASPECTS = {'9:16': (9, 16), '4:5': (4, 5), '1:1': (1, 1)}
+# rows (x aspect variants) encoded by one fan-out ffmpeg process; each output runs its own encoder
+FANOUT_MAX_OUTPUTS = 8
+
+# one JSON run record per batch (stage timings, counters) goes here unless --run-record is given
+RUN_RECORDS_SUBDIR = 'run_records'
 
 # debug log
 run_log_path = os.path.join(script_dir, 'run_debug.log')
@@ -36,413 +70,665 @@ def log(msg):
         pass
 
 
-
-# Read CSV rows
-rows = []
-original_fieldnames = None
-log(f"Starting app.py; script_dir={script_dir}")
-if os.path.isfile(csv_file_path):
-    with open(csv_file_path, mode="r", encoding="utf-8", newline="") as fh:
-        reader = csv.DictReader(fh)
-        original_fieldnames = reader.fieldnames
-        for row in reader:
-            rows.append(row)
-else:
-    print(f"Warning: CSV not found at {csv_file_path} — using sample rows for test")
-    rows = [
-        {"ID": "1", "Hook": "Sample hook one — quick intro", "LongTailKeywords": "sample_keyword_one"},
-        {"ID": "2", "Hook": "Sample hook two — interesting fact", "LongTailKeywords": "sample_keyword_two"},
-    ]
-
-
-# available local reels
-video_files = []
-if os.path.isdir(video_src_dir):
-    video_files = [f for f in os.listdir(video_src_dir) if f.lower().endswith((".mp4", ".mov", ".avi", ".mkv"))]
-log(f"Found {len(video_files)} source reels: {video_files}")
-log(f"Loaded {len(rows)} CSV rows; original_fieldnames={original_fieldnames}")
-
-
-def get_font_variant(size, bold=False):
+def load_rows(csv_path):
+    rows = []
+    original_fieldnames = None
+    if os.path.isfile(csv_path):
+        # utf-8-sig: sheets exported from Excel / uploaded through the web UI may carry a BOM
+        with open(csv_path, mode="r", encoding="utf-8-sig", newline="") as fh:
+            reader = csv.DictReader(fh)
+            original_fieldnames = reader.fieldnames
+            for row in reader:
+                rows.append(row)
+    else:
+        print(f"Warning: CSV not found at {csv_path} — using sample rows for test")
+        rows = [
+            {"ID": "1", "Hook": "Sample hook one — quick intro", "LongTailKeywords": "sample_keyword_one"},
+            {"ID": "2", "Hook": "Sample hook two — interesting fact", "LongTailKeywords": "sample_keyword_two"},
+        ]
+    return rows, original_fieldnames
+
+
+def list_source_videos(src_dir):
+    # available local reels as media index records (name, duration, width, height, fps, status...),
+    # in listing order; only new or changed files are probed
+    if not os.path.isdir(src_dir):
+        return []
     try:
-        if bold:
-            return ImageFont.truetype("arialbd.ttf", size)
-        return ImageFont.truetype("arial.ttf", size)
-    except Exception:
-        try:
-            if bold:
-                return ImageFont.truetype(r"C:\Windows\Fonts\arialbd.ttf", size)
-            return ImageFont.truetype(r"C:\Windows\Fonts\arial.ttf", size)
-        except Exception:
-            return ImageFont.load_default()
-
-
-def make_rounded_text_image(text, max_width, font_size=16, padding=(12, 8), radius=3, bg_color=(255, 255, 255, 128), text_color=(0, 0, 0, 255), prefix_words=2, prefix_color=(102, 0, 153, 255)):
-    words = text.split()
-    draw = ImageDraw.Draw(Image.new("RGBA", (10, 10)))
-    lines_words = []
-    cur = []
-    normal_font = get_font_variant(font_size, bold=False)
-    for w in words:
-        test = " ".join(cur + [w])
-        w_size = draw.textbbox((0, 0), test, font=normal_font)[2]
-        if w_size <= max_width - 2 * padding[0]:
-            cur.append(w)
+        return get_index().refresh(src_dir, exts=VIDEO_EXTS, log=log)
+    except Exception as e:
+        log(f"Warning: media index unavailable ({e}); listing {src_dir} without metadata")
+        return [{'name': f, 'status': 'unprobed'} for f in os.listdir(src_dir) if f.lower().endswith(VIDEO_EXTS)]
+
+
+def media_info(rec):
+    # probe-shaped dict for ffmpeg_backend from an index record, or None when it wasn't probed
+    if not rec or rec.get('status') != 'ok':
+        return None
+    info = {k: rec.get(k) for k in ('width', 'height', 'fps', 'duration', 'codec', 'pix_fmt', 'audio_codec')}
+    info['has_audio'] = bool(rec.get('has_audio'))
+    return info
+
+
+def overlay_cache_style():
+    return {'canvas': [portrait_w, portrait_h], 'width_ratio': OVERLAY_WIDTH_RATIO, 'overlay': OVERLAY_STYLE}
+
+
+def aspect_canvas(canvas, aspect):
+    # same width as the 9:16 canvas, height from the aspect ratio (even for yuv420p)
+    w = canvas[0]
+    aw, ah = ASPECTS[aspect]
+    return (w, int(round(w * ah / float(aw))) // 2 * 2)
+
+
+def plan_jobs(rows, sources, src_dir, out_dir, music_path, backend='moviepy', draft=None, profile=DEFAULT_PROFILE,
+              aspects=(), cycle_sources=False, focus=None):
+    # decide source clip and output name for every row; rows without a usable source are skipped.
+    # `sources` are list_source_videos() records; `draft` is a DRAFT_DEFAULTS-shaped dict or None
+    # and overrides `profile` (an encoder_profiles name). `aspects` adds variant outputs (ASPECTS
+    # labels besides 9:16, written by the fan-out render); `cycle_sources` lets rows beyond the
+    # number of source reels reuse them round-robin instead of being skipped. `focus` is the
+    # (x, y) focal point, as fractions of the source frame, the crop window is centered on.
+    encoder = get_profile(draft['profile'] if draft else profile)
+    aspects = [a for a in aspects if a != '9:16']
+    extra = {'backend': backend, 'profile': encoder}
+    if draft:
+        extra['draft'] = draft
+    if aspects:
+        extra['aspects'] = aspects
+    if focus:
+        extra['focus'] = list(focus)
+    canvas = tuple(draft['size']) if draft else (portrait_w, portrait_h)
+    jobs = []
+    for idx, row in enumerate(rows):
+        fp = (row.get("FilePath") or "").strip()
+        # Avoid using previously-generated outputs as inputs (prevents processing loop/static video).
+        use_fp = False
+        if fp and os.path.isfile(fp):
+            try:
+                fp_abs = os.path.abspath(fp)
+                target_abs = os.path.abspath(out_dir)
+                if not fp_abs.startswith(target_abs + os.sep):
+                    use_fp = True
+            except Exception:
+                use_fp = True
+
+        media = None
+        if use_fp:
+            video_path = fp
         else:
-            if cur:
-                lines_words.append(cur)
-            cur = [w]
-    if cur:
-        lines_words.append(cur)
-
-    line_heights = []
-    text_w = 0
-    for lw in lines_words:
-        line_text = " ".join(lw)
-        bbox = draw.textbbox((0, 0), line_text, font=normal_font)
-        line_heights.append(bbox[3] - bbox[1])
-        text_w = max(text_w, bbox[2] - bbox[0])
-    text_h = sum(line_heights) + (len(lines_words) - 1) * 4
-
-    img_w = text_w + 2 * padding[0]
-    img_h = text_h + 2 * padding[1]
-    img = Image.new("RGBA", (img_w, img_h), (0, 0, 0, 0))
-    d = ImageDraw.Draw(img)
-
-    rect = [0, 0, img_w, img_h]
+            if idx < len(sources) or (cycle_sources and sources):
+                rec = sources[idx % len(sources)]
+                video_path = os.path.join(src_dir, rec['name'])
+                if rec.get('status') == 'invalid':
+                    print(f"Source {rec['name']} for row {idx+1} (ID={row.get('ID')}) is unusable ({rec.get('error')}) - skipping")
+                    continue
+                media = media_info(rec)
+            else:
+                print(f"No video available for row {idx+1} (ID={row.get('ID')}) - skipping")
+                continue
+
+        row_id = (row.get("ID") or str(idx + 1)).strip()
+        lt = (row.get("LongTailKeywords") or "").split(",")[0].strip()
+        sanitized = re.sub(r'[^A-Za-z0-9]+', '_', lt).strip('_') or f"row{row_id}"
+        output_name = f"{row_id}_{sanitized}.mp4"
+        hook = row.get("Hook") or ""
+        variants = [{'aspect': a, 'canvas': aspect_canvas(canvas, a),
+                     'output_path': os.path.join(out_dir, f"{row_id}_{sanitized}_{a.replace(':', 'x')}.mp4")}
+                    for a in aspects]
+        jobs.append({
+            'idx': idx,
+            'row': dict(row),
+            'video_path': video_path,
+            'output_path': os.path.join(out_dir, output_name),
+            'hook': hook,
+            'cache_key': render_key(hook, video_path, music_path, overlay_cache_style(), extra),
+            'backend': backend,
+            'audio_path': music_path,
+            'audio_pcm': None,
+            'thumbs_dir': os.path.join(out_dir, 'thumbnails'),
+            'threads': None,
+            'events_path': None,
+            'media': media,
+            'make_thumbnail': not draft,
+            'draft': draft,
+            'profile': encoder,
+            'canvas': canvas,
+            'variants': variants,
+            'focus': focus,
+        })
+    return jobs
+
+
+def attach_audio(final, music_path, final_duration, pcm_path=None):
+    # Attach the shared music bed trimmed/looped to final duration
+    if final_duration is None:
+        return final
     try:
-        d.rounded_rectangle(rect, radius=radius, fill=bg_color)
-    except Exception:
-        d.rectangle(rect, fill=bg_color)
-
-    remaining_prefix = prefix_words
-    y = padding[1]
-    space_w = d.textbbox((0, 0), " ", font=normal_font)[2]
-    for i, lw in enumerate(lines_words):
-        line_text = " ".join(lw)
-        bbox = d.textbbox((0, 0), line_text, font=normal_font)
-        total_w = bbox[2] - bbox[0]
-        x = (img_w - total_w) // 2
-
-        if remaining_prefix > 0:
-            num_prefix = min(remaining_prefix, len(lw))
-            prefix_text = " ".join(lw[:num_prefix])
-            rest_text = " ".join(lw[num_prefix:]) if num_prefix < len(lw) else ""
-            prefix_font = get_font_variant(font_size, bold=True)
-            d.text((x, y), prefix_text, font=prefix_font, fill=prefix_color)
-            prefix_bbox = d.textbbox((0, 0), prefix_text, font=prefix_font)
-            prefix_w = prefix_bbox[2] - prefix_bbox[0]
-            if rest_text:
-                d.text((x + prefix_w + space_w, y), rest_text, font=normal_font, fill=text_color)
-            remaining_prefix -= num_prefix
-        else:
-            d.text((x, y), line_text, font=normal_font, fill=text_color)
-
-        y += line_heights[i] + 4
-
-    return img
-
-
-# Process rows
-for idx, row in enumerate(rows):
-    fp = (row.get("FilePath") or "").strip()
-    # Avoid using previously-generated outputs as inputs (prevents processing loop/static video).
-    use_fp = False
-    if fp and os.path.isfile(fp):
+        bed = get_audio_bed(music_path, npy_path=pcm_path)
+        if bed is None:
+            return final
+        audio_clip = bed.clip_for(final_duration)
         try:
-            fp_abs = os.path.abspath(fp)
-            target_abs = os.path.abspath(target_dir)
-            if not fp_abs.startswith(target_abs + os.sep):
-                use_fp = True
+            final = final.set_audio(audio_clip)
         except Exception:
-            use_fp = True
-
-    if use_fp:
-        video_path = fp
-    else:
-        if idx < len(video_files):
-            video_path = os.path.join(video_src_dir, video_files[idx])
-        else:
-            print(f"No video available for row {idx+1} (ID={row.get('ID')}) - skipping")
-            continue
-
-    row_id = (row.get("ID") or str(idx + 1)).strip()
-    lt = (row.get("LongTailKeywords") or "").split(",")[0].strip()
-    sanitized = re.sub(r'[^A-Za-z0-9]+', '_', lt).strip('_') or f"row{row_id}"
-    output_name = f"{row_id}_{sanitized}.mp4"
-    output_path = os.path.join(target_dir, output_name)
-    hook = row.get("Hook") or ""
-
-    clip = VideoFileClip(video_path)
+            try:
+                final.audio = audio_clip
+            except Exception:
+                pass
+    except Exception as e:
+        print(f"Warning: could not load audio {music_path}: {e}")
+    return final
+
+
+def overlay_image(job):
+    # hook overlay laid out for the full 1080-wide canvas, scaled down for proxy canvases
+    max_width = int(portrait_w * OVERLAY_WIDTH_RATIO)
+    img = make_rounded_text_image(job['hook'], max_width=max_width, **OVERLAY_STYLE)
+    canvas_w = job.get('canvas', (portrait_w, portrait_h))[0]
+    if canvas_w != portrait_w:
+        f = canvas_w / float(portrait_w)
+        img = img.resize((max(1, int(img.width * f)), max(1, int(img.height * f))), Image.LANCZOS)
+    return img
 
-    # Target portrait (mobile) size: 9:16 aspect ratio (width x height)
-    portrait_w, portrait_h = 1080, 1920
 
-    # Scale clip to fill portrait frame
+def finish_output(job, result, get_frame):
+    # output is on disk: write the .done marker and the thumbnail from the source's first frame
+    output_path = job['output_path']
+    log(f"Created: {output_path}")
+    progress.emit('output_created', idx=job['idx'], path=output_path)
+    result['ok'] = True
+    # create a small marker file to reliably indicate successful creation
     try:
-        scale = max(portrait_w / clip.w, portrait_h / clip.h)
-    except Exception:
-        scale = 1.0
+        marker = output_path + ".done"
+        with open(marker, 'w', encoding='utf-8') as m:
+            m.write('')
+    except Exception as e:
+        log(f"Warning: could not write marker for {output_path}: {e}")
 
+    if not job.get('make_thumbnail', True):
+        return
     try:
-        clip_resized = clip.resize(scale)
-    except Exception:
+        with timed(result.setdefault('timings', {}), 'thumbnail'):
+            thumb = make_thumbnail(get_frame(0), job['row'], output_path, job['thumbs_dir'])
+        if thumb:
+            result['thumbnail'] = thumb
+            log(f"Thumbnail created: {thumb}")
+            progress.emit('thumbnail_created', idx=job['idx'], path=thumb)
+    except Exception as e:
+        log(f"Warning: could not create thumbnail for {output_path}: {e}")
+
+
+def render_row(job):
+    # Render one reel: source clip scaled to fill the portrait canvas, centered hook overlay and
+    # music bed. Runs in the main process or in a pool worker; it never touches the CSV, the
+    # caller records FilePath from the returned result.
+    progress.configure(job.get('events_path'))
+    progress.emit('row_started', idx=job['idx'], id=(job['row'].get('ID') or str(job['idx'] + 1)).strip(), output=job['output_path'])
+    if job.get('backend') == 'ffmpeg':
+        return render_row_ffmpeg(job)
+    output_path = job['output_path']
+    timings = {}
+    result = {'idx': job['idx'], 'output_path': output_path, 'ok': False, 'thumbnail': None, 'timings': timings}
+    clip = None
+    final = None
+    draft = job.get('draft')
+    canvas_w, canvas_h = job.get('canvas', (portrait_w, portrait_h))
+    try:
+        # MoviePy decodes lazily: 'decode' is opening the reader, frames are decoded inside 'encode'
+        with timed(timings, 'decode'):
+            clip = VideoFileClip(job['video_path'])
+            if draft and draft.get('max_seconds') and (clip.duration or 0) > draft['max_seconds']:
+                try:
+                    clip = clip.subclip(0, draft['max_seconds'])
+                except Exception:
+                    clip = clip.subclipped(0, draft['max_seconds'])
+
+        # Fill the portrait frame: crop the visible window first, then resize only that
+        # (a landscape source is no longer scaled to ~3400x1920 before being cut down)
+        composite_t0 = time.perf_counter()
+        geom = plan_fill(clip.w, clip.h, canvas_w, canvas_h, job.get('focus'))
         try:
-            from moviepy.video.fx.all import resize
-            clip_resized = resize(clip, scale)
-        except Exception:
+            clip_resized = fill_clip(clip, geom)
+        except Exception as e:
+            log(f"Warning: crop/resize failed for {job['video_path']} ({e}); using the clip as is")
             clip_resized = clip
 
-    # Ensure duration preserved and create a portrait background
-    try:
-        clip_resized = clip_resized.set_duration(clip.duration)
-    except Exception:
-        pass
+        # Ensure duration preserved
+        try:
+            clip_resized = clip_resized.set_duration(clip.duration)
+        except Exception:
+            pass
 
-    try:
-        from moviepy.video.VideoClip import ColorClip
-        bg = ColorClip(size=(portrait_w, portrait_h), color=(0, 0, 0)).set_duration(getattr(clip, 'duration', None) or clip_resized.duration)
-    except Exception:
+        # black background only when the video doesn't cover the canvas
         bg = None
-
-    # Center the resized clip on the portrait canvas
-    video_layer = clip_resized.with_position(('center', 'center'))
-
-    # prepare centered text overlay sized relative to portrait width
-    max_width = int(portrait_w * 0.85)
-    pil_img = make_rounded_text_image(hook, max_width=max_width, font_size=40, padding=(24, 16), radius=10, bg_color=(255, 255, 255, 200), text_color=(0,0,0,255), prefix_words=2, prefix_color=(102,0,153,255))
-    img_clip = ImageClip(np.array(pil_img)).with_position(('center', 'center')).with_duration(getattr(clip_resized, 'duration', clip.duration))
-
-    layers = []
-    if bg is not None:
-        layers.append(bg)
-    layers.append(video_layer)
-    layers.append(img_clip)
-
-    final = CompositeVideoClip(layers, size=(portrait_w, portrait_h))
-
-    # Attach audio trimmed/looped to final duration
-    final_duration = getattr(final, 'duration', getattr(clip, 'duration', None))
-    if os.path.isfile(audio_path):
-        try:
-            audio_clip = AudioFileClip(audio_path)
-            audio_duration = getattr(audio_clip, 'duration', None)
+        if not geom['covers'] or clip_resized is clip:
             try:
-                audio_duration = float(audio_duration) if audio_duration is not None else None
+                from moviepy.video.VideoClip import ColorClip
+                bg = ColorClip(size=(canvas_w, canvas_h), color=(0, 0, 0)).set_duration(getattr(clip, 'duration', None) or clip_resized.duration)
             except Exception:
-                audio_duration = None
-
-            if audio_duration is not None and final_duration is not None and audio_duration >= final_duration and hasattr(audio_clip, 'subclip'):
-                audio_clip = audio_clip.subclip(0, final_duration)
-            elif audio_duration is None or (final_duration is not None and audio_duration < final_duration):
-                if audio_loop is not None and final_duration is not None:
-                    try:
-                        audio_clip = audio_loop(audio_clip, duration=final_duration)
-                    except Exception:
-                        try:
-                            audio_clip = audio_clip.fx(audio_loop, duration=final_duration)
-                        except Exception:
-                            pass
-                else:
-                    if hasattr(audio_clip, 'subclip') and audio_duration is not None:
-                        try:
-                            audio_clip = audio_clip.subclip(0, min(audio_duration, final_duration or audio_duration))
-                        except Exception:
-                            pass
-
+                bg = None
+
+        # Center the resized clip on the portrait canvas
+        video_layer = clip_resized.with_position(('center', 'center'))
+
+        # prepare centered text overlay sized relative to portrait width
+        with timed(timings, 'overlay'):
+            pil_img = overlay_image(job)
+        img_clip = ImageClip(np.array(pil_img)).with_position(('center', 'center')).with_duration(getattr(clip_resized, 'duration', clip.duration))
+
+        layers = []
+        if bg is not None:
+            layers.append(bg)
+        layers.append(video_layer)
+        layers.append(img_clip)
+
+        final = CompositeVideoClip(layers, size=(canvas_w, canvas_h))
+        timings['composite'] = time.perf_counter() - composite_t0 - timings.get('overlay', 0.0)
+        with_audio = not draft or draft.get('audio', True)
+        if with_audio:
+            with timed(timings, 'audio'):
+                final = attach_audio(final, job['audio_path'], getattr(final, 'duration', getattr(clip, 'duration', None)), job.get('audio_pcm'))
+
+        # Write output (source fps, lowered to the profile's / draft's ceiling)
+        profile = job.get('profile') or get_profile()
+        try:
+            fps = output_fps(profile, getattr(clip, 'fps', None))
+        except Exception:
+            fps = 30
+        if draft and draft.get('fps'):
+            fps = min(fps, draft['fps'])
+        log(f"Writing video: {output_path} (fps={fps}, profile={profile['name']})")
+        with timed(timings, 'encode'):
+            final.write_videofile(output_path, fps=fps, audio=with_audio, logger=progress.moviepy_logger(job['idx']),
+                                  **moviepy_kwargs(profile, job.get('threads')))
+        finish_output(job, result, clip.get_frame)
+    except Exception as e:
+        log(f"Error writing {output_path}: {e}")
+        result['error'] = str(e)
+        progress.emit('row_failed', idx=job['idx'], output=output_path, error=str(e))
+    finally:
+        for c in (final, clip):
             try:
-                final = final.set_audio(audio_clip)
+                if c is not None:
+                    c.close()
             except Exception:
-                try:
-                    final.audio = audio_clip
-                except Exception:
-                    pass
-        except Exception as e:
-            print(f"Warning: could not load audio {audio_path}: {e}")
+                pass
+    return result
 
-    # Write output (preserve source fps if available)
-    try:
-        fps = getattr(clip, 'fps', None) or 30
-    except Exception:
-        fps = 30
+
+def render_row_ffmpeg(job):
+    # same recipe compiled into a single ffmpeg filter graph (see ffmpeg_backend.py)
+    output_path = job['output_path']
+    timings = {}
+    result = {'idx': job['idx'], 'output_path': output_path, 'ok': False, 'thumbnail': None, 'timings': timings}
+    overlay_png = output_path + '.overlay.png'
     try:
-        log(f"Writing video: {output_path} (fps={fps})")
-        final.write_videofile(output_path, codec='libx264', audio_codec='aac', fps=fps)
-        log(f"Created: {output_path}")
-        # create a small marker file to reliably indicate successful creation
-        try:
-            marker = output_path + ".done"
-            with open(marker, 'w', encoding='utf-8') as m:
-                m.write('')
-        except Exception as e:
-            log(f"Warning: could not write marker for {output_path}: {e}")
+        with timed(timings, 'probe'):
+            info = job.get('media') or ffmpeg_backend.probe(job['video_path'])
+        with timed(timings, 'overlay'):
+            overlay_image(job).save(overlay_png)
+        draft = job.get('draft') or {}
+        profile = job.get('profile') or get_profile()
+        fps = output_fps(profile, info.get('fps'))
+        if draft.get('fps'):
+            fps = min(fps, draft['fps'])
+        log(f"Writing video: {output_path} (fps={fps}, profile={profile['name']}, backend=ffmpeg)")
+        # decode, scale, composite, audio and encode all happen inside the one ffmpeg process
+        with timed(timings, 'encode'):
+            ffmpeg_backend.render_reel(job['video_path'], overlay_png, output_path, canvas=job.get('canvas', (portrait_w, portrait_h)),
+                                       music_path=job['audio_path'], fps=fps, threads=job.get('threads'), info=info,
+                                       on_progress=progress.FrameThrottle(job['idx']).update,
+                                       max_duration=draft.get('max_seconds'), profile=profile, audio=draft.get('audio', True),
+                                       focus=job.get('focus'))
+        finish_output(job, result, lambda t: ffmpeg_backend.extract_frame(job['video_path'], t, info))
     except Exception as e:
         log(f"Error writing {output_path}: {e}")
-    # Record the output absolute path into the CSV under the FilePath column (5th column)
-    try:
-        # update the in-memory row with an absolute output path
-        abs_output = os.path.abspath(output_path)
-        rows[idx]['FilePath'] = abs_output
-
-        # determine base fieldnames (preserve original order when possible)
-        if original_fieldnames:
-            base_fns = [fn for fn in original_fieldnames if fn != 'FilePath']
-        elif rows:
-            base_fns = [k for k in rows[0].keys() if k != 'FilePath']
-        else:
-            base_fns = ['ID', 'Hook', 'LongTailKeywords']
-
-        # ensure FilePath is present as the 5th column (index 4)
-        insert_index = 4 if len(base_fns) >= 4 else len(base_fns)
-        fns = list(base_fns)
-        if 'FilePath' in fns:
-            fns.remove('FilePath')
-        fns.insert(insert_index, 'FilePath')
-
-        # write back the CSV with updated FilePath absolute values (atomic write)
-        log(f"Updating CSV {csv_file_path} with fieldnames={fns}")
-        tmp_csv = csv_file_path + '.tmp'
-        with open(tmp_csv, mode='w', encoding='utf-8', newline='') as wf:
-            writer = csv.DictWriter(wf, fieldnames=fns)
-            writer.writeheader()
-            for r in rows:
-                out = {k: r.get(k, '') for k in fns}
-                # ensure FilePath is absolute when present
-                if out.get('FilePath'):
-                    out['FilePath'] = os.path.abspath(out['FilePath'])
-                else:
-                    out['FilePath'] = ''
-                log(f"CSV write row ID={r.get('ID')} FilePath={out['FilePath']}")
-                writer.writerow(out)
+        result['error'] = str(e)
+        progress.emit('row_failed', idx=job['idx'], output=output_path, error=str(e))
+    finally:
         try:
-            os.replace(tmp_csv, csv_file_path)
-            log(f"CSV updated: {csv_file_path}")
-        except Exception:
-            # fallback to move
+            os.remove(overlay_png)
+        except OSError:
+            pass
+    return result
+
+
+def render_fanout(jobs):
+    # rows that share a source clip (all ffmpeg backend, same draft/profile): the source is decoded
+    # and scaled once and every row's output plus its aspect variants come out of one ffmpeg run.
+    # Returns one render_row-style result per row.
+    first = jobs[0]
+    progress.configure(first.get('events_path'))
+    results = [{'idx': j['idx'], 'output_path': j['output_path'], 'ok': False, 'thumbnail': None, 'timings': {}} for j in jobs]
+    result_for = {r['idx']: r for r in results}
+    pngs = []
+    try:
+        info = first.get('media') or ffmpeg_backend.probe(first['video_path'])
+        outputs = []
+        for job in jobs:
+            progress.emit('row_started', idx=job['idx'], id=(job['row'].get('ID') or str(job['idx'] + 1)).strip(), output=job['output_path'])
+            png = job['output_path'] + '.overlay.png'
+            with timed(result_for[job['idx']]['timings'], 'overlay'):
+                overlay_image(job).save(png)
+            pngs.append(png)
+            # variants keep the 1080-wide overlay, only the canvas height changes
+            outputs.append({'overlay_png': png, 'output_path': job['output_path'], 'canvas': job['canvas']})
+            outputs += [{'overlay_png': png, 'output_path': v['output_path'], 'canvas': v['canvas']} for v in job.get('variants') or []]
+        draft = first.get('draft') or {}
+        profile = first.get('profile') or get_profile()
+        fps = output_fps(profile, info.get('fps'))
+        if draft.get('fps'):
+            fps = min(fps, draft['fps'])
+        log(f"Writing {len(outputs)} outputs from {first['video_path']} in one pass (fps={fps}, profile={profile['name']}, backend=ffmpeg fan-out)")
+        throttles = [progress.FrameThrottle(j['idx']) for j in jobs]
+        encode_t0 = time.perf_counter()
+        ffmpeg_backend.render_fanout(first['video_path'], outputs, music_path=first['audio_path'], fps=fps,
+                                     threads=first.get('threads'), info=info,
+                                     on_progress=lambda done, total: [t.update(done, total) for t in throttles],
+                                     max_duration=draft.get('max_seconds'), profile=profile, audio=draft.get('audio', True),
+                                     focus=first.get('focus'))
+        # one shared ffmpeg run: each row is charged an equal share
+        for result in results:
+            result['timings']['encode'] = (time.perf_counter() - encode_t0) / len(jobs)
+        # every thumbnail starts from the same source frame: decode it once
+        first_frame = lru_cache(maxsize=4)(lambda t: ffmpeg_backend.extract_frame(first['video_path'], t, info))
+        for job, result in zip(jobs, results):
+            finish_output(job, result, first_frame)
+    except Exception as e:
+        for job, result in zip(jobs, results):
+            log(f"Error writing {job['output_path']}: {e}")
+            result['error'] = str(e)
+            progress.emit('row_failed', idx=job['idx'], output=job['output_path'], error=str(e))
+    finally:
+        for png in pngs:
             try:
-                os.remove(csv_file_path)
-            except Exception:
+                os.remove(png)
+            except OSError:
                 pass
-            os.replace(tmp_csv, csv_file_path)
-        # create thumbnail for this output if possible
-        try:
-            thumbs_dir = os.path.join(target_dir, 'thumbnails')
-            os.makedirs(thumbs_dir, exist_ok=True)
-            # try to get a frame from the final composite; fallback to source clip
-            frame_np = None
-            try:
-                frame_np = final.get_frame(0)
-            except Exception:
-                try:
-                    frame_np = clip.get_frame(0)
-                except Exception:
-                    frame_np = None
-
-            if frame_np is not None:
+    return results
+
+
+def fanout_groups(jobs, max_outputs=FANOUT_MAX_OUTPUTS):
+    # jobs grouped by source clip in first-seen order, split so one ffmpeg run writes at most
+    # max_outputs files (rows x (1 + aspect variants))
+    by_source = {}
+    for job in jobs:
+        by_source.setdefault(os.path.abspath(job['video_path']), []).append(job)
+    groups = []
+    for members in by_source.values():
+        per_row = 1 + len(members[0].get('variants') or [])
+        size = max(1, max_outputs // per_row)
+        groups += [members[i:i + size] for i in range(0, len(members), size)]
+    return groups
+
+
+def ffmpeg_threads(workers, budget=None):
+    # split the thread budget (default: all cores) between pool workers so N encoders
+    # don't oversubscribe the box
+    return max(1, (budget or os.cpu_count() or 1) // max(1, workers))
+
+
+def _init_pool_worker(log_path=None):
+    # fresh line-buffered stdio on fds 1/2, appended to the render worker's job log when there is one:
+    # a forked child would otherwise keep whatever the parent had redirected sys.stdout to, and one
+    # write per line keeps lines whole
+    if log_path:
+        fd = os.open(log_path, os.O_WRONLY | os.O_APPEND | getattr(os, 'O_BINARY', 0))
+        os.dup2(fd, 1)
+        os.dup2(fd, 2)
+        os.close(fd)
+    sys.stdout = open(1, 'w', buffering=1, encoding='utf-8', errors='replace', closefd=False)
+    sys.stderr = open(2, 'w', buffering=1, encoding='utf-8', errors='replace', closefd=False)
+
+
+def run_jobs(jobs, workers, on_result, thread_budget=None, fanout=False):
+    # fanout: one task per fanout_groups() group through render_fanout (ffmpeg backend only)
+    tasks = fanout_groups(jobs) if fanout else [[job] for job in jobs]
+    render = render_fanout if fanout else (lambda group: [render_row(group[0])])
+    if workers <= 1 or len(tasks) <= 1:
+        for job in jobs:
+            job['threads'] = thread_budget
+        for group in tasks:
+            for res in render(group):
+                on_result(res)
+        return
+    threads = ffmpeg_threads(workers, thread_budget)
+    log(f"Rendering {len(jobs)} rows ({len(tasks)} tasks) with {workers} worker processes ({threads} ffmpeg threads each)")
+    # set by render_worker.py for the job it is running
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_pool_worker,
+                               initargs=(os.environ.get('REELS_POOL_LOG'),))
+    with tempfile.TemporaryDirectory(prefix='autoreels_') as tmp, pool:
+        # decode the music bed once here; workers memory-map the PCM instead of decoding it again
+        pcm_paths = {}
+        for job in jobs:
+            job['threads'] = threads
+            music = job.get('audio_path')
+            if job.get('backend') == 'ffmpeg':
+                # ffmpeg loops the music file itself
+                continue
+            if music and music not in pcm_paths:
+                pcm_paths[music] = None
                 try:
-                    # Use the original source clip's first frame for the thumbnail when available
-                    try:
-                        src_frame = clip.get_frame(0)
-                    except Exception:
-                        src_frame = frame_np
-
-                    thumb_img = Image.fromarray(src_frame.astype('uint8'))
-                    if thumb_img.mode != 'RGBA':
-                        thumb_img = thumb_img.convert('RGBA')
-
-                    # text: first longtail keyword (or hook fallback)
-                    ltk = (row.get('LongTailKeywords') or '').split(',')
-                    text = ltk[0].strip() if ltk and ltk[0].strip() else (row.get('Hook') or '')
-
-                    # target: text wraps to 3 words per line and occupies up to 75% width
-                    max_text_width = int(thumb_img.width * 0.75)
-                    # start with a very large font and scale down as needed
-                    target_font_size = max(32, int(thumb_img.width * 0.95))
-
-                    # uppercase the text and prepare wrapped lines (3 words per line)
-                    text = (text or '').upper()
-                    words = [w for w in text.split() if w]
-                    if not words:
-                        continue
-                    lines = [ ' '.join(words[i:i+3]) for i in range(0, len(words), 3) ]
-
-                    # pick starting font and measure each line
-                    font_size = target_font_size
-                    font = get_font_variant(font_size, bold=True)
-                    measure = Image.new('RGBA', (10, 10), (0, 0, 0, 0))
-                    md = ImageDraw.Draw(measure)
-
-                    line_widths = []
-                    line_heights = []
-                    for ln in lines:
-                        bb = md.textbbox((0,0), ln, font=font)
-                        w = bb[2] - bb[0]
-                        h = bb[3] - bb[1]
-                        line_widths.append(w)
-                        line_heights.append(h)
-
-                    max_line_w = max(line_widths)
-                    # if the widest line exceeds allowed width, scale font down
-                    if max_line_w > 0 and max_line_w > max_text_width:
-                        scale = max_text_width / float(max_line_w)
-                        font_size = max(10, int(font_size * scale))
-                        font = get_font_variant(font_size, bold=True)
-                        line_widths = []
-                        line_heights = []
-                        for ln in lines:
-                            bb = md.textbbox((0,0), ln, font=font)
-                            line_widths.append(bb[2]-bb[0])
-                            line_heights.append(bb[3]-bb[1])
-                        max_line_w = max(line_widths)
-
-                    # line-height increase by 30%
-                    base_line_h = int(sum(line_heights) / float(len(line_heights))) if line_heights else font_size
-                    line_height = int(round(base_line_h * 1.3))
-
-                    pad_x, pad_y = 12, 8
-                    rect_w = max_line_w + pad_x * 2
-                    rect_h = line_height * len(lines) + pad_y * 2
-
-                    # stroke width proportional to font size
-                    stroke_w = max(2, int(round(font_size * 0.12)))
-
-                    # create text layer and draw each wrapped line centered in the layer
-                    text_layer = Image.new('RGBA', (rect_w, rect_h), (0,0,0,0))
-                    td = ImageDraw.Draw(text_layer)
-                    try:
-                        for idx, ln in enumerate(lines):
-                            lw = line_widths[idx]
-                            x = (rect_w - lw) // 2
-                            y = pad_y + idx * line_height
-                            td.text((x, y), ln, font=font, fill=(48,0,96,255), stroke_width=stroke_w, stroke_fill=(200,200,200,255))
-                    except TypeError:
-                        # fallback outline emulation per-line
-                        sw = int(stroke_w)
-                        for idx, ln in enumerate(lines):
-                            lw = line_widths[idx]
-                            x = (rect_w - lw) // 2
-                            y = pad_y + idx * line_height
-                            ox = [(-sw,0),(sw,0),(0,-sw),(0,sw),(-sw,-sw),(sw,sw),(-sw,sw),(sw,-sw)]
-                            for dx,dy in ox:
-                                td.text((x+dx, y+dy), ln, font=font, fill=(200,200,200,255))
-                            td.text((x, y), ln, font=font, fill=(48,0,96,255))
-
-                    # rotate the text layer 30 degrees and paste centered
-                    rotated = text_layer.rotate(30, expand=True, resample=Image.BICUBIC)
-                    tx = (thumb_img.width - rotated.width) // 2
-                    ty = (thumb_img.height - rotated.height) // 2
-                    thumb_img.paste(rotated, (tx, ty), rotated)
-
-                    out_name = os.path.splitext(os.path.basename(output_path))[0] + '.jpg'
-                    out_path = os.path.join(thumbs_dir, out_name)
-                    thumb_img.convert('RGB').save(out_path, quality=90)
-                    log(f"Thumbnail created: {out_path}")
+                    bed = get_audio_bed(music)
+                    if bed is not None:
+                        pcm_paths[music] = bed.save_npy(os.path.join(tmp, f"bed_{len(pcm_paths)}.npy"))
                 except Exception as e:
-                    log(f"Warning: could not create thumbnail for {output_path}: {e}")
-            else:
-                log(f"No frame available to create thumbnail for {output_path}")
+                    log(f"Warning: could not pre-decode audio {music}: {e}")
+            job['audio_pcm'] = pcm_paths.get(music)
+        futures = {pool.submit(render_fanout, group) if fanout else pool.submit(render_row, group[0]): group
+                   for group in tasks}
+        for fut in as_completed(futures):
+            group = futures[fut]
+            try:
+                res = fut.result()
+                results = res if fanout else [res]
+            except Exception as e:
+                # worker died (e.g. killed by the OS); the other rows keep going
+                results = []
+                for job in group:
+                    log(f"Error writing {job['output_path']}: worker failed: {e}")
+                    results.append({'idx': job['idx'], 'output_path': job['output_path'], 'ok': False, 'thumbnail': None, 'error': str(e)})
+                    progress.emit('row_failed', idx=job['idx'], output=job['output_path'], error=str(e))
+            for res in results:
+                on_result(res)
+
+
+def parse_id_list(value):
+    # "3,7,10-12" -> {'3', '7', '10', '11', '12'}
+    ids = set()
+    for part in (value or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            lo, hi = part.split('-', 1)
+            try:
+                ids.update(str(i) for i in range(int(lo), int(hi) + 1))
+                continue
+            except ValueError:
+                pass
+        ids.add(part)
+    return ids
+
+
+def select_rows(rows, limit=None, row_range=None, ids=None):
+    # returns the indexes of the rows to render; row_range is 1-based and inclusive
+    selected = []
+    for idx, row in enumerate(rows):
+        if row_range:
+            start, end = row_range
+            if idx + 1 < start or (end is not None and idx + 1 > end):
+                continue
+        if ids:
+            row_id = (row.get("ID") or str(idx + 1)).strip()
+            if row_id not in ids:
+                continue
+        selected.append(idx)
+    if limit is not None and limit >= 0:
+        selected = selected[:limit]
+    return selected
+
+
+def parse_range(value):
+    # "5-20", "5-" or "7"
+    if not value:
+        return None
+    if '-' in value:
+        lo, hi = value.split('-', 1)
+        return (int(lo or 1), int(hi) if hi.strip() else None)
+    n = int(value)
+    return (n, n)
+
+
+def parse_size(value):
+    # "540x960" -> (540, 960); libx264 wants even dimensions
+    w, _, h = value.lower().partition('x')
+    return (int(w) // 2 * 2, int(h) // 2 * 2)
+
+
+def parse_aspects(value):
+    # "4:5,1:1" -> ['4:5', '1:1']
+    aspects = [a.strip() for a in (value or '').split(',') if a.strip()]
+    unknown = [a for a in aspects if a not in ASPECTS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown aspect(s) {', '.join(unknown)}; choose from {', '.join(ASPECTS)}")
+    return aspects
+
+
+def focus_arg(value):
+    try:
+        return parse_focus(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def draft_settings(args):
+    return dict(DRAFT_DEFAULTS, size=list(args.draft_size), fps=args.draft_fps, max_seconds=args.draft_seconds,
+                audio=not args.no_audio)
+
+
+def build_parser():
+    ap = argparse.ArgumentParser(description='Render hook reels for each CSV row')
+    ap.add_argument('--csv', default=csv_file_path, help='hooks CSV (FilePath column is updated in place)')
+    ap.add_argument('--music', default=audio_path, help='music bed looped/trimmed under every reel')
+    ap.add_argument('--src', default=video_src_dir, help='directory of source reels')
+    ap.add_argument('--out', default=target_dir, help='output directory for reels and thumbnails')
+    ap.add_argument('--rows', type=int, default=None, help='render at most this many of the selected rows')
+    ap.add_argument('--range', dest='row_range', type=parse_range, default=None, help='1-based inclusive row range, e.g. 5-20 or 5-')
+    ap.add_argument('--ids', type=parse_id_list, default=None, help='only rows with these IDs, e.g. 3,7,10-12')
+    ap.add_argument('--workers', type=int, default=1, help='number of rows to render in parallel processes')
+    ap.add_argument('--threads', type=int, default=None, help='total ffmpeg thread budget for this run, split across workers')
+    ap.add_argument('--backend', choices=('moviepy', 'ffmpeg'), default='moviepy', help='moviepy composites frames in Python; ffmpeg runs one filter graph per reel')
+    ap.add_argument('--fanout', action='store_true', help='ffmpeg backend: rows sharing a source clip are decoded and scaled once and encoded in one ffmpeg run')
+    ap.add_argument('--aspects', type=parse_aspects, default=[], help='with --fanout, also write these aspect variants per row, e.g. 4:5,1:1')
+    ap.add_argument('--cycle-sources', action='store_true', help='rows beyond the number of source reels reuse them round-robin instead of being skipped')
+    ap.add_argument('--focus', type=focus_arg, default=None, help='focal point the crop window is centered on, as x,y fractions of the source (default 0.5,0.5)')
+    ap.add_argument('--force', action='store_true', help='re-render rows even when the render manifest says they are up to date')
+    ap.add_argument('--skip-thumbnails', action='store_true', help='encode only; make thumbnails later with thumbnails.py')
+    ap.add_argument('--profile', choices=PROFILE_NAMES, default=DEFAULT_PROFILE, help='encoder profile (see encoder_profiles.py); --draft uses "draft"')
+    ap.add_argument('--draft', action='store_true', help=f'fast proxy render into <out>/{DRAFTS_SUBDIR}; the CSV is left untouched')
+    ap.add_argument('--draft-size', type=parse_size, default=DRAFT_DEFAULTS['size'], help='proxy canvas, e.g. 540x960')
+    ap.add_argument('--draft-fps', type=float, default=DRAFT_DEFAULTS['fps'], help='fps ceiling for drafts')
+    ap.add_argument('--draft-seconds', type=float, default=DRAFT_DEFAULTS['max_seconds'], help='drafts stop after this many seconds (0 = full length)')
+    ap.add_argument('--no-audio', action='store_true', help='drafts without music or source audio')
+    ap.add_argument('--run-record', default=None, help=f'write the run record (stage timings, counters) here instead of <out>/{RUN_RECORDS_SUBDIR}/')
+    ap.add_argument('--events', default=None, help='append JSON-lines progress events to this file (see progress.py)')
+    return ap
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.csv != csv_file_path and not os.path.isfile(args.csv):
+        log(f"Error: CSV not found: {args.csv}")
+        return 2
+
+    if (args.fanout or args.aspects) and args.backend != 'ffmpeg':
+        log("Error: --fanout/--aspects need --backend ffmpeg")
+        return 2
+    if args.aspects and not args.fanout:
+        log("Error: --aspects needs --fanout")
+        return 2
+
+    os.makedirs(args.out, exist_ok=True)
+    progress.configure(args.events)
+    log(f"Starting app.py; script_dir={script_dir}; csv={args.csv}; src={args.src}; out={args.out}; music={args.music}")
+    recorder = RunRecorder(args.run_record, csv=os.path.abspath(args.csv), backend=args.backend, workers=args.workers,
+                           profile=args.profile, draft=bool(args.draft), fanout=args.fanout, pid=os.getpid())
+    with recorder.timer('csv'):
+        rows, original_fieldnames = load_rows(args.csv)
+    with recorder.timer('probe'):
+        sources = list_source_videos(args.src)
+    log(f"Found {len(sources)} source reels: {[r['name'] for r in sources]}")
+    log(f"Loaded {len(rows)} CSV rows; original_fieldnames={original_fieldnames}")
+
+    # FilePath updates are journaled per row and flushed to the CSV in batches;
+    # only this process writes the CSV, pool workers just report results back
+    writeback = CsvWriteBack(args.csv, rows, original_fieldnames, log=log)
+    if os.path.isfile(args.csv):
+        writeback.replay_journal()
+
+    selected = set(select_rows(rows, args.rows, args.row_range, args.ids))
+    log(f"Selected {len(selected)} of {len(rows)} rows")
+    draft = draft_settings(args) if args.draft else None
+    out_dir = os.path.join(args.out, DRAFTS_SUBDIR) if draft else args.out
+    if not recorder.path:
+        recorder.path = os.path.join(out_dir, RUN_RECORDS_SUBDIR, f"run_{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}.json")
+    if draft:
+        os.makedirs(out_dir, exist_ok=True)
+        log(f"Draft mode: {draft['size'][0]}x{draft['size'][1]}, <= {draft['fps']:g} fps, "
+            f"{draft['max_seconds'] or 'full'} s, profile {draft['profile']}, audio {'on' if draft['audio'] else 'off'} -> {out_dir}")
+    planned = [j for j in plan_jobs(rows, sources, args.src, out_dir, args.music, args.backend, draft, args.profile,
+                                              args.aspects, args.cycle_sources, args.focus) if j['idx'] in selected]
+
+    # skip rows whose output was rendered from identical inputs
+    manifest = RenderManifest(out_dir, log=log)
+    jobs = []
+    skipped = 0
+    for job in planned:
+        if (not args.force and manifest.is_fresh(job['output_path'], job['cache_key'])
+                and all(os.path.isfile(v['output_path']) for v in job['variants'])):
+            skipped += 1
+            recorder.skip()
+            progress.emit('row_skipped', idx=job['idx'], output=job['output_path'])
+            if not draft and os.path.abspath(rows[job['idx']].get('FilePath') or '') != os.path.abspath(job['output_path']):
+                with recorder.timer('csv'):
+                    writeback.update(job['idx'], job['output_path'])
+            continue
+        job['events_path'] = args.events
+        job['make_thumbnail'] = job['make_thumbnail'] and not args.skip_thumbnails
+        jobs.append(job)
+    if skipped:
+        log(f"Skipping {skipped} up-to-date row(s); {len(jobs)} to render")
+    cache_keys = {j['idx']: j['cache_key'] for j in jobs}
+    counts = {'rendered': 0, 'skipped': skipped, 'failed': 0}
+    progress.emit('batch_started', rows=len(jobs), skipped=skipped)
+
+    def on_result(res):
+        recorder.add_result(res)
+        if res.get('ok'):
+            counts['rendered'] += 1
+            if not draft:
+                with recorder.timer('csv'):
+                    writeback.update(res['idx'], res['output_path'])
+            manifest.record(res['output_path'], cache_keys[res['idx']])
+        else:
+            counts['failed'] += 1
+
+    try:
+        run_jobs(jobs, args.workers, on_result, args.threads, fanout=args.fanout)
+    finally:
+        with recorder.timer('csv'):
+            writeback.close()
+        manifest.save()
+        progress.emit('batch_finished', **counts)
+        try:
+            recorder.save()
+            log(f"Run record: {recorder.path}")
         except Exception as e:
-            log(f"Warning: thumbnail step failed for {output_path}: {e}")
-    except Exception as e:
-        log(f"Warning: could not update CSV {csv_file_path}: {e}")
+            log(f"Warning: could not write run record {recorder.path}: {e}")
+    return 0
+
 
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# Decode-once music bed shared by every row of a batch.
+#
+# The music file is decoded to PCM a single time; each reel then gets an
+# AudioArrayClip that is a slice of that buffer (trim) or the buffer repeated
+# to the reel's length (loop), so no per-row ffmpeg audio reader is spawned.
+# For process pools the parent saves the PCM as .npy and workers memory-map it,
+# which keeps one copy of the samples in the OS page cache for all of them.
+import os
+
+import numpy as np
+try:
+    from moviepy.editor import AudioFileClip
+except Exception:
+    from moviepy import AudioFileClip
+from moviepy.audio.AudioClip import AudioArrayClip
+
+
+AUDIO_FPS = 44100
+
+# per-process cache: {(abspath, size, mtime_ns, fps): AudioBed}
+_beds = {}
+
+
+class AudioBed:
+    def __init__(self, samples, fps=AUDIO_FPS, path=None):
+        if samples.ndim == 1:
+            samples = samples.reshape(-1, 1)
+        self.samples = samples
+        self.fps = fps
+        self.path = path
+        self.duration = len(samples) / float(fps) if fps else 0.0
+
+    @classmethod
+    def decode(cls, path, fps=AUDIO_FPS):
+        src = AudioFileClip(path, fps=fps)
+        try:
+            samples = src.to_soundarray(fps=fps)
+        finally:
+            try:
+                src.close()
+            except Exception:
+                pass
+        # float32 halves the footprint of the default float64 array
+        return cls(np.ascontiguousarray(samples, dtype=np.float32), fps, path)
+
+    @classmethod
+    def from_npy(cls, npy_path, fps=AUDIO_FPS, path=None):
+        return cls(np.load(npy_path, mmap_mode='r'), fps, path)
+
+    def save_npy(self, npy_path):
+        np.save(npy_path, np.asarray(self.samples))
+        return npy_path
+
+    def clip_for(self, duration):
+        # trimmed view when the bed is long enough, otherwise loop it to the duration
+        n = max(1, int(round(float(duration) * self.fps)))
+        total = len(self.samples)
+        if n <= total:
+            arr = self.samples[:n]
+        else:
+            reps = -(-n // total)
+            arr = np.concatenate([self.samples] * reps)[:n]
+        return AudioArrayClip(arr, fps=self.fps)
+
+
+def _cache_key(path, fps):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns, fps)
+
+
+def get_audio_bed(path, fps=AUDIO_FPS, npy_path=None):
+    # returns the cached bed for this process; None when there is no usable music file
+    if not path or not os.path.isfile(path):
+        return None
+    key = _cache_key(path, fps)
+    bed = _beds.get(key)
+    if bed is None:
+        if npy_path and os.path.isfile(npy_path):
+            bed = AudioBed.from_npy(npy_path, fps, path)
+        else:
+            bed = AudioBed.decode(path, fps)
+        _beds.clear()
+        _beds[key] = bed
+    return bed
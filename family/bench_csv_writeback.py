@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# Compare CSV + run log I/O of the old per-row sheet rewrite against the
+# batched CsvWriteBack, for growing sheet sizes. No video work is done; each
+# "rendered" row just records a FilePath the way family/app.py does.
+#
+#   python bench_csv_writeback.py [--rows 10,50,100,200,400] [--batch 25]
+import argparse
+import os
+import tempfile
+import time
+
+from csv_writeback import CsvWriteBack, csv_fieldnames, write_csv_atomic
+
+
+FIELDNAMES = ['ID', 'Hook', 'Hashtags', 'LongTailKeywords', 'FilePath']
+
+
+def make_rows(n):
+    rows = []
+    for i in range(1, n + 1):
+        rows.append({
+            'ID': str(i),
+            'Hook': f"Learn practical way number {i} to help ADHD children manage daily routines more effectively.",
+            'Hashtags': '#ADHDParenting #ChildFocus #FamilyHealth',
+            'LongTailKeywords': f"ADHD routine tip {i}, managing ADHD at home, strategies for ADHD parenting",
+            'FilePath': '',
+        })
+    return rows
+
+
+class LogCounter:
+    def __init__(self, path):
+        self.path = path
+        self.lines = 0
+
+    def __call__(self, msg):
+        with open(self.path, 'a', encoding='utf-8') as lf:
+            lf.write(str(msg) + '\n')
+        self.lines += 1
+
+
+def run_legacy(workdir, n):
+    # the pre-batching behaviour: rewrite the whole sheet and log every row, per rendered row
+    csv_path = os.path.join(workdir, 'legacy.csv')
+    log = LogCounter(os.path.join(workdir, 'legacy.log'))
+    rows = make_rows(n)
+    write_csv_atomic(csv_path, rows, FIELDNAMES)
+    csv_bytes = 0
+    t0 = time.perf_counter()
+    for idx in range(n):
+        rows[idx]['FilePath'] = os.path.join(workdir, 'output_reel', f"{idx + 1}_clip.mp4")
+        fns = csv_fieldnames(FIELDNAMES, rows)
+        log(f"Updating CSV {csv_path} with fieldnames={fns}")
+        for r in rows:
+            log(f"CSV write row ID={r.get('ID')} FilePath={r.get('FilePath')}")
+        csv_bytes += write_csv_atomic(csv_path, rows, fns)
+        log(f"CSV updated: {csv_path}")
+    elapsed = time.perf_counter() - t0
+    return {'csv_bytes': csv_bytes, 'journal_bytes': 0, 'flushes': n, 'log_lines': log.lines,
+            'log_bytes': os.path.getsize(log.path), 'seconds': elapsed}
+
+
+def run_batched(workdir, n, batch_size):
+    csv_path = os.path.join(workdir, 'batched.csv')
+    log = LogCounter(os.path.join(workdir, 'batched.log'))
+    rows = make_rows(n)
+    write_csv_atomic(csv_path, rows, FIELDNAMES)
+    t0 = time.perf_counter()
+    wb = CsvWriteBack(csv_path, rows, FIELDNAMES, batch_size=batch_size, flush_interval=float('inf'), log=log)
+    for idx in range(n):
+        wb.update(idx, os.path.join(workdir, 'output_reel', f"{idx + 1}_clip.mp4"))
+    wb.close()
+    elapsed = time.perf_counter() - t0
+    return {'csv_bytes': wb.stats['csv_bytes'], 'journal_bytes': wb.stats['journal_bytes'], 'flushes': wb.stats['flushes'],
+            'log_lines': log.lines, 'log_bytes': os.path.getsize(log.path), 'seconds': elapsed}
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Benchmark CSV FilePath write-back I/O')
+    ap.add_argument('--rows', default='10,50,100,200,400', help='comma separated sheet sizes')
+    ap.add_argument('--batch', type=int, default=25, help='CsvWriteBack batch size')
+    args = ap.parse_args()
+    sizes = [int(x) for x in args.rows.split(',') if x.strip()]
+
+    header = f"{'rows':>6} | {'mode':<8} | {'csv KB':>10} | {'journal KB':>10} | {'log lines':>9} | {'log KB':>9} | {'flushes':>7} | {'KB/flush':>8} | {'ms':>8}"
+    print(header)
+    print('-' * len(header))
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            for mode, res in (('legacy', run_legacy(workdir, n)), ('batched', run_batched(workdir, n, args.batch))):
+                # I/O per CSV rewrite: the sheet itself plus the log lines written for it
+                per_flush_kb = (res['csv_bytes'] + res['log_bytes']) / 1024.0 / max(1, res['flushes'])
+                print(f"{n:>6} | {mode:<8} | {res['csv_bytes'] / 1024.0:>10.1f} | {res['journal_bytes'] / 1024.0:>10.1f} | "
+                      f"{res['log_lines']:>9} | {res['log_bytes'] / 1024.0:>9.1f} | {res['flushes']:>7} | {per_flush_kb:>8.2f} | {res['seconds'] * 1000:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
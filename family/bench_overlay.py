@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# Microbenchmark for hook overlay generation: the old per-call font loading and
+# quadratic re-measuring word wrap against text_overlay's cached fonts and
+# cumulative-width wrap, for short/long hooks and a bulk sheet-sized run.
+#
+#   python bench_overlay.py [--repeat 5] [--bulk 130]
+import argparse
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+import text_overlay
+
+
+SHORT_HOOK = "Learn practical ways to help ADHD children manage daily routines more effectively."
+LONG_HOOK = " ".join([SHORT_HOOK] * 8)
+STYLE = dict(font_size=40, padding=(24, 16), radius=10, bg_color=(255, 255, 255, 200), text_color=(0, 0, 0, 255), prefix_words=2, prefix_color=(102, 0, 153, 255))
+MAX_WIDTH = int(1080 * 0.85)
+
+
+def legacy_font(size, bold=False):
+    try:
+        if bold:
+            return ImageFont.truetype("arialbd.ttf", size)
+        return ImageFont.truetype("arial.ttf", size)
+    except Exception:
+        try:
+            if bold:
+                return ImageFont.truetype(r"C:\Windows\Fonts\arialbd.ttf", size)
+            return ImageFont.truetype(r"C:\Windows\Fonts\arial.ttf", size)
+        except Exception:
+            return ImageFont.load_default()
+
+
+def legacy_overlay(text, max_width, font_size=16, padding=(12, 8), radius=3, bg_color=(255, 255, 255, 128), text_color=(0, 0, 0, 255), prefix_words=2, prefix_color=(102, 0, 153, 255)):
+    # the make_rounded_text_image that family/app.py shipped before text_overlay.py
+    words = text.split()
+    draw = ImageDraw.Draw(Image.new("RGBA", (10, 10)))
+    lines_words = []
+    cur = []
+    normal_font = legacy_font(font_size, bold=False)
+    for w in words:
+        test = " ".join(cur + [w])
+        w_size = draw.textbbox((0, 0), test, font=normal_font)[2]
+        if w_size <= max_width - 2 * padding[0]:
+            cur.append(w)
+        else:
+            if cur:
+                lines_words.append(cur)
+            cur = [w]
+    if cur:
+        lines_words.append(cur)
+
+    line_heights = []
+    text_w = 0
+    for lw in lines_words:
+        bbox = draw.textbbox((0, 0), " ".join(lw), font=normal_font)
+        line_heights.append(bbox[3] - bbox[1])
+        text_w = max(text_w, bbox[2] - bbox[0])
+    text_h = sum(line_heights) + (len(lines_words) - 1) * 4
+
+    img_w = text_w + 2 * padding[0]
+    img_h = text_h + 2 * padding[1]
+    img = Image.new("RGBA", (img_w, img_h), (0, 0, 0, 0))
+    d = ImageDraw.Draw(img)
+    d.rounded_rectangle([0, 0, img_w, img_h], radius=radius, fill=bg_color)
+
+    remaining_prefix = prefix_words
+    y = padding[1]
+    space_w = d.textbbox((0, 0), " ", font=normal_font)[2]
+    for i, lw in enumerate(lines_words):
+        line_text = " ".join(lw)
+        bbox = d.textbbox((0, 0), line_text, font=normal_font)
+        x = (img_w - (bbox[2] - bbox[0])) // 2
+        if remaining_prefix > 0:
+            num_prefix = min(remaining_prefix, len(lw))
+            prefix_text = " ".join(lw[:num_prefix])
+            rest_text = " ".join(lw[num_prefix:]) if num_prefix < len(lw) else ""
+            prefix_font = legacy_font(font_size, bold=True)
+            d.text((x, y), prefix_text, font=prefix_font, fill=prefix_color)
+            prefix_bbox = d.textbbox((0, 0), prefix_text, font=prefix_font)
+            if rest_text:
+                d.text((x + prefix_bbox[2] - prefix_bbox[0] + space_w, y), rest_text, font=normal_font, fill=text_color)
+            remaining_prefix -= num_prefix
+        else:
+            d.text((x, y), line_text, font=normal_font, fill=text_color)
+        y += line_heights[i] + 4
+    return img
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Benchmark hook overlay generation')
+    ap.add_argument('--repeat', type=int, default=5)
+    ap.add_argument('--bulk', type=int, default=130, help='hooks per bulk run (one sheet)')
+    args = ap.parse_args()
+
+    bulk_hooks = [f"{SHORT_HOOK} Tip number {i} for busy parents." for i in range(args.bulk)]
+    cases = [
+        ('short hook', lambda make: make(SHORT_HOOK, MAX_WIDTH, **STYLE)),
+        ('long hook', lambda make: make(LONG_HOOK, MAX_WIDTH, **STYLE)),
+        (f'bulk x{args.bulk}', lambda make: [make(h, MAX_WIDTH, **STYLE) for h in bulk_hooks]),
+    ]
+    # warm the caches once, like any row after the first in a batch
+    text_overlay.make_rounded_text_image(SHORT_HOOK, MAX_WIDTH, **STYLE)
+
+    print(f"{'case':<12} | {'legacy ms':>10} | {'cached ms':>10} | {'speedup':>7}")
+    print('-' * 50)
+    for name, case in cases:
+        legacy = best_of(lambda: case(legacy_overlay), args.repeat)
+        cached = best_of(lambda: case(text_overlay.make_rounded_text_image), args.repeat)
+        print(f"{name:<12} | {legacy * 1000:>10.2f} | {cached * 1000:>10.2f} | {legacy / cached:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
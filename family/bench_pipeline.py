@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# Stage-by-stage benchmark of the family/app.py recipe on synthetic media, so
+# runs are reproducible anywhere ffmpeg is installed and comparable across commits.
+#
+#   python bench_pipeline.py [--sheets 1,10,100] [--seconds 3] [--backend moviepy] [--json out.json]
+#   python bench_pipeline.py --compare before.json after.json
+#
+# Fixtures are generated with ffmpeg's testsrc2/sine sources: a few clips in
+# landscape, portrait and square sizes, plus a music bed. For every sheet size a
+# hooks CSV with that many rows is written and then
+#   - a handful of rows (--sample) are rendered stage by stage: probe, decode,
+#     scale, overlay build, composite, encode, audio attach and thumbnail
+#     (decode/scale/composite/encode are cumulative frame loops; each stage is
+#     reported as the difference to the previous one),
+#   - CsvWriteBack records a FilePath for every row,
+#   - the whole sheet goes through app.main() end to end (--cycle-sources, --force).
+# Results are written as JSON together with the commit, ffmpeg version and settings.
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import app
+import ffmpeg_backend
+from csv_writeback import CsvWriteBack, write_csv_atomic
+from encoder_profiles import DEFAULT_PROFILE, PROFILE_NAMES, moviepy_kwargs, output_fps
+from geometry import fill_clip, plan_fill
+from thumbnails import make_thumbnail
+
+
+STAGES = ('probe', 'decode', 'scale', 'overlay_build', 'composite', 'encode', 'audio_attach', 'thumbnail', 'csv_writeback')
+SOURCE_SIZES = ('1280x720', '720x1280', '1080x1080', '1920x1080')
+HOOK = "Learn practical ways to help ADHD children manage daily routines more effectively, row {i}."
+
+
+def make_fixtures(tmp, seconds, fps=30):
+    src_dir = os.path.join(tmp, 'reels')
+    os.makedirs(src_dir, exist_ok=True)
+    for n, size in enumerate(SOURCE_SIZES):
+        ffmpeg_backend.run_ffmpeg([ffmpeg_backend.FFMPEG, '-y', '-v', 'error',
+                                   '-f', 'lavfi', '-i', f"testsrc2=size={size}:rate={fps}:duration={seconds}",
+                                   '-f', 'lavfi', '-i', f"sine=frequency={220 * (n + 1)}:duration={seconds}",
+                                   '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p', '-c:a', 'aac',
+                                   '-shortest', os.path.join(src_dir, f"src_{n}_{size}.mp4")])
+    music = os.path.join(tmp, 'bed.m4a')
+    # shorter than the clips so the loop path is exercised
+    ffmpeg_backend.run_ffmpeg([ffmpeg_backend.FFMPEG, '-y', '-v', 'error', '-f', 'lavfi', '-i',
+                               f"sine=frequency=440:duration={max(1, seconds // 2)}", '-c:a', 'aac', music])
+    return src_dir, music
+
+
+def write_sheet(path, n):
+    fieldnames = ['ID', 'Hook', 'Hashtags', 'LongTailKeywords', 'FilePath']
+    rows = [{'ID': str(i), 'Hook': HOOK.format(i=i), 'Hashtags': '#ADHDParenting #FamilyHealth',
+             'LongTailKeywords': f"bench row {i}, adhd routines", 'FilePath': ''} for i in range(1, n + 1)]
+    write_csv_atomic(path, rows, fieldnames)
+    return rows, fieldnames
+
+
+def _consume(clip, fps):
+    n = 0
+    for _ in clip.iter_frames(fps=fps):
+        n += 1
+    return n
+
+
+def time_row_stages(job, out_dir):
+    # one row through the MoviePy recipe, one stage at a time; returns {stage: seconds}
+    try:
+        from moviepy.editor import VideoFileClip, CompositeVideoClip, ImageClip
+    except Exception:
+        from moviepy import VideoFileClip, CompositeVideoClip, ImageClip
+    import numpy as np
+
+    t = {}
+    t0 = time.perf_counter()
+    ffmpeg_backend._probe.cache_clear()
+    ffmpeg_backend.probe(job['video_path'])
+    t['probe'] = time.perf_counter() - t0
+
+    clip = VideoFileClip(job['video_path'])
+    final = None
+    try:
+        fps = output_fps(job['profile'], clip.fps)
+        t0 = time.perf_counter()
+        _consume(clip, fps)
+        decode = time.perf_counter() - t0
+
+        geom = plan_fill(clip.w, clip.h, job['canvas'][0], job['canvas'][1], job.get('focus'))
+        scaled = fill_clip(clip, geom)
+        t0 = time.perf_counter()
+        _consume(scaled, fps)
+        scale = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        img_clip = ImageClip(np.array(app.overlay_image(job))).with_position(('center', 'center')).with_duration(clip.duration)
+        t['overlay_build'] = time.perf_counter() - t0
+
+        final = CompositeVideoClip([scaled.with_position(('center', 'center')), img_clip], size=tuple(job['canvas']))
+        t0 = time.perf_counter()
+        _consume(final, fps)
+        composite = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        final.write_videofile(job['output_path'], fps=fps, audio=False, logger=None, **moviepy_kwargs(job['profile']))
+        encode = time.perf_counter() - t0
+
+        # cumulative loops -> per-stage cost
+        t['decode'] = decode
+        t['scale'] = max(0.0, scale - decode)
+        t['composite'] = max(0.0, composite - scale)
+        t['encode'] = max(0.0, encode - composite)
+
+        t0 = time.perf_counter()
+        with_audio = app.attach_audio(final, job['audio_path'], final.duration)
+        if getattr(with_audio, 'audio', None) is not None:
+            with_audio.audio.to_soundarray(fps=44100)
+        t['audio_attach'] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        make_thumbnail(clip.get_frame(0), job['row'], job['output_path'], os.path.join(out_dir, 'thumbnails'))
+        t['thumbnail'] = time.perf_counter() - t0
+    finally:
+        for c in (final, clip):
+            if c is not None:
+                c.close()
+    return t
+
+
+def time_writeback(csv_path, rows, fieldnames, out_dir):
+    # FilePath recorded for every row, like the parent process does during a batch
+    t0 = time.perf_counter()
+    wb = CsvWriteBack(csv_path, [dict(r) for r in rows], fieldnames, log=lambda msg: None)
+    for idx in range(len(rows)):
+        wb.update(idx, os.path.join(out_dir, f"{idx + 1}.mp4"))
+    wb.close()
+    return time.perf_counter() - t0
+
+
+def bench_sheet(n, src_dir, music, tmp, args):
+    work = os.path.join(tmp, f"sheet_{n}")
+    os.makedirs(work, exist_ok=True)
+    csv_path = os.path.join(work, 'hooks.csv')
+    rows, fieldnames = write_sheet(csv_path, n)
+    stage_dir = os.path.join(work, 'stages')
+    os.makedirs(stage_dir, exist_ok=True)
+    jobs = app.plan_jobs(rows, app.list_source_videos(src_dir), src_dir, stage_dir, music, 'moviepy',
+                         profile=args.profile, cycle_sources=True)
+
+    # render stages: mean per sampled row; csv_writeback: the whole sheet
+    samples = [time_row_stages(job, stage_dir) for job in jobs[:max(0, args.sample)]]
+    stages = {s: round(sum(x.get(s, 0.0) for x in samples) / len(samples), 4) for s in STAGES[:-1]} if samples else {}
+    stages['csv_writeback'] = round(time_writeback(csv_path + '.wb.csv', rows, fieldnames, work), 4)
+
+    result = {'rows': n, 'sampled_rows': len(samples), 'stages_s': stages}
+    if not args.no_e2e:
+        out_dir = os.path.join(work, 'out')
+        argv = ['--csv', csv_path, '--src', src_dir, '--music', music, '--out', out_dir, '--backend', args.backend,
+                '--workers', str(args.workers), '--profile', args.profile, '--cycle-sources', '--force']
+        t0 = time.perf_counter()
+        app.main(argv)
+        wall = time.perf_counter() - t0
+        rendered = len([f for f in os.listdir(out_dir) if f.endswith('.mp4')]) if os.path.isdir(out_dir) else 0
+        result['end_to_end'] = {'backend': args.backend, 'workers': args.workers, 'wall_s': round(wall, 3),
+                                'rendered': rendered, 'rows_per_min': round(rendered * 60.0 / wall, 2) if wall else None,
+                                'output_mb': round(sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir)
+                                                       if f.endswith('.mp4')) / 1e6, 2) if rendered else 0}
+    return result
+
+
+def environment():
+    def run(cmd):
+        try:
+            return subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).stdout.decode('utf-8', 'replace').strip()
+        except Exception:
+            return None
+    ffmpeg = run([ffmpeg_backend.FFMPEG, '-version'])
+    return {'commit': run(['git', 'rev-parse', '--short', 'HEAD']), 'python': sys.version.split()[0],
+            'platform': platform.platform(), 'cpus': os.cpu_count(),
+            'ffmpeg': ffmpeg.splitlines()[0] if ffmpeg else None,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def print_results(res):
+    print(f"commit {res['env'].get('commit')}  {res['env'].get('ffmpeg')}")
+    print(f"{'rows':>5} | " + ' | '.join(f"{s[:10]:>10}" for s in STAGES) + f" | {'e2e s':>8} | {'rows/min':>8}")
+    for sheet in res['sheets']:
+        st = sheet['stages_s']
+        e2e = sheet.get('end_to_end') or {}
+        print(f"{sheet['rows']:>5} | " + ' | '.join(f"{st.get(s, 0):>10.3f}" for s in STAGES)
+              + f" | {e2e.get('wall_s', 0):>8.2f} | {e2e.get('rows_per_min') or 0:>8.1f}")
+
+
+def compare(old_path, new_path):
+    # per-stage and end-to-end ratios new/old for matching sheet sizes (< 1.0 is faster)
+    with open(old_path, encoding='utf-8') as f:
+        old = {s['rows']: s for s in json.load(f)['sheets']}
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)['sheets']
+    print(f"{'rows':>5} | {'stage':<14} | {'old s':>9} | {'new s':>9} | {'new/old':>7}")
+    for sheet in new:
+        before = old.get(sheet['rows'])
+        if not before:
+            continue
+        pairs = [(s, before['stages_s'].get(s), sheet['stages_s'].get(s)) for s in STAGES]
+        pairs.append(('end_to_end', (before.get('end_to_end') or {}).get('wall_s'), (sheet.get('end_to_end') or {}).get('wall_s')))
+        for stage, a, b in pairs:
+            if a is None or b is None:
+                continue
+            print(f"{sheet['rows']:>5} | {stage:<14} | {a:>9.3f} | {b:>9.3f} | {(b / a if a else 0):>7.2f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Benchmark the family reel pipeline stage by stage on synthetic media')
+    ap.add_argument('--sheets', default='1,10,100', help='comma separated sheet sizes (rows)')
+    ap.add_argument('--seconds', type=int, default=3, help='length of the synthetic source clips')
+    ap.add_argument('--sample', type=int, default=3, help='rows per sheet timed stage by stage')
+    ap.add_argument('--backend', choices=('moviepy', 'ffmpeg'), default='moviepy', help='backend for the end-to-end run')
+    ap.add_argument('--workers', type=int, default=1, help='app.py --workers for the end-to-end run')
+    ap.add_argument('--profile', choices=PROFILE_NAMES, default=DEFAULT_PROFILE)
+    ap.add_argument('--no-e2e', action='store_true', help='stage timings only, skip the full app.main() runs')
+    ap.add_argument('--json', default=None, help='results file (default: bench_pipeline_<commit>.json)')
+    ap.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two results files and exit')
+    args = ap.parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    env = environment()
+    res = {'env': env, 'settings': {k: v for k, v in vars(args).items() if k not in ('json', 'compare')}, 'sheets': []}
+    with tempfile.TemporaryDirectory(prefix='bench_pipeline_') as tmp:
+        src_dir, music = make_fixtures(tmp, args.seconds)
+        for n in [int(x) for x in args.sheets.split(',') if x.strip()]:
+            res['sheets'].append(bench_sheet(n, src_dir, music, tmp, args))
+    print_results(res)
+    out = args.json or f"bench_pipeline_{env.get('commit') or 'local'}.json"
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(res, f, indent=2)
+    print('Results written to', out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# Encode speed and output size of every encoder profile on the same clip.
+#
+#   python bench_profiles.py [--src clip.mp4] [--seconds 10] [--profiles draft,standard] [--json out.json]
+#
+# Without --src a synthetic 1080x1920 60 fps testsrc2 clip with a sine tone is
+# generated, so the fps ceilings of the profiles show up in the numbers.
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import ffmpeg_backend
+from encoder_profiles import PROFILE_NAMES, ffmpeg_args, get_profile, output_fps
+
+
+def make_synthetic(tmp, seconds):
+    src = os.path.join(tmp, 'synthetic_src.mp4')
+    ffmpeg_backend.run_ffmpeg([ffmpeg_backend.FFMPEG, '-y', '-v', 'error',
+                               '-f', 'lavfi', '-i', f"testsrc2=size=1080x1920:rate=60:duration={seconds}",
+                               '-f', 'lavfi', '-i', f"sine=frequency=440:duration={seconds}",
+                               '-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '12', '-pix_fmt', 'yuv420p',
+                               '-c:a', 'aac', '-shortest', src])
+    return src
+
+
+def encode(src, out, profile, info, threads=None):
+    fps = output_fps(profile, info.get('fps'))
+    cmd = [ffmpeg_backend.FFMPEG, '-y', '-hide_banner', '-loglevel', 'error', '-i', src, '-map', '0:v', '-map', '0:a?',
+           '-r', f"{float(fps):g}"] + ffmpeg_args(profile, threads) + [out]
+    t0 = time.perf_counter()
+    ffmpeg_backend.run_ffmpeg(cmd)
+    elapsed = time.perf_counter() - t0
+    duration = info.get('duration') or 0
+    size = os.path.getsize(out)
+    return {'profile': profile['name'], 'preset': profile['preset'], 'crf': profile['crf'], 'fps': fps,
+            'seconds': round(elapsed, 3), 'encode_fps': round(duration * fps / elapsed, 1) if elapsed else None,
+            'size_kb': round(size / 1024.0, 1), 'kbps': round(size * 8 / 1000.0 / duration, 1) if duration else None}
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Benchmark the encoder profiles')
+    ap.add_argument('--src', help='clip to encode (default: synthetic testsrc2)')
+    ap.add_argument('--seconds', type=int, default=10, help='length of the synthetic clip')
+    ap.add_argument('--profiles', default=','.join(PROFILE_NAMES), help='comma separated profile names')
+    ap.add_argument('--threads', type=int, default=None)
+    ap.add_argument('--repeat', type=int, default=1, help='keep the best of N encodes')
+    ap.add_argument('--json', help='also write the results to this file')
+    args = ap.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='bench_profiles_') as tmp:
+        src = args.src or make_synthetic(tmp, args.seconds)
+        info = ffmpeg_backend.probe(src)
+        print(f"source: {info.get('width')}x{info.get('height')} @ {info.get('fps')} fps, {info.get('duration')} s")
+        print(f"{'profile':<9} | {'fps':>4} | {'best s':>7} | {'enc fps':>8} | {'size KB':>9} | {'kbit/s':>8}")
+        print('-' * 60)
+        for name in [n.strip() for n in args.profiles.split(',') if n.strip()]:
+            profile = get_profile(name)
+            out = os.path.join(tmp, f"bench_{name}.mp4")
+            runs = [encode(src, out, profile, info, args.threads) for _ in range(max(1, args.repeat))]
+            best = min(runs, key=lambda r: r['seconds'])
+            results.append(best)
+            print(f"{name:<9} | {best['fps']:>4g} | {best['seconds']:>7.2f} | {best['encode_fps'] or 0:>8.1f} | "
+                  f"{best['size_kb']:>9.1f} | {best['kbps'] or 0:>8.1f}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'source': {k: info.get(k) for k in ('width', 'height', 'fps', 'duration')}, 'results': results}, f, indent=2)
+        print('Results written to', args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# Caption overlays for the Travel and Wellness batch scripts.
+#
+# Replaces MoviePy's TextClip(method='caption'), which shells out to
+# ImageMagick for every video: the caption box (solid background, text wrapped
+# and centered to a fixed width) is drawn with PIL and saved as a PNG in an
+# on-disk cache keyed by text, width and style, then composited onto the clip
+# with a single ffmpeg overlay (or MoviePy with --backend moviepy).
+#
+#   png = caption_png("Hidden beaches", 980, CAPTION_STYLE)
+#   run_captioned(jobs, workers=4)   # jobs from caption_job()
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image, ImageDraw
+
+import ffmpeg_backend
+from encoder_profiles import get_profile, moviepy_kwargs, output_fps
+from text_overlay import get_font_variant, text_width, wrap_words
+
+
+# bump when caption drawing changes so cached PNGs are redrawn
+CAPTION_VERSION = 1
+DEFAULT_CACHE_DIR = os.environ.get('REELS_OVERLAY_CACHE') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'overlay_cache')
+
+# what the old TextClip calls asked for: fontsize=70, Arial-Bold, white on a solid box, clip width - 100
+CAPTION_STYLE = dict(font_size=70, bold=True, color=(255, 255, 255, 255), bg_color=(0, 31, 63, 255), margin=100,
+                     line_spacing=4, padding=(0, 6))
+
+
+def hex_color(value, alpha=255):
+    value = value.lstrip('#')
+    return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4)) + (alpha,)
+
+
+def render_caption(text, width, font_size=70, bold=True, color=(255, 255, 255, 255), bg_color=(0, 31, 63, 255),
+                   line_spacing=4, padding=(0, 6), **_):
+    # RGBA box exactly `width` wide and as tall as the wrapped text, lines centered like ImageMagick's caption mode
+    font = get_font_variant(font_size, bold=bold)
+    lines = [' '.join(lw) for lw in wrap_words(text.split(), font, width - 2 * padding[0])] or ['']
+    measure = ImageDraw.Draw(Image.new('RGBA', (10, 10)))
+    ascent_box = measure.textbbox((0, 0), 'Ag', font=font)
+    line_h = ascent_box[3] - ascent_box[1]
+    height = len(lines) * line_h + (len(lines) - 1) * line_spacing + 2 * padding[1]
+    img = Image.new('RGBA', (int(width), int(height)), bg_color)
+    d = ImageDraw.Draw(img)
+    y = padding[1] - ascent_box[1]
+    for ln in lines:
+        x = (width - text_width(font, ln)) / 2.0
+        d.text((x, y), ln, font=font, fill=color)
+        y += line_h + line_spacing
+    return img
+
+
+def caption_key(text, width, style):
+    blob = json.dumps({'v': CAPTION_VERSION, 'text': text, 'width': int(width), 'style': style}, sort_keys=True,
+                      ensure_ascii=False, default=list)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()[:32]
+
+
+def caption_png(text, width, style, cache_dir=DEFAULT_CACHE_DIR):
+    # path of the cached caption PNG, drawing it on first use
+    path = os.path.join(cache_dir, caption_key(text, width, style) + '.png')
+    if os.path.isfile(path):
+        return path
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    render_caption(text, width, **style).save(tmp, format='PNG')
+    os.replace(tmp, path)
+    return path
+
+
+def caption_job(video_path, output_path, text, style, y_ratio, media=None, backend='ffmpeg', cache_dir=DEFAULT_CACHE_DIR,
+                profile=None):
+    # y_ratio: caption top sits this fraction of the frame height above the bottom edge;
+    # profile: encoder_profiles name (None = default)
+    return {'video_path': video_path, 'output_path': output_path, 'text': text, 'style': style, 'y_ratio': y_ratio,
+            'media': media, 'backend': backend, 'cache_dir': cache_dir, 'threads': None, 'profile': get_profile(profile)}
+
+
+def render_captioned(job):
+    # returns {'output_path', 'ok', 'error'}; runs in the main process or a pool worker
+    result = {'video_path': job['video_path'], 'output_path': job['output_path'], 'ok': False, 'error': None}
+    try:
+        if job['backend'] == 'moviepy':
+            _render_moviepy(job)
+        else:
+            info = job.get('media') or ffmpeg_backend.probe(job['video_path'])
+            if not info.get('width') or not info.get('height'):
+                raise RuntimeError('no video stream')
+            w, h = info['width'], info['height']
+            png = caption_png(job['text'], w - job['style'].get('margin', 100), job['style'], job['cache_dir'])
+            y = int(h - h * job['y_ratio'])
+            # -r only when the profile's fps ceiling is below the source
+            fps = output_fps(job['profile'], info.get('fps'))
+            ffmpeg_backend.run_ffmpeg(ffmpeg_backend.build_overlay_command(
+                job['video_path'], png, job['output_path'], x='(W-w)/2', y=y, threads=job.get('threads'),
+                profile=job['profile'], fps=fps if fps != info.get('fps') else None))
+        result['ok'] = True
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+def _render_moviepy(job):
+    try:
+        from moviepy.editor import VideoFileClip, ImageClip, CompositeVideoClip
+    except Exception:
+        from moviepy import VideoFileClip, ImageClip, CompositeVideoClip
+    import numpy as np
+
+    clip = VideoFileClip(job['video_path'])
+    final = None
+    try:
+        png = caption_png(job['text'], clip.w - job['style'].get('margin', 100), job['style'], job['cache_dir'])
+        pos = ('center', int(clip.h - clip.h * job['y_ratio']))
+        txt = ImageClip(np.array(Image.open(png)))
+        try:
+            txt = txt.set_duration(clip.duration).set_position(pos)
+        except AttributeError:
+            txt = txt.with_duration(clip.duration).with_position(pos)
+        final = CompositeVideoClip([clip, txt])
+        final.write_videofile(job['output_path'], fps=output_fps(job['profile'], clip.fps),
+                              **moviepy_kwargs(job['profile'], job.get('threads')))
+    finally:
+        for c in (final, clip):
+            if c is not None:
+                c.close()
+
+
+def run_captioned(jobs, workers=1, on_result=None):
+    # like app.run_jobs: serial for one worker, otherwise a process pool with the ffmpeg threads split between workers
+    results = []
+    threads = max(1, (os.cpu_count() or 1) // max(1, workers))
+    for job in jobs:
+        job['threads'] = threads if workers > 1 else None
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            res = render_captioned(job)
+            results.append(res)
+            if on_result:
+                on_result(res)
+        return results
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(render_captioned, job): job for job in jobs}
+        for fut in as_completed(futures):
+            job = futures[fut]
+            try:
+                res = fut.result()
+            except Exception as e:
+                res = {'video_path': job['video_path'], 'output_path': job['output_path'], 'ok': False,
+                       'error': f"worker failed: {e}"}
+            results.append(res)
+            if on_result:
+                on_result(res)
+    return results
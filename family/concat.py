@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# Join clips with ffmpeg's concat demuxer, copying the video stream when it can.
+#
+# concatenate_videoclips(method="compose") decodes every clip and re-encodes
+# the result. When the inputs share codec, size, pixel format, frame rate,
+# timebase and H.264 level/refs/B-frames (see compatible()), the concat demuxer can append the compressed
+# packets as they are (-c:v copy), and the music bed is muxed in the same run;
+# only the audio is encoded. Mismatched inputs are first normalized to one
+# common format, once per source (cached), and then concatenated the same way.
+# Like method="compose", that format is the largest canvas among the inputs with
+# each clip scaled to fit and padded black; framing='fill' crops to fill instead.
+#
+#   combine([a, b], out, music_path=bed)
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import ffmpeg_backend
+from encoder_profiles import ffmpeg_args, get_profile, output_fps
+from geometry import ffmpeg_filter, plan_fill, plan_fit
+
+
+# stream properties that have to match for a stream-copy concat. The demuxer keeps only the
+# first clip's codec extradata (SPS/PPS for H.264), so level, reference frames and B-frame
+# setup have to agree too; a clip missing any of these is normalized rather than guessed at.
+COPY_KEYS = ('codec', 'width', 'height', 'rotation', 'pix_fmt', 'time_base', 'sar', 'codec_profile', 'level', 'refs',
+             'has_b_frames')
+# compared as well, but not required (older ffprobe builds don't report it)
+OPTIONAL_COPY_KEYS = ('extradata_size',)
+FRAMINGS = ('fit', 'fill')
+DEFAULT_NORMALIZED_DIR = os.path.join(tempfile.gettempdir(), 'autoreels_normalized')
+
+
+def compatible(infos):
+    # True when every clip can be stream-copied into one file; fps compared to 0.01
+    if not infos or any(not i.get('width') for i in infos):
+        return False
+    if any(i.get(k) is None for i in infos for k in COPY_KEYS):
+        return False
+    ref = infos[0]
+    for info in infos[1:]:
+        if any(info.get(k) != ref.get(k) for k in COPY_KEYS + OPTIONAL_COPY_KEYS):
+            return False
+        if abs((info.get('fps') or 0) - (ref.get('fps') or 0)) > 0.01:
+            return False
+    return True
+
+
+def normalize_target(infos, profile=None, framing='fit'):
+    # common format for mismatched inputs: the largest canvas among them (as method="compose"
+    # sized its output), the profile's fps ceiling, and how each clip is framed on the canvas
+    if framing not in FRAMINGS:
+        raise ValueError(f"framing must be one of {', '.join(FRAMINGS)}, got {framing!r}")
+    fps = output_fps(profile or get_profile(), max(i.get('fps') or 0 for i in infos) or None)
+    width = max(i['width'] for i in infos) // 2 * 2
+    height = max(i['height'] for i in infos) // 2 * 2
+    return {'width': width, 'height': height, 'fps': fps, 'framing': framing}
+
+
+def _list_file(paths, tmp):
+    # concat demuxer script; single quotes in paths are escaped the way the demuxer expects
+    path = os.path.join(tmp, 'inputs.txt')
+    with open(path, 'w', encoding='utf-8') as f:
+        for p in paths:
+            f.write("file '" + os.path.abspath(p).replace("'", "'\\''") + "'\n")
+    return path
+
+
+def normalize(path, target, profile=None, cache_dir=DEFAULT_NORMALIZED_DIR, threads=None):
+    # re-encode one source to the target canvas/fps (video only); reused across runs while the source is unchanged
+    profile = profile or get_profile()
+    st = os.stat(path)
+    key = hashlib.sha256(json.dumps([os.path.abspath(path), st.st_size, st.st_mtime_ns, target, profile],
+                                    sort_keys=True).encode('utf-8')).hexdigest()[:24]
+    out = os.path.join(cache_dir, key + '.mp4')
+    if os.path.isfile(out):
+        return out
+    os.makedirs(cache_dir, exist_ok=True)
+    info = ffmpeg_backend.probe(path)
+    plan = plan_fill if target.get('framing') == 'fill' else plan_fit
+    chain = ffmpeg_filter(plan(info['width'], info['height'], target['width'], target['height']))
+    tmp = f"{out}.{os.getpid()}.{threading.get_ident()}.tmp.mp4"
+    ffmpeg_backend.run_ffmpeg([ffmpeg_backend.FFMPEG, '-y', '-hide_banner', '-loglevel', 'error', '-i', path,
+                               '-map', '0:v', '-vf', chain, '-r', f"{float(target['fps']):g}", '-an']
+                              + ffmpeg_args(profile, threads, audio=False) + [tmp])
+    os.replace(tmp, out)
+    return out
+
+
+def build_concat_command(list_path, output_path, music_path=None, duration=None, profile=None):
+    # video packets copied from the concat list; the music (or else the clips' own audio) is
+    # trimmed to the video and encoded
+    cmd = [ffmpeg_backend.FFMPEG, '-y', '-hide_banner', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path]
+    if music_path:
+        cmd += ['-i', music_path, '-map', '0:v', '-map', '1:a']
+    else:
+        cmd += ['-map', '0:v', '-map', '0:a?']
+    profile = profile or get_profile()
+    cmd += ['-c:v', 'copy', '-c:a', 'aac'] + (['-b:a', profile['audio_bitrate']] if profile.get('audio_bitrate') else [])
+    if duration:
+        cmd += ['-t', f"{float(duration):.3f}"]
+    cmd += ['-movflags', '+faststart', output_path]
+    return cmd
+
+
+def combine(paths, output_path, music_path=None, profile=None, cache_dir=DEFAULT_NORMALIZED_DIR, threads=None,
+            framing='fit'):
+    # returns 'copy' or 'normalized' (the path the clips took); framing only applies to normalized clips
+    infos = [ffmpeg_backend.probe(p) for p in paths]
+    mode = 'copy'
+    if not compatible(infos):
+        target = normalize_target(infos, profile, framing)
+        paths = [normalize(p, target, profile, cache_dir, threads) for p in paths]
+        infos = [ffmpeg_backend.probe(p) for p in paths]
+        mode = 'normalized'
+    duration = sum(i.get('duration') or 0 for i in infos) or None
+    with tempfile.TemporaryDirectory(prefix='autoreels_concat_') as tmp:
+        ffmpeg_backend.run_ffmpeg(build_concat_command(_list_file(paths, tmp), output_path, music_path, duration, profile))
+    return mode
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# Batched FilePath write-back for the hooks CSV.
+#
+# Each finished row is appended to a sidecar journal (<csv>.journal, one JSON
+# object per line) straight away, while the CSV itself is only rewritten every
+# `batch_size` updates, once `flush_interval` seconds have passed, and at exit.
+# If a run dies between flushes the journal is folded back into the rows on
+# the next start, so completed rows are never lost.
+import atexit
+import csv
+import json
+import os
+import time
+
+
+def csv_fieldnames(original_fieldnames, rows):
+    # preserve the original column order and keep FilePath as the 5th column
+    if original_fieldnames:
+        base_fns = [fn for fn in original_fieldnames if fn != 'FilePath']
+    elif rows:
+        base_fns = [k for k in rows[0].keys() if k != 'FilePath']
+    else:
+        base_fns = ['ID', 'Hook', 'LongTailKeywords']
+    insert_index = 4 if len(base_fns) >= 4 else len(base_fns)
+    fns = list(base_fns)
+    fns.insert(insert_index, 'FilePath')
+    return fns
+
+
+def write_csv_atomic(csv_path, rows, fieldnames):
+    # write through a .tmp file and swap it in; returns the number of bytes written
+    tmp_csv = csv_path + '.tmp'
+    with open(tmp_csv, mode='w', encoding='utf-8', newline='') as wf:
+        writer = csv.DictWriter(wf, fieldnames=fieldnames)
+        writer.writeheader()
+        for r in rows:
+            out = {k: r.get(k, '') for k in fieldnames}
+            # ensure FilePath is absolute when present
+            if out.get('FilePath'):
+                out['FilePath'] = os.path.abspath(out['FilePath'])
+            else:
+                out['FilePath'] = ''
+            writer.writerow(out)
+    size = os.path.getsize(tmp_csv)
+    try:
+        os.replace(tmp_csv, csv_path)
+    except Exception:
+        # fallback to remove + move
+        try:
+            os.remove(csv_path)
+        except Exception:
+            pass
+        os.replace(tmp_csv, csv_path)
+    return size
+
+
+class CsvWriteBack:
+    def __init__(self, csv_path, rows, original_fieldnames=None, batch_size=25, flush_interval=30.0, log=print):
+        self.csv_path = csv_path
+        self.journal_path = csv_path + '.journal'
+        self.rows = rows
+        self.fieldnames = csv_fieldnames(original_fieldnames, rows)
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.log = log
+        self.pending = 0
+        self.last_flush = time.monotonic()
+        self.stats = {'flushes': 0, 'csv_bytes': 0, 'journal_bytes': 0}
+        self._journal = None
+        self._closed = False
+        atexit.register(self.close)
+
+    def replay_journal(self):
+        # fold updates left behind by an interrupted run back into the rows
+        if not os.path.isfile(self.journal_path):
+            return 0
+        applied = 0
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as jf:
+                for line in jf:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # torn last line from a crash mid-append
+                        continue
+                    idx = entry.get('idx')
+                    if not isinstance(idx, int) or not (0 <= idx < len(self.rows)):
+                        continue
+                    # only apply to the same row of the same sheet
+                    if (self.rows[idx].get('ID') or '').strip() != (entry.get('ID') or ''):
+                        continue
+                    self.rows[idx]['FilePath'] = entry.get('FilePath') or ''
+                    applied += 1
+        except Exception as e:
+            self.log(f"Warning: could not replay journal {self.journal_path}: {e}")
+            return 0
+        if applied:
+            self.log(f"Recovered {applied} FilePath update(s) from {self.journal_path}")
+            self.pending += applied
+            self.flush()
+        else:
+            self._remove_journal()
+        return applied
+
+    def update(self, idx, file_path):
+        row = self.rows[idx]
+        row['FilePath'] = os.path.abspath(file_path) if file_path else ''
+        entry = {'idx': idx, 'ID': (row.get('ID') or '').strip(), 'FilePath': row['FilePath']}
+        try:
+            if self._journal is None:
+                self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            line = json.dumps(entry, ensure_ascii=False) + '\n'
+            self._journal.write(line)
+            self._journal.flush()
+            self.stats['journal_bytes'] += len(line.encode('utf-8'))
+        except Exception as e:
+            self.log(f"Warning: could not append to journal {self.journal_path}: {e}")
+        self.pending += 1
+        if self.pending >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        try:
+            size = write_csv_atomic(self.csv_path, self.rows, self.fieldnames)
+        except Exception as e:
+            # keep the journal so the next run can recover these rows
+            self.log(f"Warning: could not update CSV {self.csv_path}: {e}")
+            return
+        self.stats['flushes'] += 1
+        self.stats['csv_bytes'] += size
+        self.log(f"CSV updated: {self.csv_path} ({self.pending} new FilePath value(s), {len(self.rows)} rows)")
+        self.pending = 0
+        self.last_flush = time.monotonic()
+        self._remove_journal()
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        # long-lived processes (render_worker.py) run many batches; don't pile up exit hooks
+        atexit.unregister(self.close)
+        if self._journal is not None:
+            try:
+                self._journal.close()
+            except Exception:
+                pass
+            self._journal = None
+
+    def _remove_journal(self):
+        if self._journal is not None:
+            try:
+                self._journal.close()
+            except Exception:
+                pass
+            self._journal = None
+        try:
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+        except Exception:
+            pass
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# Named libx264/aac encoding profiles shared by every render script.
+#
+#   draft     ultrafast, CRF 30, <= 15 fps          review proxies
+#   standard  medium, CRF 23, <= 30 fps             default (libx264's own preset/CRF)
+#   archive   slow, CRF 18, source fps              masters kept for re-editing
+#   platform  medium, CRF 23 capped by VBV, <= 30   uploads with size limits
+#
+# A profile sets preset, CRF, optional VBV cap (maxrate/bufsize), an output
+# fps ceiling, audio bitrate and an optional thread count. moviepy_kwargs()
+# turns one into write_videofile arguments and ffmpeg_args() into ffmpeg
+# output options; bench_profiles.py measures them. REELS_PROFILE picks the
+# default for scripts without a --profile option.
+import os
+
+PROFILES = {
+    'draft': dict(preset='ultrafast', crf=30, maxrate=None, bufsize=None, max_fps=15, audio_bitrate='96k', threads=None),
+    'standard': dict(preset='medium', crf=23, maxrate=None, bufsize=None, max_fps=30, audio_bitrate='128k', threads=None),
+    'archive': dict(preset='slow', crf=18, maxrate=None, bufsize=None, max_fps=None, audio_bitrate='192k', threads=None),
+    # ~3.5 Mbit/s peak keeps a 90 s 1080x1920 reel well under common upload caps
+    'platform': dict(preset='medium', crf=23, maxrate='3500k', bufsize='7000k', max_fps=30, audio_bitrate='128k', threads=None),
+}
+DEFAULT_PROFILE = os.environ.get('REELS_PROFILE') or 'standard'
+PROFILE_NAMES = tuple(PROFILES)
+
+
+def get_profile(name=None):
+    name = name or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"unknown encoder profile {name!r} (choose from {', '.join(PROFILES)})")
+    return dict(PROFILES[name], name=name)
+
+
+def output_fps(profile, src_fps, default=30):
+    # source fps, lowered to the profile's ceiling
+    fps = src_fps or default
+    if profile.get('max_fps'):
+        fps = min(fps, profile['max_fps'])
+    return fps
+
+
+def _x264_params(profile):
+    params = ['-crf', str(profile['crf'])]
+    if profile.get('maxrate'):
+        params += ['-maxrate', profile['maxrate'], '-bufsize', profile.get('bufsize') or profile['maxrate']]
+    return params
+
+
+def moviepy_kwargs(profile, threads=None):
+    # write_videofile(**moviepy_kwargs(p), fps=output_fps(p, clip.fps))
+    return dict(codec='libx264', audio_codec='aac', preset=profile['preset'], ffmpeg_params=_x264_params(profile),
+                audio_bitrate=profile.get('audio_bitrate'), threads=threads or profile.get('threads'))
+
+
+def ffmpeg_args(profile, threads=None, audio=True):
+    # output options for a direct ffmpeg encode (after -map, before the output path)
+    args = ['-c:v', 'libx264', '-preset', profile['preset']] + _x264_params(profile) + ['-pix_fmt', 'yuv420p']
+    if audio:
+        args += ['-c:a', 'aac']
+        if profile.get('audio_bitrate'):
+            args += ['-b:a', profile['audio_bitrate']]
+    threads = threads or profile.get('threads')
+    if threads:
+        args += ['-threads', str(int(threads))]
+    return args
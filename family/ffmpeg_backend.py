@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# Direct ffmpeg render backend.
+#
+# Compiles the family reel recipe (crop + scale to fill 1080x1920, centered
+# static PNG overlay, music bed looped/trimmed to the clip) into one
+# filter_complex and runs it as a single ffmpeg process, instead of MoviePy
+# blending NumPy frames in Python and piping them to ffmpeg. render_fanout()
+# decodes and scales a source once and writes several overlays / canvases of
+# it from the same process.
+import json
+import os
+import subprocess
+import tempfile
+from functools import lru_cache
+
+from encoder_profiles import ffmpeg_args, get_profile, output_fps
+from geometry import ffmpeg_filter, plan_fill
+
+
+FFMPEG = os.environ.get('FFMPEG_BINARY') or 'ffmpeg'
+FFPROBE = os.environ.get('FFPROBE_BINARY') or 'ffprobe'
+
+
+def _parse_rate(value):
+    # "30000/1001" -> 29.97
+    try:
+        num, _, den = str(value).partition('/')
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def _rotation(st):
+    # clockwise degrees (0/90/180/270) a player turns the coded frame: display matrix side data
+    # (counter-clockwise) on current ffprobe builds, the 'rotate' tag on older ones
+    for sd in st.get('side_data_list') or []:
+        if sd.get('rotation') is not None:
+            try:
+                return int(round(-float(sd['rotation']))) % 360
+            except (TypeError, ValueError):
+                pass
+    try:
+        return int((st.get('tags') or {}).get('rotate') or 0) % 360
+    except ValueError:
+        return 0
+
+
+def probe(path):
+    # cached per (path, size, mtime) so warm workers don't re-probe unchanged sources
+    st = os.stat(path)
+    return dict(_probe(os.path.abspath(path), st.st_size, st.st_mtime_ns))
+
+
+@lru_cache(maxsize=1024)
+def _probe(path, size, mtime_ns):
+    cmd = [FFPROBE, '-v', 'error', '-print_format', 'json', '-show_streams', '-show_format', path]
+    out = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True).stdout
+    data = json.loads(out.decode('utf-8', 'replace') or '{}')
+    info = {'width': None, 'height': None, 'fps': None, 'duration': None, 'has_audio': False, 'codec': None,
+            'pix_fmt': None, 'audio_codec': None, 'time_base': None, 'sar': None, 'codec_profile': None,
+            'level': None, 'refs': None, 'has_b_frames': None, 'extradata_size': None, 'rotation': None}
+    for st in data.get('streams', []):
+        if st.get('codec_type') == 'video' and info['width'] is None:
+            info['width'] = st.get('width')
+            info['height'] = st.get('height')
+            # ffmpeg autorotates on decode, so filters and raw frames see the displayed size
+            info['rotation'] = _rotation(st)
+            if info['rotation'] in (90, 270):
+                info['width'], info['height'] = info['height'], info['width']
+            info['fps'] = _parse_rate(st.get('avg_frame_rate')) or _parse_rate(st.get('r_frame_rate'))
+            info['codec'] = st.get('codec_name')
+            info['pix_fmt'] = st.get('pix_fmt')
+            # what the concat demuxer needs to match for stream copy (see concat.py)
+            info['time_base'] = st.get('time_base')
+            info['sar'] = st.get('sample_aspect_ratio')
+            info['codec_profile'] = st.get('profile')
+            info['level'] = st.get('level')
+            info['refs'] = st.get('refs')
+            info['has_b_frames'] = st.get('has_b_frames')
+            # only reported by newer ffprobe builds
+            info['extradata_size'] = st.get('extradata_size')
+            if st.get('duration'):
+                info['duration'] = float(st['duration'])
+        elif st.get('codec_type') == 'audio' and not info['has_audio']:
+            info['has_audio'] = True
+            info['audio_codec'] = st.get('codec_name')
+    if info['duration'] is None and data.get('format', {}).get('duration'):
+        info['duration'] = float(data['format']['duration'])
+    return info
+
+
+def fill_filter(src_w, src_h, canvas, focus=None):
+    # scale-to-fill chain for one canvas: crop the visible window first, then scale only that (see geometry.py)
+    return ffmpeg_filter(plan_fill(src_w, src_h, canvas[0], canvas[1], focus))
+
+
+def _output_args(audio_map, duration, fps, profile, threads, audio):
+    args = ['-an'] if not audio else ['-map', audio_map]
+    if duration:
+        args += ['-t', f"{float(duration):.3f}"]
+    if fps:
+        args += ['-r', f"{float(fps):g}"]
+    return args + ffmpeg_args(profile or get_profile(), threads, audio=audio)
+
+
+def build_reel_command(video_path, overlay_png, output_path, src_w, src_h, canvas=(1080, 1920), music_path=None,
+                       fps=None, duration=None, threads=None, profile=None, audio=True, focus=None):
+    graph = [
+        f"[0:v]{fill_filter(src_w, src_h, canvas, focus)}[base]",
+        # a single-frame PNG input is repeated for the whole clip by overlay's eof_action
+        "[base][1:v]overlay=(W-w)/2:(H-h)/2:format=auto[v]",
+    ]
+    cmd = [FFMPEG, '-y', '-hide_banner', '-loglevel', 'error', '-i', video_path, '-i', overlay_png]
+    has_music = bool(audio and music_path and os.path.isfile(music_path))
+    if has_music:
+        # loop the music bed forever; -t below trims it to the clip
+        cmd += ['-stream_loop', '-1', '-i', music_path]
+    cmd += ['-filter_complex', ';'.join(graph), '-map', '[v]']
+    # like the MoviePy composite, keep the source clip's own audio when there is no music bed
+    cmd += _output_args('2:a' if has_music else '0:a?', duration, fps, profile, threads, audio)
+    cmd += [output_path]
+    return cmd
+
+
+def build_fanout_command(video_path, outputs, src_w, src_h, music_path=None, fps=None, duration=None, threads=None,
+                         profile=None, audio=True, focus=None):
+    # outputs: [{'overlay_png', 'output_path', 'canvas'}]. The source is decoded once, scaled once
+    # per distinct canvas, then split between the overlays; every output gets its own encoder.
+    canvases = []
+    for out in outputs:
+        if tuple(out['canvas']) not in canvases:
+            canvases.append(tuple(out['canvas']))
+    users = {c: [i for i, out in enumerate(outputs) if tuple(out['canvas']) == c] for c in canvases}
+    graph = []
+    if len(canvases) > 1:
+        graph.append(f"[0:v]split={len(canvases)}" + ''.join(f"[s{k}]" for k in range(len(canvases))))
+    for k, canvas in enumerate(canvases):
+        src = f"[s{k}]" if len(canvases) > 1 else "[0:v]"
+        n = len(users[canvas])
+        pads = ''.join(f"[c{i}]" for i in users[canvas])
+        graph.append(f"{src}{fill_filter(src_w, src_h, canvas, focus)}" + (f",split={n}{pads}" if n > 1 else pads))
+    cmd = [FFMPEG, '-y', '-hide_banner', '-loglevel', 'error', '-i', video_path]
+    for i, out in enumerate(outputs):
+        # one PNG input per output: a file stream can only feed one filter pad
+        cmd += ['-i', out['overlay_png']]
+        graph.append(f"[c{i}][{i + 1}:v]overlay=(W-w)/2:(H-h)/2:format=auto[v{i}]")
+    has_music = bool(audio and music_path and os.path.isfile(music_path))
+    if has_music:
+        cmd += ['-stream_loop', '-1', '-i', music_path]
+    audio_map = f"{len(outputs) + 1}:a" if has_music else '0:a?'
+    cmd += ['-filter_complex', ';'.join(graph)]
+    # the thread budget is shared by the parallel encoders
+    enc_threads = max(1, int(threads) // len(outputs)) if threads else None
+    for i, out in enumerate(outputs):
+        cmd += ['-map', f"[v{i}]"] + _output_args(audio_map, duration, fps, profile, enc_threads, audio)
+        cmd += [out['output_path']]
+    return cmd
+
+
+def build_overlay_command(video_path, overlay_png, output_path, x='(W-w)/2', y='(H-h)/2', threads=None, profile=None,
+                          fps=None):
+    # static PNG over the clip at its own size; source audio re-encoded to aac like write_videofile did
+    cmd = [FFMPEG, '-y', '-hide_banner', '-loglevel', 'error', '-i', video_path, '-i', overlay_png,
+           '-filter_complex', f"[0:v][1:v]overlay={x}:{y}:format=auto[v]", '-map', '[v]', '-map', '0:a?']
+    if fps:
+        cmd += ['-r', f"{float(fps):g}"]
+    cmd += ffmpeg_args(profile or get_profile(), threads)
+    cmd += [output_path]
+    return cmd
+
+
+def run_ffmpeg(cmd, on_progress=None, total_frames=None):
+    # on_progress(frames_done, total_frames) is fed from ffmpeg's -progress key=value stream
+    if on_progress is None:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stderr = proc.stderr
+    else:
+        cmd = cmd[:-1] + ['-progress', 'pipe:1', '-nostats'] + cmd[-1:]
+        with tempfile.TemporaryFile() as err:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err)
+            for raw in proc.stdout:
+                key, _, value = raw.decode('utf-8', 'replace').strip().partition('=')
+                if key == 'frame' and value.isdigit():
+                    on_progress(int(value), total_frames)
+            proc.wait()
+            err.seek(0)
+            stderr = err.read()
+    if proc.returncode != 0:
+        tail = stderr.decode('utf-8', 'replace').strip().splitlines()[-5:]
+        raise RuntimeError(f"ffmpeg exited {proc.returncode}: {' | '.join(tail)}")
+    return proc
+
+
+def render_reel(video_path, overlay_png, output_path, canvas=(1080, 1920), music_path=None, fps=None, threads=None, info=None,
+                on_progress=None, max_duration=None, profile=None, audio=True, focus=None):
+    info = info or probe(video_path)
+    if not info.get('width') or not info.get('height'):
+        raise RuntimeError(f"no video stream in {video_path}")
+    profile = profile or get_profile()
+    fps = fps or output_fps(profile, info.get('fps'))
+    duration = info.get('duration')
+    if max_duration:
+        duration = min(duration, max_duration) if duration else max_duration
+    cmd = build_reel_command(video_path, overlay_png, output_path, info['width'], info['height'], canvas=canvas,
+                             music_path=music_path, fps=fps, duration=duration, threads=threads, profile=profile,
+                             audio=audio, focus=focus)
+    total = int(round(duration * fps)) if duration else None
+    run_ffmpeg(cmd, on_progress=on_progress, total_frames=total)
+    return info
+
+
+def render_fanout(video_path, outputs, music_path=None, fps=None, threads=None, info=None, on_progress=None,
+                  max_duration=None, profile=None, audio=True, focus=None):
+    # render_reel for several outputs of the same source in one ffmpeg process
+    info = info or probe(video_path)
+    if not info.get('width') or not info.get('height'):
+        raise RuntimeError(f"no video stream in {video_path}")
+    profile = profile or get_profile()
+    fps = fps or output_fps(profile, info.get('fps'))
+    duration = info.get('duration')
+    if max_duration:
+        duration = min(duration, max_duration) if duration else max_duration
+    cmd = build_fanout_command(video_path, outputs, info['width'], info['height'], music_path=music_path, fps=fps,
+                               duration=duration, threads=threads, profile=profile, audio=audio, focus=focus)
+    total = int(round(duration * fps)) if duration else None
+    run_ffmpeg(cmd, on_progress=on_progress, total_frames=total)
+    return info
+
+
+def build_replace_audio_command(video_path, audio_path, output_path, duration=None, loop=True, profile=None):
+    # video packets copied bit-exact; the new soundtrack looped (or not) and cut to the video, then encoded
+    profile = profile or get_profile()
+    cmd = [FFMPEG, '-y', '-hide_banner', '-loglevel', 'error', '-i', video_path]
+    if loop:
+        cmd += ['-stream_loop', '-1']
+    cmd += ['-i', audio_path, '-map', '0:v', '-map', '1:a', '-c:v', 'copy', '-c:a', 'aac']
+    if profile.get('audio_bitrate'):
+        cmd += ['-b:a', profile['audio_bitrate']]
+    if duration:
+        cmd += ['-t', f"{float(duration):.3f}"]
+    elif loop:
+        # unknown length: a looped track never ends on its own, so stop with the video
+        cmd += ['-shortest']
+    cmd += ['-movflags', '+faststart', output_path]
+    return cmd
+
+
+def replace_audio(video_path, audio_path, output_path, loop=True, profile=None, info=None):
+    # swap the soundtrack of a rendered reel without re-encoding its video
+    info = info or probe(video_path)
+    if not info.get('width'):
+        raise RuntimeError(f"no video stream in {video_path}")
+    run_ffmpeg(build_replace_audio_command(video_path, audio_path, output_path, info.get('duration'), loop, profile))
+    return info
+
+
+def extract_frame(video_path, t=0.0, info=None):
+    # decode a single RGB frame as a HxWx3 uint8 array (autorotated; probe() reports the displayed size)
+    import numpy as np
+    info = info or probe(video_path)
+    w, h = info['width'], info['height']
+    cmd = [FFMPEG, '-v', 'error', '-ss', f"{float(t):.3f}", '-i', video_path, '-frames:v', '1',
+           '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-']
+    raw = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True).stdout
+    if len(raw) < w * h * 3:
+        raise RuntimeError(f"could not decode a frame at {t}s from {video_path}")
+    return np.frombuffer(raw[:w * h * 3], dtype=np.uint8).reshape((h, w, 3))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# Crop-before-scale planning for filling a portrait canvas with a source clip.
+#
+# The old recipe resized the whole frame by max(canvas_w / w, canvas_h / h)
+# (a 1280x720 source becomes ~3413x1920 for a 1080x1920 canvas) and then
+# composited it over a black background that it fully covers. plan_fill()
+# works out which part of the source ends up visible, so only that window is
+# cropped and resampled straight to the canvas size, and says whether a
+# background layer is needed at all.
+#
+#   plan = plan_fill(1280, 720, 1080, 1920, focus=(0.3, 0.5))
+#   plan['crop']    -> (x, y, w, h) in source pixels
+#   plan['size']    -> (w, h) after scaling
+#   plan['covers']  -> True when the scaled window fills the canvas (no background)
+#
+# plan_fit() is the letterbox counterpart (whole source scaled to fit, padded),
+# which is what concatenate_videoclips(method="compose") did with mixed sizes.
+CENTER = (0.5, 0.5)
+
+
+def _even(v):
+    # libx264 + yuv420p want even dimensions
+    return max(2, int(v) // 2 * 2)
+
+
+def parse_focus(value):
+    # "0.3,0.5" -> (0.3, 0.5): focal point as fractions of the source width/height
+    fx, _, fy = str(value).partition(',')
+    fx, fy = float(fx), float(fy or 0.5)
+    if not (0.0 <= fx <= 1.0 and 0.0 <= fy <= 1.0):
+        raise ValueError(f"focus must be two fractions between 0 and 1, got {value!r}")
+    return (fx, fy)
+
+
+def plan_fill(src_w, src_h, canvas_w, canvas_h, focus=None):
+    # scale-to-fill geometry with the crop window placed as close to centered on
+    # `focus` as the source edges allow
+    fx, fy = focus or CENTER
+    scale = max(canvas_w / float(src_w), canvas_h / float(src_h))
+    crop_w = min(src_w, _even(round(canvas_w / scale)))
+    crop_h = min(src_h, _even(round(canvas_h / scale)))
+    x = min(max(0, int(round(fx * src_w - crop_w / 2.0))), src_w - crop_w)
+    y = min(max(0, int(round(fy * src_h - crop_h / 2.0))), src_h - crop_h)
+    # a cropped dimension maps exactly onto the canvas (the even-rounded window is off by
+    # under a source pixel); the other one is the whole source scaled by `scale`
+    out_w = canvas_w if crop_w < src_w else _even(round(src_w * scale))
+    out_h = canvas_h if crop_h < src_h else _even(round(src_h * scale))
+    covers = out_w >= canvas_w and out_h >= canvas_h
+    return {'crop': (x, y, crop_w, crop_h), 'size': (out_w, out_h), 'canvas': (canvas_w, canvas_h),
+            'position': ((canvas_w - out_w) // 2, (canvas_h - out_h) // 2), 'covers': covers}
+
+
+def plan_fit(src_w, src_h, canvas_w, canvas_h):
+    # scale-to-fit geometry: the whole source, centered, with black bars where it falls short
+    scale = min(canvas_w / float(src_w), canvas_h / float(src_h))
+    out_w = min(canvas_w, _even(round(src_w * scale)))
+    out_h = min(canvas_h, _even(round(src_h * scale)))
+    covers = out_w >= canvas_w and out_h >= canvas_h
+    return {'crop': (0, 0, src_w, src_h), 'size': (out_w, out_h), 'canvas': (canvas_w, canvas_h),
+            'position': ((canvas_w - out_w) // 2, (canvas_h - out_h) // 2), 'covers': covers}
+
+
+def ffmpeg_filter(plan):
+    # crop, then scale only the visible window; pad only when it doesn't cover the canvas
+    x, y, w, h = plan['crop']
+    out_w, out_h = plan['size']
+    chain = f"crop={w}:{h}:{x}:{y},scale={out_w}:{out_h}:flags=bicubic"
+    if not plan['covers']:
+        chain += f",pad={plan['canvas'][0]}:{plan['canvas'][1]}:(ow-iw)/2:(oh-ih)/2:black"
+    return chain + ",setsar=1"
+
+
+def fill_clip(clip, plan):
+    # MoviePy clip cropped to the plan's window and resized to its output size (v1 and v2 APIs)
+    x, y, w, h = plan['crop']
+    if (x, y, w, h) != (0, 0, clip.w, clip.h):
+        try:
+            clip = clip.crop(x1=x, y1=y, width=w, height=h)
+        except AttributeError:
+            try:
+                clip = clip.cropped(x1=x, y1=y, width=w, height=h)
+            except AttributeError:
+                from moviepy.video.fx.all import crop
+                clip = crop(clip, x1=x, y1=y, width=w, height=h)
+    if tuple(plan['size']) != (w, h):
+        try:
+            clip = clip.resize(newsize=plan['size'])
+        except AttributeError:
+            try:
+                clip = clip.resized(new_size=plan['size'])
+            except AttributeError:
+                from moviepy.video.fx.all import resize
+                clip = resize(clip, newsize=plan['size'])
+    return clip
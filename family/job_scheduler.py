@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# N-slot job scheduler for server.py.
+#
+# Jobs wait in a FIFO until one of `slots` worker threads is free, so a long
+# batch no longer blocks small preview jobs queued behind it. Queued jobs can
+# be cancelled before they start; running jobs are cancelled by killing the
+# render process group. ETAs come from a rolling average of recent job times.
+import collections
+import os
+import signal
+import subprocess
+import threading
+import time
+
+
+class JobContext:
+    # handed to the run function; it registers its subprocess so cancel() can stop it
+    def __init__(self, job_id, slot, threads):
+        self.job_id = job_id
+        self.slot = slot
+        self.threads = threads
+        self.cancelled = threading.Event()
+        self.proc = None
+        self.started = time.time()
+
+
+def popen_kwargs():
+    # own process group so cancelling also stops app.py's --workers children
+    if os.name == 'nt':
+        return {'creationflags': getattr(subprocess, 'CREATE_NEW_PROCESS_GROUP', 0)}
+    return {'start_new_session': True}
+
+
+def kill_process_tree(proc):
+    if proc is None or proc.poll() is not None:
+        return
+    try:
+        if os.name == 'nt':
+            proc.terminate()
+        else:
+            os.killpg(proc.pid, signal.SIGTERM)
+    except Exception:
+        try:
+            proc.kill()
+        except Exception:
+            pass
+
+
+class Scheduler:
+    def __init__(self, store, run_job, slots=2, history=20):
+        self.store = store
+        self.run_job = run_job
+        self.slots = max(1, int(slots))
+        self.cond = threading.Condition()
+        self.pending = collections.deque()
+        self.running = {}
+        self.durations = collections.deque(maxlen=history)
+        self.threads = []
+
+    def default_threads(self):
+        # ffmpeg thread budget per slot when the job doesn't ask for one
+        return max(1, (os.cpu_count() or 1) // self.slots)
+
+    def start(self):
+        # pick up jobs that were queued when the server last stopped
+        for job_id in self.store.ids_with_status('running'):
+            self.store.update(job_id, status='failed')
+            self.store.append_log(job_id, '[worker] interrupted by server restart')
+        for job_id in self.store.ids_with_status('queued'):
+            self.submit(job_id)
+        for slot in range(self.slots):
+            t = threading.Thread(target=self._slot_loop, args=(slot,), daemon=True, name=f"render-slot-{slot}")
+            t.start()
+            self.threads.append(t)
+
+    def submit(self, job_id):
+        with self.cond:
+            self.pending.append(job_id)
+            self.cond.notify()
+
+    def cancel(self, job_id):
+        with self.cond:
+            if job_id in self.pending:
+                self.pending.remove(job_id)
+                self.store.update(job_id, status='cancelled', finished=time.time())
+                self.store.append_log(job_id, '[worker] cancelled while queued')
+                return 'cancelled'
+            ctx = self.running.get(job_id)
+        if ctx is None:
+            return None
+        ctx.cancelled.set()
+        kill_process_tree(ctx.proc)
+        return 'cancelling'
+
+    def queue_position(self, job_id):
+        with self.cond:
+            try:
+                return self.pending.index(job_id) + 1
+            except ValueError:
+                return None
+
+    def average_duration(self):
+        with self.cond:
+            if not self.durations:
+                return None
+            return sum(self.durations) / len(self.durations)
+
+    def eta(self, job_id):
+        # seconds until the job is expected to finish, or None without history
+        avg = self.average_duration()
+        if avg is None:
+            return None
+        with self.cond:
+            ctx = self.running.get(job_id)
+            if ctx is not None:
+                return max(0.0, avg - (time.time() - ctx.started))
+            try:
+                pos = self.pending.index(job_id) + 1
+            except ValueError:
+                return None
+            # when each busy slot is expected to free up
+            remaining = sorted(max(0.0, avg - (time.time() - c.started)) for c in self.running.values())
+            free_slots = self.slots - len(remaining)
+        if pos <= free_slots or not remaining:
+            return avg
+        # the k-th slot release starts this job; releases repeat every `avg` seconds per slot
+        k = pos - max(0, free_slots) - 1
+        start = remaining[k % len(remaining)] + (k // len(remaining)) * avg
+        return start + avg
+
+    def _slot_loop(self, slot):
+        while True:
+            with self.cond:
+                while not self.pending:
+                    self.cond.wait()
+                job_id = self.pending.popleft()
+                job = self.store.get(job_id)
+                if not job or job.get('status') != 'queued':
+                    continue
+                ctx = JobContext(job_id, slot, job.get('threads') or self.default_threads())
+                self.running[job_id] = ctx
+            started = time.time()
+            self.store.update(job_id, started=started)
+            try:
+                self.run_job(job, ctx)
+            except Exception as e:
+                self.store.update(job_id, status='failed')
+                self.store.append_log(job_id, '[worker] exception: ' + str(e))
+            finally:
+                finished = time.time()
+                self.store.update(job_id, finished=finished)
+                with self.cond:
+                    self.running.pop(job_id, None)
+                    if not ctx.cancelled.is_set():
+                        self.durations.append(finished - started)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# SQLite-backed job store for server.py.
+#
+# One row per job in `jobs`; log lines live in `job_logs` keyed by
+# (job_id, seq), so appending a line is a single INSERT and reading a job's
+# status never touches other jobs or their logs. With log_keep set, only the
+# newest log_keep lines per job are kept (a ring buffer over seq).
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+JOB_FIELDS = ('id', 'csv_path', 'music', 'src', 'out', 'rows', 'workers', 'threads', 'status', 'created', 'updated',
+              'started', 'finished', 'progress', 'draft', 'ids', 'promoted_from')
+
+# columns added after the first schema; created on open for older databases
+LATER_COLUMNS = {'workers': 'INTEGER', 'threads': 'INTEGER', 'started': 'REAL', 'finished': 'REAL',
+                 'progress': 'TEXT', 'draft': 'INTEGER', 'ids': 'TEXT', 'promoted_from': 'TEXT'}
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    csv_path TEXT,
+    music TEXT,
+    src TEXT,
+    out TEXT,
+    rows INTEGER,
+    status TEXT NOT NULL,
+    outputs TEXT NOT NULL DEFAULT '[]',
+    log_seq INTEGER NOT NULL DEFAULT 0,
+    created REAL,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+CREATE TABLE IF NOT EXISTS job_logs (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    line TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+) WITHOUT ROWID;
+'''
+
+
+class JobStore:
+    # prune a job's old log lines every this many appends
+    PRUNE_EVERY = 100
+
+    def __init__(self, path, log_keep=None):
+        self.path = path
+        self.log_keep = log_keep
+        self.lock = threading.Lock()
+        # bumped on every write so streaming readers can block until something changes
+        self.changed = threading.Condition()
+        self.version = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        try:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+        except sqlite3.DatabaseError:
+            pass
+        self.conn.executescript(SCHEMA)
+        have = {r[1] for r in self.conn.execute('PRAGMA table_info(jobs)')}
+        for col, typ in LATER_COLUMNS.items():
+            if col not in have:
+                self.conn.execute(f"ALTER TABLE jobs ADD COLUMN {col} {typ}")
+
+    def create(self, job):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                'INSERT INTO jobs (id, csv_path, music, src, out, rows, workers, threads, draft, ids, promoted_from, status, '
+                'outputs, created, updated) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)',
+                (job['id'], job.get('csv_path'), job.get('music'), job.get('src'), job.get('out'), job.get('rows'),
+                 job.get('workers'), job.get('threads'), job.get('draft') or 0, job.get('ids'), job.get('promoted_from'),
+                 job.get('status') or 'queued', json.dumps(job.get('outputs') or []), job.get('created') or now, now))
+
+    def get(self, job_id):
+        with self.lock:
+            row = self.conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['outputs'] = json.loads(job.get('outputs') or '[]')
+        job['progress'] = json.loads(job['progress']) if job.get('progress') else None
+        return job
+
+    def update(self, job_id, **fields):
+        fields = {k: v for k, v in fields.items() if k in JOB_FIELDS and k != 'id'}
+        if not fields:
+            return
+        if isinstance(fields.get('progress'), dict):
+            fields['progress'] = json.dumps(fields['progress'], ensure_ascii=False)
+        fields['updated'] = time.time()
+        cols = ', '.join(f"{k} = ?" for k in fields)
+        with self.lock:
+            self.conn.execute(f"UPDATE jobs SET {cols} WHERE id = ?", list(fields.values()) + [job_id])
+        self.notify()
+
+    def append_log(self, job_id, line):
+        with self.lock:
+            self.conn.execute('BEGIN')
+            try:
+                cur = self.conn.execute('UPDATE jobs SET log_seq = log_seq + 1 WHERE id = ?', (job_id,))
+                if cur.rowcount == 0:
+                    self.conn.execute('ROLLBACK')
+                    return None
+                seq = self.conn.execute('SELECT log_seq FROM jobs WHERE id = ?', (job_id,)).fetchone()[0]
+                self.conn.execute('INSERT INTO job_logs (job_id, seq, line) VALUES (?,?,?)', (job_id, seq, line))
+                if self.log_keep and seq % self.PRUNE_EVERY == 0:
+                    self.conn.execute('DELETE FROM job_logs WHERE job_id = ? AND seq <= ?', (job_id, seq - self.log_keep))
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+        self.notify()
+        return seq
+
+    def add_output(self, job_id, path):
+        with self.lock:
+            row = self.conn.execute('SELECT outputs FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is None:
+                return
+            outputs = json.loads(row[0] or '[]')
+            outputs.append(path)
+            self.conn.execute('UPDATE jobs SET outputs = ?, updated = ? WHERE id = ?', (json.dumps(outputs), time.time(), job_id))
+        self.notify()
+
+    def notify(self):
+        # also called by the server when in-memory job state (e.g. progress) changes
+        with self.changed:
+            self.version += 1
+            self.changed.notify_all()
+
+    def wait_for_change(self, seen_version, timeout=None):
+        # returns the current version once it differs from seen_version, or after timeout
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != seen_version, timeout=timeout)
+            return self.version
+
+    def log_lines(self, job_id, after=0, limit=None, tail=False):
+        # lines with seq > after, oldest first; tail=True returns the newest `limit` lines instead
+        with self.lock:
+            if tail and limit:
+                rows = self.conn.execute('SELECT seq, line FROM job_logs WHERE job_id = ? AND seq > ? ORDER BY seq DESC LIMIT ?',
+                                         (job_id, int(after), int(limit))).fetchall()
+                rows.reverse()
+            elif limit:
+                rows = self.conn.execute('SELECT seq, line FROM job_logs WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?',
+                                         (job_id, int(after), int(limit))).fetchall()
+            else:
+                rows = self.conn.execute('SELECT seq, line FROM job_logs WHERE job_id = ? AND seq > ? ORDER BY seq',
+                                         (job_id, int(after))).fetchall()
+        return [(r[0], r[1]) for r in rows]
+
+    def ids_with_status(self, *statuses):
+        marks = ','.join('?' for _ in statuses)
+        with self.lock:
+            rows = self.conn.execute(f"SELECT id FROM jobs WHERE status IN ({marks}) ORDER BY created", statuses).fetchall()
+        return [r[0] for r in rows]
+
+    def migrate_json(self, json_path):
+        # one-off import of the old whole-file uploads/jobs.json
+        if not os.path.isfile(json_path):
+            return 0
+        try:
+            with open(json_path, 'r', encoding='utf-8') as fh:
+                old = json.load(fh) or {}
+        except Exception:
+            return 0
+        count = 0
+        for job_id, job in old.items():
+            if not isinstance(job, dict) or self.get(job_id) is not None:
+                continue
+            job = dict(job, id=job_id)
+            self.create(job)
+            for line in (job.get('log') or '').splitlines():
+                if line:
+                    self.append_log(job_id, line)
+            count += 1
+        try:
+            os.replace(json_path, json_path + '.migrated')
+        except Exception:
+            pass
+        return count
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# Persistent index of source clips (SQLite).
+#
+# One row per video file: size/mtime, ffprobe metadata (duration, resolution,
+# fps, codecs, audio presence) and a partial content hash. refresh() stats the
+# directory and only re-probes files whose size or mtime changed, so render
+# scripts can list, validate and plan against their sources without opening a
+# VideoFileClip on anything.
+#
+#   index = MediaIndex()
+#   for rec in index.refresh(src_dir):      # listing order, like os.listdir
+#       rec['name'], rec['duration'], rec['width'], rec['status']
+#
+#   python media_index.py DIR [DIR ...]     # refresh and print a summary
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import ffmpeg_backend
+
+
+VIDEO_EXTS = (".mp4", ".mov", ".avi", ".mkv")
+DEFAULT_DB = os.environ.get('REELS_MEDIA_INDEX') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'media_index.sqlite3')
+# bytes read from each end of a file for content_hash
+HASH_SPAN = 1024 * 1024
+# bump when describe() changes what it stores; rows from an older version are re-probed
+# 2: width/height of rotated clips are the displayed (autorotated) size
+INDEX_VERSION = 2
+
+# status: 'ok' probed with a video stream, 'invalid' probed and unusable,
+# 'unprobed' ffprobe could not be run (retried on the next refresh)
+FIELDS = ('path', 'dir', 'name', 'size', 'mtime_ns', 'duration', 'width', 'height', 'fps', 'codec', 'pix_fmt',
+          'has_audio', 'audio_codec', 'content_hash', 'status', 'error', 'indexed')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS media (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER,
+    mtime_ns INTEGER,
+    duration REAL,
+    width INTEGER,
+    height INTEGER,
+    fps REAL,
+    codec TEXT,
+    pix_fmt TEXT,
+    has_audio INTEGER,
+    audio_codec TEXT,
+    content_hash TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    indexed REAL
+);
+CREATE INDEX IF NOT EXISTS media_dir ON media (dir);
+'''
+
+
+def content_hash(path, size):
+    # size + first and last HASH_SPAN bytes: catches re-encodes and replaced files without reading whole videos
+    h = hashlib.sha256(str(size).encode('ascii'))
+    with open(path, 'rb') as fh:
+        h.update(fh.read(HASH_SPAN))
+        if size > 2 * HASH_SPAN:
+            fh.seek(size - HASH_SPAN)
+            h.update(fh.read(HASH_SPAN))
+    return h.hexdigest()
+
+
+def describe(path, size, mtime_ns):
+    rec = dict.fromkeys(FIELDS)
+    rec.update(path=path, dir=os.path.dirname(path), name=os.path.basename(path), size=size, mtime_ns=mtime_ns,
+               status='ok', indexed=time.time())
+    try:
+        rec['content_hash'] = content_hash(path, size)
+    except OSError as e:
+        rec.update(status='invalid', error=str(e))
+        return rec
+    try:
+        info = ffmpeg_backend.probe(path)
+    except FileNotFoundError:
+        rec.update(status='unprobed', error='ffprobe not found')
+        return rec
+    except Exception as e:
+        rec.update(status='invalid', error=f"ffprobe failed: {e}")
+        return rec
+    rec.update({k: info.get(k) for k in ('duration', 'width', 'height', 'fps', 'codec', 'pix_fmt', 'audio_codec')})
+    rec['has_audio'] = 1 if info.get('has_audio') else 0
+    if not info.get('width') or not info.get('height'):
+        rec.update(status='invalid', error='no video stream')
+    elif not info.get('duration'):
+        rec.update(status='invalid', error='unknown duration')
+    return rec
+
+
+class MediaIndex:
+    def __init__(self, db_path=DEFAULT_DB):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        try:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+        except sqlite3.DatabaseError:
+            pass
+        self.conn.executescript(SCHEMA)
+        if self.conn.execute('PRAGMA user_version').fetchone()[0] < INDEX_VERSION:
+            self.conn.execute('DELETE FROM media')
+            self.conn.execute(f'PRAGMA user_version = {INDEX_VERSION}')
+
+    def get(self, path):
+        with self.lock:
+            row = self.conn.execute('SELECT * FROM media WHERE path = ?', (os.path.abspath(path),)).fetchone()
+        return dict(row) if row else None
+
+    def refresh(self, src_dir, exts=VIDEO_EXTS, workers=4, log=None):
+        # returns records for the videos in src_dir, in os.listdir order; unchanged files are not touched
+        src_dir = os.path.abspath(src_dir)
+        if not os.path.isdir(src_dir):
+            return []
+        found = []
+        with os.scandir(src_dir) as it:
+            for entry in it:
+                if entry.name.lower().endswith(exts) and entry.is_file():
+                    st = entry.stat()
+                    found.append((entry.path, st.st_size, st.st_mtime_ns))
+        with self.lock:
+            known = {r['path']: dict(r) for r in self.conn.execute('SELECT * FROM media WHERE dir = ?', (src_dir,))}
+        stale = [f for f in found if not self._current(known.get(f[0]), f[1], f[2])]
+        if stale:
+            if log:
+                log(f"Indexing {len(stale)} new or changed source clip(s) in {src_dir}")
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                fresh = list(pool.map(lambda f: describe(*f), stale))
+            self._store(fresh)
+            known.update((r['path'], r) for r in fresh)
+        gone = set(known) - {f[0] for f in found}
+        if gone:
+            with self.lock:
+                self.conn.executemany('DELETE FROM media WHERE path = ?', [(p,) for p in gone])
+        return [known[f[0]] for f in found]
+
+    @staticmethod
+    def _current(rec, size, mtime_ns):
+        return rec is not None and rec['size'] == size and rec['mtime_ns'] == mtime_ns and rec['status'] != 'unprobed'
+
+    def _store(self, records):
+        cols = ', '.join(FIELDS)
+        marks = ', '.join('?' for _ in FIELDS)
+        with self.lock:
+            self.conn.execute('BEGIN')
+            self.conn.executemany(f"INSERT OR REPLACE INTO media ({cols}) VALUES ({marks})",
+                                  [tuple(r.get(k) for k in FIELDS) for r in records])
+            self.conn.execute('COMMIT')
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_indexes = {}
+
+
+def get_index(db_path=DEFAULT_DB):
+    # one open index per process (warm render workers keep it between jobs)
+    idx = _indexes.get(db_path)
+    if idx is None:
+        idx = _indexes[db_path] = MediaIndex(db_path)
+    return idx
+
+
+def usable(records):
+    # records that can be rendered; 'unprobed' ones are given the benefit of the doubt
+    return [r for r in records if r['status'] != 'invalid']
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Refresh and show the source media index')
+    ap.add_argument('dirs', nargs='+', help='source directories to index')
+    ap.add_argument('--db', default=DEFAULT_DB, help='index database')
+    ap.add_argument('--workers', type=int, default=4, help='parallel ffprobe processes')
+    args = ap.parse_args()
+    index = MediaIndex(args.db)
+    for d in args.dirs:
+        t0 = time.perf_counter()
+        recs = index.refresh(d, workers=args.workers, log=print)
+        took = time.perf_counter() - t0
+        print(f"{d}: {len(recs)} clips, {len(usable(recs))} usable, {sum(r['duration'] or 0 for r in recs):.0f}s total ({took:.2f}s)")
+        for r in recs:
+            if r['status'] == 'ok':
+                print(f"  {r['name']}: {r['width']}x{r['height']} {r['fps'] or 0:.2f}fps {r['duration']:.1f}s {r['codec']}"
+                      f"{' +' + (r['audio_codec'] or 'audio') if r['has_audio'] else ' (no audio)'}")
+            else:
+                print(f"  {r['name']}: {r['status']} ({r['error']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# Per-stage timings and counters for render runs.
+#
+# Rows time their hot-path stages into a plain dict with timed() (inside pool
+# workers too) and return it in their result; the parent folds results into a
+# RunRecorder, which also times its own CSV I/O and counts rendered / skipped /
+# failed rows and bytes written, and saves one JSON run record per job:
+#
+#   rec = RunRecorder(path, backend='ffmpeg')
+#   with rec.timer('csv'): writeback.update(...)
+#   rec.add_result(res); rec.save()
+#
+# The server loads run records into a MetricsRegistry and serves the
+# aggregates in the Prometheus text format on /metrics.
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+STAGES = ('probe', 'decode', 'overlay', 'composite', 'audio', 'encode', 'thumbnail', 'csv')
+COUNTERS = ('rendered', 'skipped', 'failed', 'bytes_written')
+# seconds; covers a thumbnail (~10 ms) up to a long MoviePy encode
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+JOB_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+RECORD_VERSION = 1
+
+
+@contextmanager
+def timed(timings, stage):
+    # adds the block's wall time to timings[stage]
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - t0
+
+
+def _summary(values):
+    values = sorted(values)
+    n = len(values)
+    return {'count': n, 'sum': round(sum(values), 4), 'mean': round(sum(values) / n, 4), 'max': round(values[-1], 4),
+            'p50': round(values[n // 2], 4), 'p95': round(values[min(n - 1, int(n * 0.95))], 4)}
+
+
+class RunRecorder:
+    def __init__(self, path=None, **info):
+        self.path = path
+        self.info = info
+        self.started = time.time()
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.stages = {}
+        self.rows = []
+
+    def observe(self, stage, seconds):
+        self.stages.setdefault(stage, []).append(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - t0)
+
+    def skip(self, n=1):
+        self.counters['skipped'] += n
+
+    def add_result(self, res):
+        # a render_row()-style result carrying 'timings'
+        size = 0
+        if res.get('ok'):
+            self.counters['rendered'] += 1
+            try:
+                size = os.path.getsize(res['output_path'])
+            except OSError:
+                pass
+            self.counters['bytes_written'] += size
+        else:
+            self.counters['failed'] += 1
+        timings = res.get('timings') or {}
+        for stage, seconds in timings.items():
+            self.observe(stage, seconds)
+        self.rows.append({'idx': res.get('idx'), 'ok': bool(res.get('ok')), 'output': res.get('output_path'), 'bytes': size,
+                          'timings': {k: round(v, 4) for k, v in timings.items()}, 'error': res.get('error')})
+
+    def record(self):
+        finished = time.time()
+        return {'version': RECORD_VERSION, 'info': self.info, 'started': self.started, 'finished': finished,
+                'wall_s': round(finished - self.started, 3), 'counters': dict(self.counters),
+                'stages': {s: _summary(v) for s, v in self.stages.items() if v},
+                # raw samples so aggregators can rebuild histograms
+                'samples': {s: [round(x, 4) for x in v] for s, v in self.stages.items()},
+                'rows': self.rows}
+
+    def save(self):
+        if not self.path:
+            return None
+        rec = self.record()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(rec, f, indent=2)
+        os.replace(tmp, self.path)
+        return rec
+
+
+def load_record(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, le in enumerate(self.buckets):
+            if value <= le:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    # aggregates of every run record seen since the server started (plus the ones loaded from disk)
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stage_seconds = {}
+        self.job_seconds = Histogram(JOB_BUCKETS)
+        self.rows = dict.fromkeys(('rendered', 'skipped', 'failed'), 0)
+        self.bytes_written = 0
+        self.jobs = {}
+
+    def add_record(self, rec, status=None):
+        # rec may be None for a job that died before writing its record; it still counts by status
+        with self.lock:
+            status = status or ((rec or {}).get('info') or {}).get('status') or 'finished'
+            self.jobs[status] = self.jobs.get(status, 0) + 1
+            if not rec:
+                return
+            for stage, values in (rec.get('samples') or {}).items():
+                hist = self.stage_seconds.setdefault(stage, Histogram(STAGE_BUCKETS))
+                for v in values:
+                    hist.observe(v)
+            counters = rec.get('counters') or {}
+            for k in self.rows:
+                self.rows[k] += int(counters.get(k) or 0)
+            self.bytes_written += int(counters.get('bytes_written') or 0)
+            if rec.get('wall_s') is not None:
+                self.job_seconds.observe(rec['wall_s'])
+
+    def load_dir(self, directory, limit=1000):
+        # newest `limit` records, so a restart doesn't zero the dashboards
+        try:
+            names = sorted((n for n in os.listdir(directory) if n.endswith('.json')),
+                           key=lambda n: os.path.getmtime(os.path.join(directory, n)))[-limit:]
+        except OSError:
+            return 0
+        for name in names:
+            self.add_record(load_record(os.path.join(directory, name)))
+        return len(names)
+
+    def render(self, prefix='autoreels'):
+        # Prometheus text exposition format (version 0.0.4)
+        out = []
+
+        def histogram(name, hist, labels=''):
+            sep = ',' if labels else ''
+            for le, n in zip(hist.buckets, hist.counts):
+                out.append(f'{name}_bucket{{{labels}{sep}le="{le:g}"}} {n}')
+            out.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {hist.count}')
+            suffix = f'{{{labels}}}' if labels else ''
+            out.append(f'{name}_sum{suffix} {hist.sum:.6f}')
+            out.append(f'{name}_count{suffix} {hist.count}')
+
+        with self.lock:
+            name = f'{prefix}_stage_seconds'
+            out += [f'# HELP {name} Wall time of one render stage (per row; per CSV write-back call for csv).', f'# TYPE {name} histogram']
+            for stage in sorted(self.stage_seconds):
+                histogram(name, self.stage_seconds[stage], f'stage="{stage}"')
+            name = f'{prefix}_job_seconds'
+            out += [f'# HELP {name} Wall time of a render job.', f'# TYPE {name} histogram']
+            histogram(name, self.job_seconds)
+            name = f'{prefix}_rows_total'
+            out += [f'# HELP {name} CSV rows by outcome.', f'# TYPE {name} counter']
+            out += [f'{name}{{result="{k}"}} {v}' for k, v in self.rows.items()]
+            name = f'{prefix}_output_bytes_total'
+            out += [f'# HELP {name} Bytes of rendered video written.', f'# TYPE {name} counter', f'{name} {self.bytes_written}']
+            name = f'{prefix}_jobs_total'
+            out += [f'# HELP {name} Finished render jobs by status.', f'# TYPE {name} counter']
+            out += [f'{name}{{status="{k}"}} {v}' for k, v in sorted(self.jobs.items())]
+        return '\n'.join(out) + '\n'
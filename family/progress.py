@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# Machine-readable progress channel from app.py to server.py.
+#
+# Events are JSON objects, one per line, appended to the file given with
+# app.py --events. Each event is a single O_APPEND write, so the parent and
+# every --workers pool process can share the file without interleaving lines.
+#
+#   batch_started   {rows, skipped}
+#   row_started     {idx, id, output}
+#   frames          {idx, done, total}
+#   output_created  {idx, path}
+#   thumbnail_created {idx, path}
+#   row_skipped     {idx, output}        (render cache hit)
+#   row_failed      {idx, output, error}
+#   batch_finished  {rendered, skipped, failed}
+import json
+import os
+import time
+
+try:
+    from proglog import ProgressBarLogger
+except Exception:
+    ProgressBarLogger = None
+
+
+_channel = {'path': None, 'fd': None}
+
+
+def configure(path):
+    # (re)point this process at an events file; None disables emitting
+    if path == _channel['path']:
+        return
+    if _channel['fd'] is not None:
+        try:
+            os.close(_channel['fd'])
+        except OSError:
+            pass
+    _channel['path'] = path
+    _channel['fd'] = None
+    if path:
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+        _channel['fd'] = os.open(path, flags, 0o644)
+
+
+def emit(event, **fields):
+    fd = _channel['fd']
+    if fd is None:
+        return
+    payload = dict(fields, event=event, ts=round(time.time(), 3), pid=os.getpid())
+    try:
+        os.write(fd, (json.dumps(payload, ensure_ascii=False) + '\n').encode('utf-8'))
+    except OSError:
+        pass
+
+
+class FrameThrottle:
+    # emits 'frames' at most every `step` of the total (and always for the last frame)
+    def __init__(self, idx, step=0.02):
+        self.idx = idx
+        self.step = step
+        self.last = -1
+
+    def update(self, done, total):
+        if not total:
+            return
+        if done >= total or self.last < 0 or done - self.last >= total * self.step:
+            self.last = done
+            emit('frames', idx=self.idx, done=int(done), total=int(total))
+
+
+if ProgressBarLogger is not None:
+    class FrameProgressLogger(ProgressBarLogger):
+        # MoviePy logger that turns the video frame bar into 'frames' events instead of tqdm output
+        def __init__(self, idx):
+            super().__init__()
+            self.throttle = FrameThrottle(idx)
+
+        def bars_callback(self, bar, attr, value, old_value=None):
+            # 'chunk' is the audio bar; 't' (moviepy 1) / 'frame_index' (moviepy 2) count video frames
+            if attr != 'index' or bar == 'chunk':
+                return
+            total = self.bars.get(bar, {}).get('total')
+            self.throttle.update(value + 1, total)
+else:
+    FrameProgressLogger = None
+
+
+def moviepy_logger(idx):
+    # logger for write_videofile: frame events when a channel is configured, MoviePy's default otherwise
+    if _channel['fd'] is None or FrameProgressLogger is None:
+        return 'bar'
+    return FrameProgressLogger(idx)
+
+
+class EventTail:
+    # incremental reader for an events file; keeps the byte offset and any partial last line
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.partial = b''
+
+    def read(self):
+        try:
+            with open(self.path, 'rb') as fh:
+                fh.seek(self.offset)
+                data = fh.read()
+        except OSError:
+            return []
+        self.offset += len(data)
+        lines = (self.partial + data).split(b'\n')
+        self.partial = lines.pop()
+        events = []
+        for raw in lines:
+            try:
+                events.append(json.loads(raw.decode('utf-8')))
+            except ValueError:
+                continue
+        return events
+
+
+MAX_FAILURES = 20
+
+
+def new_state():
+    # compact per-job progress kept by the server; 'active' holds the rows currently encoding
+    return {'rows_total': None, 'row': 0, 'rendered': 0, 'skipped': 0, 'failed': 0, 'current': None,
+            'percent': None, 'frames': None, 'frames_total': None, 'active': {}, 'outputs': [], 'thumbnails': 0,
+            'failures': []}
+
+
+def apply_event(state, ev):
+    # folds one event into the state; returns the output path for 'output_created', else None
+    kind = ev.get('event')
+    key = str(ev.get('idx'))
+    if kind == 'batch_started':
+        state['rows_total'] = ev.get('rows')
+        state['skipped'] = ev.get('skipped') or 0
+    elif kind == 'row_started':
+        state['row'] += 1
+        state['current'] = ev.get('output')
+        state['percent'] = state['frames'] = state['frames_total'] = None
+        state['active'][key] = {'id': ev.get('id'), 'output': ev.get('output'), 'frames': 0, 'frames_total': None}
+    elif kind == 'frames':
+        done, total = ev.get('done'), ev.get('total')
+        row = state['active'].setdefault(key, {'output': None})
+        row['frames'], row['frames_total'] = done, total
+        state['current'] = row.get('output') or state['current']
+        state['frames'], state['frames_total'] = done, total
+        state['percent'] = min(100, int(100 * done / total)) if total else None
+    elif kind == 'output_created':
+        state['active'].pop(key, None)
+        state['rendered'] += 1
+        state['outputs'].append(ev.get('path'))
+        state['percent'] = 100
+        return ev.get('path')
+    elif kind == 'thumbnail_created':
+        state['thumbnails'] += 1
+    elif kind == 'row_skipped':
+        pass  # counted by batch_started
+    elif kind == 'row_failed':
+        state['active'].pop(key, None)
+        state['failed'] += 1
+        state['failures'] = (state['failures'] + [{'idx': ev.get('idx'), 'output': ev.get('output'),
+                                                   'error': ev.get('error')}])[-MAX_FAILURES:]
+    elif kind == 'batch_finished':
+        state['active'] = {}
+        for k in ('rendered', 'skipped', 'failed'):
+            if ev.get(k) is not None:
+                state[k] = ev[k]
+    return None
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# Skip-if-up-to-date cache for rendered reels.
+#
+# Every successful render records a key in <out>/render_manifest.json. The key
+# hashes everything that ends up in the output: hook text, the source clip and
+# music bed (path, size, mtime), the overlay style and the render recipe. A row
+# whose key matches, and whose output + .done marker are still on disk, is
+# skipped without opening a single clip.
+import hashlib
+import json
+import os
+import time
+
+
+# bump when the compositing recipe in app.py changes in a way that alters output
+# 2: hook wrapping from cumulative per-word widths
+# 3: crop-before-scale geometry, no background layer when the clip covers the canvas
+# 4: rotated sources framed from their displayed (autorotated) size
+RECIPE_VERSION = 4
+MANIFEST_NAME = 'render_manifest.json'
+
+
+def file_fingerprint(path):
+    if not path:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return [os.path.abspath(path), None, None]
+    return [os.path.abspath(path), st.st_size, st.st_mtime_ns]
+
+
+def render_key(hook, video_path, music_path, style, extra=None):
+    payload = {
+        'recipe': RECIPE_VERSION,
+        'hook': hook or '',
+        'video': file_fingerprint(video_path),
+        'audio': file_fingerprint(music_path),
+        'style': style,
+        'extra': extra,
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=list)
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+class RenderManifest:
+    def __init__(self, out_dir, batch_size=25, log=print):
+        self.path = os.path.join(out_dir, MANIFEST_NAME)
+        self.batch_size = max(1, int(batch_size))
+        self.log = log
+        self.entries = {}
+        self.dirty = 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                data = json.load(fh)
+            if isinstance(data, dict):
+                self.entries = data.get('entries') or {}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.log(f"Warning: ignoring unreadable render manifest {self.path}: {e}")
+
+    def is_fresh(self, output_path, key):
+        entry = self.entries.get(os.path.basename(output_path))
+        if not entry or entry.get('key') != key:
+            return False
+        # the .done marker is only written after write_videofile returned
+        return os.path.isfile(output_path) and os.path.isfile(output_path + '.done')
+
+    def record(self, output_path, key):
+        self.entries[os.path.basename(output_path)] = {'key': key, 'rendered_at': int(time.time())}
+        self.dirty += 1
+        if self.dirty >= self.batch_size:
+            self.save()
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = self.path + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as fh:
+                json.dump({'recipe': RECIPE_VERSION, 'entries': self.entries}, fh, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+            self.dirty = 0
+        except Exception as e:
+            self.log(f"Warning: could not save render manifest {self.path}: {e}")
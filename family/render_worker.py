@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# Long-lived, pre-warmed render worker for server.py.
+#
+# The worker imports app.py (and with it moviepy, numpy and PIL) once, then
+# runs job specs sent over a local multiprocessing.connection channel by
+# calling app.main(argv) in-process. Module-level caches -- fonts, decoded
+# music beds, probed source metadata -- survive from one job to the next.
+# After `max_jobs` jobs, or once RSS passes `max_rss_mb`, the worker reports
+# that it is retiring and exits; the server side starts a fresh one.
+#
+# While a job runs, the worker's stdout/stderr and those of app.py's --workers
+# pool processes go to a per-job log file that one thread tails and forwards to
+# the server. The pool processes never see the Connection, so only that thread
+# ever sends on it.
+#
+#   server side:  WarmWorker(slot).run(argv, on_line)
+#   worker side:  python render_worker.py --connect 127.0.0.1:PORT --authkey HEX
+import argparse
+import contextlib
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import traceback
+from multiprocessing.connection import Client, Listener
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MAX_JOBS = 20
+DEFAULT_MAX_RSS_MB = 1500
+# app.py hands this job log path to its pool processes
+POOL_LOG_ENV = 'REELS_POOL_LOG'
+
+
+def current_rss_mb():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024.0 * 1024.0)
+    except Exception:
+        pass
+    try:
+        with open('/proc/self/status', 'r') as fh:
+            for line in fh:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024.0
+    except Exception:
+        pass
+    return None
+
+
+class JobOutput:
+    # for the duration of a job, forwards every line appended to a per-job log file to the server.
+    # The worker's own fds 1/2 point at the file, and app.py's pool processes append to it too
+    # (REELS_POOL_LOG, whatever their start method); only the tail thread sends on the Connection.
+    def __init__(self, conn, lock, poll=0.2):
+        self.conn = conn
+        self.lock = lock
+        self.poll = poll
+
+    def __enter__(self):
+        fd, self.path = tempfile.mkstemp(prefix='render_worker_', suffix='.log')
+        os.close(fd)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        self.saved = (os.dup(1), os.dup(2))
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | getattr(os, 'O_BINARY', 0))
+        os.dup2(fd, 1)
+        os.dup2(fd, 2)
+        os.close(fd)
+        # line-buffered text streams over the redirected fds for this process's own prints
+        self.stdout = open(1, 'w', buffering=1, encoding='utf-8', errors='replace', closefd=False)
+        self.stderr = open(2, 'w', buffering=1, encoding='utf-8', errors='replace', closefd=False)
+        os.environ[POOL_LOG_ENV] = self.path
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._tail, daemon=True)
+        self.thread.start()
+        return self
+
+    def _send(self, data):
+        line = data.decode('utf-8', 'replace')
+        if line:
+            with self.lock:
+                self.conn.send(('log', line))
+
+    def _tail(self):
+        buf = b''
+        with open(self.path, 'rb') as fh:
+            while True:
+                stopping = self.stop.is_set()
+                data = fh.read()
+                if data:
+                    # MoviePy progress bars redraw with \r; treat it as a line break like text-mode pipes do
+                    parts = re.split(rb'[\r\n]', buf + data)
+                    buf = parts.pop()
+                    for part in parts:
+                        self._send(part)
+                elif stopping:
+                    break
+                else:
+                    self.stop.wait(self.poll)
+        self._send(buf)
+
+    def __exit__(self, *exc):
+        for stream in (self.stdout, self.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+        os.dup2(self.saved[0], 1)
+        os.dup2(self.saved[1], 2)
+        for fd in self.saved:
+            os.close(fd)
+        os.environ.pop(POOL_LOG_ENV, None)
+        # pool processes are gone by now; whatever a straggler writes later is never read
+        self.stop.set()
+        self.thread.join()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+        return False
+
+
+def serve(address, authkey, max_jobs=DEFAULT_MAX_JOBS, max_rss_mb=DEFAULT_MAX_RSS_MB):
+    os.chdir(BASE_DIR)
+    if BASE_DIR not in sys.path:
+        sys.path.insert(0, BASE_DIR)
+    import app  # the expensive imports happen here, once per worker
+
+    conn = Client(address, authkey=authkey)
+    lock = threading.Lock()
+    conn.send(('ready', os.getpid()))
+    jobs_done = 0
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            return
+        if not msg or msg[0] == 'stop':
+            return
+        argv = list(msg[1])
+        code = 1
+        with JobOutput(conn, lock) as out, contextlib.redirect_stdout(out.stdout), \
+                contextlib.redirect_stderr(out.stderr):
+            try:
+                code = app.main(argv) or 0
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception:
+                traceback.print_exc()
+                code = 1
+        jobs_done += 1
+        rss = current_rss_mb()
+        retire = jobs_done >= max_jobs or (rss is not None and rss >= max_rss_mb)
+        conn.send(('exit', code, retire))
+        if retire:
+            return
+
+
+class WarmWorker:
+    # server-side handle for one worker process; one per scheduler slot
+    def __init__(self, slot, log_path=None, max_jobs=DEFAULT_MAX_JOBS, max_rss_mb=DEFAULT_MAX_RSS_MB, popen_kwargs=None):
+        self.slot = slot
+        self.log_path = log_path
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.popen_kwargs = popen_kwargs or {}
+        self.proc = None
+        self.conn = None
+        self.lock = threading.Lock()
+
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None and self.conn is not None
+
+    def ensure_started(self, timeout=60):
+        with self.lock:
+            if self.alive():
+                return
+            self._close()
+            authkey = os.urandom(16)
+            listener = Listener(('127.0.0.1', 0), authkey=authkey)
+            host, port = listener.address
+            cmd = [sys.executable, os.path.join(BASE_DIR, 'render_worker.py'), '--connect', f"{host}:{port}",
+                   '--authkey', authkey.hex(), '--max-jobs', str(self.max_jobs), '--max-rss-mb', str(self.max_rss_mb)]
+            log_fh = open(self.log_path, 'a', encoding='utf-8') if self.log_path else subprocess.DEVNULL
+            try:
+                self.proc = subprocess.Popen(cmd, cwd=BASE_DIR, stdin=subprocess.DEVNULL, stdout=log_fh,
+                                             stderr=subprocess.STDOUT, **self.popen_kwargs)
+            finally:
+                if log_fh is not subprocess.DEVNULL:
+                    log_fh.close()
+            # accept on a helper thread so a worker that dies during import can't hang the slot
+            accepted = {}
+            t = threading.Thread(target=lambda: accepted.update(conn=listener.accept()), daemon=True)
+            t.start()
+            t.join(timeout)
+            listener.close()
+            conn = accepted.get('conn')
+            if conn is None or not conn.poll(timeout) or conn.recv()[0] != 'ready':
+                self._close()
+                raise RuntimeError(f"render worker for slot {self.slot} did not start")
+            self.conn = conn
+
+    def run(self, argv, on_line):
+        # runs one job; returns the app.main exit code (-1 when the worker died or was killed)
+        self.ensure_started()
+        try:
+            self.conn.send(('job', list(argv)))
+            while True:
+                msg = self.conn.recv()
+                if msg[0] == 'log':
+                    on_line(msg[1])
+                elif msg[0] == 'exit':
+                    if msg[2]:
+                        on_line(f"[worker] render worker retiring (slot {self.slot})")
+                        self._close(wait=True)
+                    return msg[1]
+        except (EOFError, OSError):
+            self._close()
+            return -1
+
+    def stop(self):
+        with self.lock:
+            if self.conn is not None:
+                try:
+                    self.conn.send(('stop',))
+                except Exception:
+                    pass
+            self._close(wait=True)
+
+    def _close(self, wait=False):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+            self.conn = None
+        if self.proc is not None:
+            if wait:
+                try:
+                    self.proc.wait(timeout=10)
+                except Exception:
+                    pass
+            if self.proc.poll() is None:
+                try:
+                    self.proc.kill()
+                except Exception:
+                    pass
+            self.proc = None
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Pre-warmed render worker (started by server.py)')
+    ap.add_argument('--connect', required=True, help='host:port of the server-side listener')
+    ap.add_argument('--authkey', required=True, help='hex auth key for the connection')
+    ap.add_argument('--max-jobs', type=int, default=DEFAULT_MAX_JOBS)
+    ap.add_argument('--max-rss-mb', type=float, default=DEFAULT_MAX_RSS_MB)
+    args = ap.parse_args()
+    host, _, port = args.connect.rpartition(':')
+    serve((host, int(port)), bytes.fromhex(args.authkey), args.max_jobs, args.max_rss_mb)
+
+
+if __name__ == '__main__':
+    main()
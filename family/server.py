@@ -1,14 +1,20 @@
-from flask import Flask, request, jsonify, render_template_string, send_from_directory
+from flask import Flask, request, jsonify, render_template_string, send_from_directory, Response, stream_with_context
+import argparse
 import os
 import uuid
 import threading
-import queue
 import time
 import json
 import csv
 import subprocess
 import sys
 
+import progress
+from metrics import MetricsRegistry, load_record
+from job_scheduler import Scheduler, kill_process_tree, popen_kwargs
+from job_store import JobStore
+from render_worker import WarmWorker
+
 app = Flask(__name__)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 UPLOADS = os.path.join(BASE_DIR, 'uploads')
@@ -16,10 +22,68 @@ os.makedirs(UPLOADS, exist_ok=True)
 
 # storage files
 JOBS_FILE = os.path.join(UPLOADS, 'jobs.json')
+JOBS_DB = os.path.join(UPLOADS, 'jobs.sqlite3')
 CSV_STORE_FILE = os.path.join(UPLOADS, 'csv_store.json')
 
-jobs_lock = threading.Lock()
-task_queue = queue.Queue()
+# how many trailing log lines /status returns when no cursor is given
+STATUS_LOG_TAIL = 200
+
+# concurrent render jobs; override with REELS_SLOTS or --slots
+DEFAULT_SLOTS = int(os.environ.get('REELS_SLOTS') or 2)
+
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+# log lines per SSE 'log' event and seconds between keepalive comments
+EVENTS_BATCH = 500
+EVENTS_KEEPALIVE = 15
+
+# app.py writes JSON-lines progress events here (one file per job, see progress.py)
+EVENTS_DIR = os.path.join(UPLOADS, 'events')
+os.makedirs(EVENTS_DIR, exist_ok=True)
+# seconds between polls of a running job's events file
+EVENTS_POLL = 0.5
+# human log lines kept per job; older lines are pruned from the store
+LOG_RING_LINES = 2000
+
+# app.py's run record per job (stage timings, row counters), aggregated for /metrics
+RUNS_DIR = os.path.join(UPLOADS, 'runs')
+os.makedirs(RUNS_DIR, exist_ok=True)
+metrics_registry = MetricsRegistry()
+metrics_registry.load_dir(RUNS_DIR)
+
+# compact progress state of running jobs, folded from app.py's events and pushed over /events;
+# persisted to the job row when the job ends
+progress_lock = threading.Lock()
+job_progress = {}
+
+
+def progress_snapshot(job_id):
+    with progress_lock:
+        p = job_progress.get(job_id)
+        if p is not None:
+            return json.loads(json.dumps(p))
+    job = job_store.get(job_id) or {}
+    return job.get('progress') or {}
+
+
+def apply_events(job_id, tail):
+    events = tail.read()
+    if not events:
+        return
+    outputs = []
+    with progress_lock:
+        state = job_progress.setdefault(job_id, progress.new_state())
+        for ev in events:
+            path = progress.apply_event(state, ev)
+            if path:
+                outputs.append(path)
+    for path in outputs:
+        job_store.add_output(job_id, path)
+    job_store.notify()
+
+
+def follow_events(job_id, tail, stop):
+    while not stop.wait(EVENTS_POLL):
+        apply_events(job_id, tail)
 
 
 def _load_json(p):
@@ -39,67 +103,138 @@ def _save_json(p, data):
 
 
 uploaded_csvs = _load_json(CSV_STORE_FILE)
-jobs = _load_json(JOBS_FILE)
+job_store = JobStore(JOBS_DB, log_keep=LOG_RING_LINES)
+job_store.migrate_json(JOBS_FILE)
 
 
 def save_csv_store():
     _save_json(CSV_STORE_FILE, uploaded_csvs)
 
 
-def save_jobs(js=None):
-    _save_json(JOBS_FILE, js or jobs)
-
-
-def worker_loop():
-    # worker: launches the CLI pipeline (app.py) using the same Python interpreter
-    py = sys.executable
-    app_py = os.path.join(BASE_DIR, 'app.py')
-    while True:
-        job_id = task_queue.get()
-        with jobs_lock:
-            job = jobs.get(job_id)
-            if not job:
-                continue
-            job['status'] = 'running'
-            job.setdefault('log', '')
-            job['log'] += '\n[worker] started'
-            save_jobs()
+def build_app_argv(job, ctx):
+    # app.py falls back to its own defaults for anything not given
+    argv = ['--csv', job.get('csv_path')]
+    if job.get('music'):
+        argv += ['--music', job.get('music')]
+    if job.get('src'):
+        argv += ['--src', job.get('src')]
+    if job.get('out'):
+        argv += ['--out', job.get('out')]
+    if job.get('rows'):
+        argv += ['--rows', str(job.get('rows'))]
+    if job.get('ids'):
+        argv += ['--ids', job.get('ids')]
+    if job.get('workers'):
+        argv += ['--workers', str(job.get('workers'))]
+    if job.get('draft'):
+        argv += ['--draft']
+    argv += ['--threads', str(ctx.threads)]
+    argv += ['--events', events_path(job['id'])]
+    argv += ['--run-record', run_record_path(job['id'])]
+    return argv
+
+
+def events_path(job_id):
+    return os.path.join(EVENTS_DIR, f"{job_id}.jsonl")
+
+
+def run_record_path(job_id):
+    return os.path.join(RUNS_DIR, f"{job_id}.json")
+
+
+def record_run(job_id, status):
+    # stamp the job's final status into its run record and add it to the /metrics aggregates
+    path = run_record_path(job_id)
+    rec = load_record(path)
+    if rec is not None:
+        rec.setdefault('info', {}).update(job_id=job_id, status=status)
+        _save_json(path, rec)
+    metrics_registry.add_record(rec, status=status)
+
+
+def handle_output_line(job_id, line):
+    # human-readable output only; progress and outputs come from the events file
+    job_store.append_log(job_id, line)
+
+
+def run_job(job, ctx):
+    # scheduler slot: runs app.py on the slot's warm worker, or as a fresh subprocess with --cold
+    job_id = job['id']
+    job_store.update(job_id, status='running')
+    job_store.append_log(job_id, f"[worker] started in slot {ctx.slot} (threads={ctx.threads}, workers={job.get('workers') or 1})")
+    argv = build_app_argv(job, ctx)
+    tail = progress.EventTail(events_path(job_id))
+    try:
+        os.remove(tail.path)  # left over from an interrupted run of this job
+    except OSError:
+        pass
+    with progress_lock:
+        job_progress[job_id] = progress.new_state()
+    stop = threading.Event()
+    follower = threading.Thread(target=follow_events, args=(job_id, tail, stop), daemon=True)
+    follower.start()
+    try:
+        ret = run_app(job_id, argv, ctx)
+    finally:
+        stop.set()
+        follower.join()
+        apply_events(job_id, tail)
+        with progress_lock:
+            state = job_progress.pop(job_id, None)
+        job_store.update(job_id, progress=state)
         try:
-            # build command; app.py should accept CLI args like --csv and --music or handle defaults
-            cmd = [py, app_py, '--csv', job.get('csv_path')]
-            if job.get('music'):
-                cmd += ['--music', job.get('music')]
-            if job.get('out'):
-                cmd += ['--out', job.get('out')]
-            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, cwd=BASE_DIR)
-            # stream stdout and update job log/output live
-            for line in proc.stdout:
-                line = line.rstrip('\n')
-                with jobs_lock:
-                    job.setdefault('log', '')
-                    job.setdefault('outputs', [])
-                    job['log'] += '\n' + line
-                    # look for lines like: Created: <path>
-                    if line.startswith('Created:'):
-                        path = line.split('Created:', 1)[1].strip()
-                        if path:
-                            job['outputs'].append(path)
-                    save_jobs()
-            ret = proc.wait()
-            with jobs_lock:
-                if ret == 0:
-                    job['status'] = 'completed'
-                    job['log'] += '\n[worker] process exited 0'
-                else:
-                    job['status'] = 'failed'
-                    job['log'] += f"\n[worker] process exited {ret}"
-                save_jobs()
-        except Exception as e:
-            with jobs_lock:
-                job['status'] = 'failed'
-                job.setdefault('log', '')
-                job['log'] += '\n[worker] exception: ' + str(e)
-                save_jobs()
+            os.remove(tail.path)
+        except OSError:
+            pass
+    if ctx.cancelled.is_set():
+        status = 'cancelled'
+        job_store.append_log(job_id, f"[worker] cancelled (process exited {ret})")
+    elif ret == 0:
+        status = 'completed'
+        job_store.append_log(job_id, '[worker] process exited 0')
+    else:
+        status = 'failed'
+        job_store.append_log(job_id, f"[worker] process exited {ret}")
+    try:
+        record_run(job_id, status)
+    except Exception as e:
+        job_store.append_log(job_id, f"[worker] could not record run metrics: {e}")
+    job_store.update(job_id, status=status)
+
+
+def run_app(job_id, argv, ctx):
+    # returns app.py's exit code
+    if warm_workers:
+        worker = warm_workers[ctx.slot]
+        worker.ensure_started()
+        ctx.proc = worker.proc
+        if ctx.cancelled.is_set():
+            kill_process_tree(ctx.proc)
+        return worker.run(argv, lambda line: handle_output_line(job_id, line))
+    cmd = [sys.executable, os.path.join(BASE_DIR, 'app.py')] + argv
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, cwd=BASE_DIR, **popen_kwargs())
+    ctx.proc = proc
+    if ctx.cancelled.is_set():
+        # cancelled between scheduling and spawn
+        kill_process_tree(proc)
+    # stream stdout into the job's log rows
+    for line in proc.stdout:
+        handle_output_line(job_id, line.rstrip('\n'))
+    return proc.wait()
+
+
+scheduler = Scheduler(job_store, run_job, slots=DEFAULT_SLOTS)
+# one pre-warmed render process per slot (empty with --cold)
+warm_workers = []
+
+
+def start_warm_workers(slots, max_jobs, max_rss_mb):
+    for slot in range(slots):
+        warm_workers.append(WarmWorker(slot, log_path=os.path.join(UPLOADS, f'render_worker_{slot}.log'),
+                                       max_jobs=max_jobs, max_rss_mb=max_rss_mb, popen_kwargs=popen_kwargs()))
+    # pay the moviepy/numpy/PIL import cost now rather than on the first job
+    for w in warm_workers:
+        threading.Thread(target=w.ensure_started, daemon=True).start()
 
 
 INDEX_HTML = '''<!doctype html>
@@ -115,13 +250,35 @@ INDEX_HTML = '''<!doctype html>
 <label>Video source directory (on server): <input type="text" id="srcdir" placeholder="e.g. D:\\reels-dev\\mixkit\\women\\family"></label>
 <label>Video output directory (on server): <input type="text" id="outdir" placeholder="e.g. D:\\reels-dev\\mixkit\\women\\family\\ADHD_output_reel"></label>
 <label>Rows to process: <input type="number" id="rowscount" value="3" min="1" style="width:80px"></label>
-<div style="margin-top:8px"><button id="upload">Upload CSV</button> <button id="run">Upload+Run</button></div>
+<label><input type="checkbox" id="draft"> Draft (fast 540x960 proxy into &lt;out&gt;/drafts; promote approved rows afterwards)</label>
+<div style="margin-top:8px"><button id="upload">Upload CSV</button> <button id="run">Upload+Run</button>
+<span id="promotebox" style="display:none"> | approved IDs: <input type="text" id="promoteids" placeholder="all, or e.g. 3,7,10-12" style="width:180px"> <button id="promote">Promote to full render</button></span></div>
 </form>
 <div style="margin-top:12px"><strong>Last response / status</strong></div>
 <pre id="out" style="height:260px;overflow:auto;background:#021018;padding:8px;border-radius:6px"></pre>
 <script>
 async function postForm(url, fd){ const r=await fetch(url,{method:'POST',body:fd}); return r.json(); }
 window.currentFilename = null;
+// stream job progress and log deltas over server-sent events
+function followJob(id){
+    const out = document.getElementById('out');
+    let lines = [];
+    let prog = {};
+    const render = function(){
+        let head = 'job ' + id + ': ' + (prog.status || 'queued');
+        if(prog.queue_position) head += ' (queue position ' + prog.queue_position + ')';
+        if(prog.row) head += ' | row ' + prog.row + (prog.percent != null ? ' ' + prog.percent + '%' : '');
+        if(prog.rows_total != null) head += ' | ' + prog.rendered + '/' + prog.rows_total + ' rendered' + (prog.failed ? ', ' + prog.failed + ' failed' : '');
+        if(prog.eta_seconds != null) head += ' | eta ' + Math.round(prog.eta_seconds) + 's';
+        if(prog.outputs && prog.outputs.length) head += '\\noutputs:\\n  ' + prog.outputs.join('\\n  ');
+        out.textContent = head + '\\n\\n' + lines.slice(-200).join('\\n');
+        out.scrollTop = out.scrollHeight;
+    };
+    const es = new EventSource('/events/' + id);
+    es.addEventListener('log', function(e){ const d = JSON.parse(e.data); lines = lines.concat(d.lines).slice(-1000); render(); });
+    es.addEventListener('progress', function(e){ prog = JSON.parse(e.data); render(); });
+    es.addEventListener('done', function(e){ const d = JSON.parse(e.data); prog.status = d.status; prog.outputs = d.outputs; render(); es.close(); });
+}
 document.getElementById('upload').onclick = async function(e){ e.preventDefault(); const f=document.getElementById('csvfile').files[0]; if(!f) return alert('pick csv'); const fd=new FormData(); fd.append('csv', f); const j=await postForm('/upload_csv', fd); if(j && j.filename){ window.currentFilename = j.filename; const p = await fetch('/csv_preview?filename='+encodeURIComponent(j.filename)); const pj = await p.json(); document.getElementById('out').textContent = 'Uploaded: ' + j.filename + '\n\n' + JSON.stringify(pj, null, 2); } else { document.getElementById('out').textContent = JSON.stringify(j, null, 2); } }
 
 document.getElementById('run').onclick = async function(e){ e.preventDefault(); if(!window.currentFilename) return alert('Upload a CSV first');
@@ -142,21 +299,20 @@ document.getElementById('run').onclick = async function(e){ e.preventDefault();
         if(src) fd.append('src', src);
         if(out) fd.append('out', out);
         if(audioFile) fd.append('audio', audioFile);
+        if(document.getElementById('draft').checked) fd.append('draft', '1');
         const r = await fetch('/save_and_run', { method: 'POST', body: fd });
         const jr = await r.json();
         document.getElementById('out').textContent = JSON.stringify(jr, null, 2);
-        if(jr.job_id){
-            // start polling status
-            (async function poll(id){
-                for(let i=0;i<120;i++){
-                    const s = await fetch('/status/'+id); const sj = await s.json(); document.getElementById('out').textContent = JSON.stringify(sj, null, 2);
-                    if(sj.status === 'completed' || sj.status === 'failed') break;
-                    await new Promise(res=>setTimeout(res,2000));
-                }
-            })(jr.job_id);
-        }
+        if(jr.job_id){ window.draftJob = fd.get('draft') ? jr.job_id : null; document.getElementById('promotebox').style.display = window.draftJob ? 'inline' : 'none'; followJob(jr.job_id); }
     }catch(err){ document.getElementById('out').textContent = 'Error: '+String(err); }
 }
+document.getElementById('promote').onclick = async function(e){ e.preventDefault(); if(!window.draftJob) return;
+    const fd = new FormData();
+    fd.append('ids', document.getElementById('promoteids').value || '');
+    const jr = await postForm('/promote/' + window.draftJob, fd);
+    document.getElementById('out').textContent = JSON.stringify(jr, null, 2);
+    if(jr.job_id){ window.draftJob = null; document.getElementById('promotebox').style.display = 'none'; followJob(jr.job_id); }
+}
 </script>
 </div>
 </body></html>'''
@@ -219,6 +375,11 @@ def save_and_run():
     src_dir = request.form.get('src') or None
     out_dir = request.form.get('out') or None
     rows_count = int(request.form.get('rows') or 3)
+    # optional per-job CPU budget: app.py --workers processes sharing `threads` ffmpeg threads
+    workers = int(request.form.get('workers') or 0) or None
+    threads = int(request.form.get('threads') or 0) or None
+    # draft: fast proxy render (app.py --draft) that leaves the CSV alone until promoted
+    draft = 1 if (request.form.get('draft') or '').lower() in ('1', 'true', 'on', 'yes') else 0
     if not filename or not rows_json:
         return jsonify({'error':'missing filename or rows_json'}), 400
     path = os.path.join(UPLOADS, filename)
@@ -259,14 +420,14 @@ def save_and_run():
         'src': src_dir,
         'out': out_dir,
         'rows': rows_count,
+        'workers': workers,
+        'threads': threads,
+        'draft': draft,
         'status': 'queued',
-        'log': '',
         'outputs': []
     }
-    with jobs_lock:
-        jobs[job_id] = job
-        save_jobs()
-    task_queue.put(job_id)
+    job_store.create(job)
+    scheduler.submit(job_id)
     return jsonify({'job_id': job_id})
 
 
@@ -319,11 +480,108 @@ def api_csv_item(filename):
 
 @app.route('/status/<job_id>')
 def status(job_id):
-    with jobs_lock:
-        job = jobs.get(job_id)
+    job = job_store.get(job_id)
     if not job:
         return jsonify({'error':'job not found'}), 404
-    return jsonify({'id':job_id,'status':job.get('status'),'log':job.get('log'),'outputs':job.get('outputs')})
+    # ?since=<cursor> returns only newer lines; otherwise the last STATUS_LOG_TAIL lines
+    try:
+        since = int(request.args.get('since') or 0)
+    except ValueError:
+        since = 0
+    lines = job_store.log_lines(job_id, after=since, limit=None if since else STATUS_LOG_TAIL, tail=True)
+    eta = scheduler.eta(job_id)
+    return jsonify({'id':job_id,'status':job.get('status'),'log':'\n'.join(l for _, l in lines),
+                    'log_cursor':job.get('log_seq'),'outputs':job.get('outputs'),
+                    'queue_position':scheduler.queue_position(job_id),'progress':progress_snapshot(job_id),
+                    'draft':bool(job.get('draft')),'promoted_from':job.get('promoted_from'),
+                    'eta_seconds':round(eta, 1) if eta is not None else None})
+
+
+def _sse(event, data, event_id=None):
+    msg = f"event: {event}\n"
+    if event_id is not None:
+        msg += f"id: {event_id}\n"
+    return msg + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.route('/events/<job_id>')
+def events(job_id):
+    # Server-Sent Events: 'log' batches after the cursor, 'progress' on change, 'done' at the end.
+    # Resumes from ?cursor=<seq> or the browser's Last-Event-ID.
+    if not job_store.get(job_id):
+        return jsonify({'error':'job not found'}), 404
+    try:
+        cursor = int(request.args.get('cursor') or request.headers.get('Last-Event-ID') or 0)
+    except ValueError:
+        cursor = 0
+
+    def stream(cursor):
+        last_progress = None
+        while True:
+            # read the version first so a write during this pass wakes the wait below
+            version = job_store.version
+            lines = job_store.log_lines(job_id, after=cursor, limit=EVENTS_BATCH)
+            if lines:
+                cursor = lines[-1][0]
+                yield _sse('log', {'cursor': cursor, 'lines': [l for _, l in lines]}, cursor)
+                if len(lines) == EVENTS_BATCH:
+                    continue
+            job = job_store.get(job_id) or {}
+            snapshot = dict(progress_snapshot(job_id), status=job.get('status'),
+                            queue_position=scheduler.queue_position(job_id))
+            # the ETA moves on every call, so it rides along with real changes instead of being one
+            if snapshot != last_progress:
+                yield _sse('progress', dict(snapshot, eta_seconds=scheduler.eta(job_id)))
+                last_progress = snapshot
+            if job.get('status') in FINISHED_STATUSES and cursor >= (job.get('log_seq') or 0):
+                yield _sse('done', {'status': job.get('status'), 'outputs': job.get('outputs'), 'cursor': cursor})
+                return
+            if job_store.wait_for_change(version, timeout=EVENTS_KEEPALIVE) == version:
+                yield ': keepalive\n\n'
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(stream_with_context(stream(cursor)), mimetype='text/event-stream', headers=headers)
+
+
+@app.route('/cancel/<job_id>', methods=['POST'])
+def cancel(job_id):
+    job = job_store.get(job_id)
+    if not job:
+        return jsonify({'error':'job not found'}), 404
+    result = scheduler.cancel(job_id)
+    if result is None:
+        return jsonify({'error':'job is not queued or running', 'status':job.get('status')}), 409
+    return jsonify({'id':job_id, 'status':result})
+
+
+@app.route('/promote/<job_id>', methods=['POST'])
+def promote(job_id):
+    # queue a full-quality render of a draft job's sheet; `ids` limits it to the approved rows
+    draft = job_store.get(job_id)
+    if not draft:
+        return jsonify({'error':'job not found'}), 404
+    if not draft.get('draft'):
+        return jsonify({'error':'job is not a draft'}), 409
+    ids = (request.form.get('ids') or (request.get_json(silent=True) or {}).get('ids') or '').strip()
+    if ids.lower() == 'all':
+        ids = ''
+    # same syntax as app.py --ids, e.g. 3,7,10-12
+    if not all(c.isalnum() or c in ',-_ ' for c in ids):
+        return jsonify({'error':'invalid ids: '+ids}), 400
+    ids = ids or None
+    new_id = uuid.uuid4().hex
+    job = {k: draft.get(k) for k in ('csv_path', 'music', 'src', 'out', 'workers', 'threads')}
+    job.update({'id': new_id, 'rows': None if ids else draft.get('rows'), 'ids': ids, 'draft': 0,
+                'promoted_from': job_id, 'status': 'queued', 'outputs': []})
+    job_store.create(job)
+    scheduler.submit(new_id)
+    return jsonify({'job_id': new_id, 'promoted_from': job_id, 'ids': ids})
+
+
+@app.route('/metrics')
+def metrics():
+    # Prometheus text format: stage time histograms, row/byte counters, jobs by status
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
 
 
 @app.route('/download')
@@ -337,6 +595,15 @@ def download():
 
 
 if __name__ == '__main__':
-    t = threading.Thread(target=worker_loop, daemon=True)
-    t.start()
-    app.run(port=5001, debug=False)
+    ap = argparse.ArgumentParser(description='Reels generator web server')
+    ap.add_argument('--port', type=int, default=5001)
+    ap.add_argument('--slots', type=int, default=DEFAULT_SLOTS, help='render jobs allowed to run at the same time')
+    ap.add_argument('--cold', action='store_true', help='start a fresh app.py process per job instead of warm workers')
+    ap.add_argument('--worker-max-jobs', type=int, default=20, help='restart a warm worker after this many jobs')
+    ap.add_argument('--worker-max-rss-mb', type=float, default=1500, help='restart a warm worker once its RSS passes this')
+    args = ap.parse_args()
+    scheduler.slots = max(1, args.slots)
+    if not args.cold:
+        start_warm_workers(scheduler.slots, args.worker_max_jobs, args.worker_max_rss_mb)
+    scheduler.start()
+    app.run(port=args.port, debug=False, threaded=True)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# Minimal Server-Sent Events reader for the helper scripts that follow a job on
+# server.py's /events/<job_id> stream instead of polling /status.
+import collections
+import json
+import time
+
+
+def iter_events(resp):
+    # yields (event, data) from a streaming requests response; keepalive comments yield ('keepalive', None)
+    event, data = 'message', []
+    for raw in resp.iter_lines(decode_unicode=True):
+        if raw is None:
+            continue
+        if raw == '':
+            if data:
+                yield event, json.loads('\n'.join(data))
+            event, data = 'message', []
+            continue
+        if raw.startswith(':'):
+            yield 'keepalive', None
+            continue
+        field, _, value = raw.partition(':')
+        if value.startswith(' '):
+            value = value[1:]
+        if field == 'event':
+            event = value
+        elif field == 'data':
+            data.append(value)
+
+
+def follow_job(requests, server, job_id, on_progress=None, on_lines=None, timeout=None, tail=200):
+    # returns {'status', 'outputs', 'log'} once the job finishes, or None on timeout
+    log_tail = collections.deque(maxlen=tail)
+    deadline = time.time() + timeout if timeout else None
+    with requests.get(f"{server}/events/{job_id}", stream=True, timeout=(10, 60)) as resp:
+        resp.raise_for_status()
+        for event, data in iter_events(resp):
+            if event == 'log':
+                log_tail.extend(data.get('lines') or [])
+                if on_lines:
+                    on_lines(data.get('lines') or [])
+            elif event == 'progress' and on_progress:
+                on_progress(data)
+            elif event == 'done':
+                return {'status': data.get('status'), 'outputs': data.get('outputs'), 'log': '\n'.join(log_tail)}
+            if deadline and time.time() > deadline:
+                return None
+    return None
@@ -1,4 +1,3 @@
-import time
 import json
 import os
 
@@ -7,6 +6,8 @@ try:
 except Exception:
     requests = None
 
+from sse_client import follow_job
+
 SERVER = 'http://127.0.0.1:5001'
 
 csv_content = 'Hook,Hashtags,LongTailKeywords,FilePath\nTest hook 1,#tag1,keyword1,\n'
@@ -52,15 +53,11 @@ if requests:
         print('save_and_run failed', e)
         raise
 
-    # poll
-    while True:
-        time.sleep(2)
-        r = requests.get(SERVER + '/status/' + job_id)
-        js = r.json()
-        print('status', js.get('status'))
-        if js.get('status') in ('completed','failed'):
-            print('final outputs', js.get('outputs'))
-            print('log tail:\n', '\n'.join(js.get('log','').splitlines()[-20:]))
-            break
+    # follow progress over server-sent events
+    final = follow_job(requests, SERVER, job_id,
+                       on_progress=lambda p: print('status', p.get('status'), 'row', p.get('row'), 'percent', p.get('percent')))
+    if final:
+        print('final outputs', final.get('outputs'))
+        print('log tail:\n', '\n'.join(final.get('log','').splitlines()[-20:]))
 else:
     print('requests not available in venv; please install requests and re-run')
@@ -1,4 +1,3 @@
-import time
 import json
 import os
 import sys
@@ -9,6 +8,8 @@ except Exception as e:
     print('requests not installed in venv:', e)
     sys.exit(1)
 
+from sse_client import follow_job
+
 SERVER = 'http://127.0.0.1:5001'
 
 # create a small CSV with three rows to test reorder
@@ -70,23 +71,17 @@ except Exception as e:
     print('save_and_run error', e)
     sys.exit(1)
 
-# poll status
-start = time.time()
-while True:
-    time.sleep(2)
-    r = requests.get(SERVER + '/status/' + job_id)
-    if r.status_code != 200:
-        print('status request failed', r.status_code, r.text)
-        break
-    s = r.json()
-    print('status', s.get('status'))
-    if s.get('status') in ('completed', 'failed'):
-        print('outputs:', s.get('outputs'))
-        log = s.get('log','')
-        print('log tail:\n', '\n'.join(log.splitlines()[-30:]))
-        break
-    if time.time() - start > 300:
-        print('timeout waiting for job')
-        break
+# follow status over server-sent events
+try:
+    final = follow_job(requests, SERVER, job_id, timeout=300,
+                       on_progress=lambda p: print('status', p.get('status'), 'row', p.get('row'), 'percent', p.get('percent')))
+except Exception as e:
+    print('event stream failed', e)
+    sys.exit(1)
+if final is None:
+    print('timeout waiting for job')
+else:
+    print('outputs:', final.get('outputs'))
+    print('log tail:\n', '\n'.join(final.get('log','').splitlines()[-30:]))
 
 print('E2E test finished')
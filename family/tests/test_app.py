@@ -0,0 +1,66 @@
+# Row loop of family/app.py (needs moviepy, numpy and PIL to import).
+import pytest
+
+app = pytest.importorskip('app')
+
+
+def fake_render_row(job):
+    # stands in for render_row; module level so pool workers can unpickle it
+    return {'idx': job['idx'], 'output_path': job['output_path'], 'ok': not job.get('fail'), 'thumbnail': None,
+            'error': 'boom' if job.get('fail') else None}
+
+
+def make_jobs(tmp_path, n):
+    # ffmpeg backend, no music: run_jobs has nothing to pre-decode
+    return [{'idx': i, 'output_path': str(tmp_path / f"reel_{i}.mp4"), 'video_path': str(tmp_path / 'src.mp4'),
+             'audio_path': None, 'backend': 'ffmpeg', 'fail': i == 3} for i in range(n)]
+
+
+@pytest.fixture(autouse=True)
+def quiet_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'run_log_path', str(tmp_path / 'run_debug.log'))
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_run_jobs_reports_every_row_once(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(app, 'render_row', fake_render_row)
+    results = []
+    app.run_jobs(make_jobs(tmp_path, 7), workers, results.append)
+    assert sorted(r['idx'] for r in results) == list(range(7))
+    assert [r['idx'] for r in results if not r['ok']] == [3]
+
+
+def test_run_jobs_splits_the_thread_budget(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'render_row', fake_render_row)
+    jobs = make_jobs(tmp_path, 4)
+    app.run_jobs(jobs, 2, lambda res: None, thread_budget=8)
+    assert {job['threads'] for job in jobs} == {4}
+
+
+def test_parse_range():
+    assert app.parse_range('5-20') == (5, 20)
+    assert app.parse_range('5-') == (5, None)
+    assert app.parse_range('-3') == (1, 3)
+    assert app.parse_range('7') == (7, 7)
+    assert app.parse_range('') is None
+    with pytest.raises(ValueError):
+        app.parse_range('five')
+
+
+def test_parse_id_list():
+    assert app.parse_id_list('3, 7,10-12') == {'3', '7', '10', '11', '12'}
+    assert app.parse_id_list('abc,x-y') == {'abc', 'x-y'}
+    assert app.parse_id_list(None) == set()
+
+
+def test_select_rows():
+    rows = [{'ID': 'a'}, {'ID': 'b'}, {}, {'ID': ' d '}]
+    assert app.select_rows(rows) == [0, 1, 2, 3]
+    # row_range is 1-based and inclusive
+    assert app.select_rows(rows, row_range=(2, 3)) == [1, 2]
+    assert app.select_rows(rows, row_range=(3, None)) == [2, 3]
+    # a row without an ID matches its 1-based row number
+    assert app.select_rows(rows, ids={'a', '3', 'd'}) == [0, 2, 3]
+    assert app.select_rows(rows, row_range=(2, 4), ids={'a', 'd'}, limit=5) == [3]
+    assert app.select_rows(rows, limit=2) == [0, 1]
+    assert app.select_rows(rows, limit=0) == []
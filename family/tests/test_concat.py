@@ -0,0 +1,73 @@
+import pytest
+
+import concat
+from concat import build_concat_command, compatible, normalize_target
+
+
+def clip(**extra):
+    # probe() output of a typical 1080x1920 H.264 reel
+    return dict({'codec': 'h264', 'width': 1080, 'height': 1920, 'rotation': 0, 'pix_fmt': 'yuv420p',
+                 'time_base': '1/15360', 'sar': '1:1', 'codec_profile': 'High', 'level': 40, 'refs': 1,
+                 'has_b_frames': 2, 'extradata_size': 42, 'fps': 30.0, 'duration': 10.0}, **extra)
+
+
+def test_matching_clips_are_stream_copied():
+    assert compatible([clip(), clip(duration=7.5)])
+    # fps within 0.01
+    assert compatible([clip(fps=29.97), clip(fps=29.97002997)])
+
+
+@pytest.mark.parametrize('change', [{'width': 720}, {'codec': 'hevc'}, {'pix_fmt': 'yuv420p10le'},
+                                    {'time_base': '1/30000'}, {'codec_profile': 'Main'}, {'level': 41},
+                                    {'refs': 4}, {'has_b_frames': 0}, {'rotation': 90}, {'extradata_size': 44},
+                                    {'fps': 25.0}])
+def test_any_stream_difference_forces_normalizing(change):
+    assert not compatible([clip(), clip(**change)])
+
+
+@pytest.mark.parametrize('key', concat.COPY_KEYS)
+def test_unknown_stream_properties_force_normalizing(key):
+    assert not compatible([clip(**{key: None}), clip(**{key: None})])
+
+
+def test_extradata_size_is_optional():
+    # older ffprobe builds don't report it
+    assert compatible([clip(extradata_size=None), clip(extradata_size=None)])
+
+
+def test_no_clips_or_no_video_is_not_copyable():
+    assert not compatible([])
+    assert not compatible([clip(), clip(width=None)])
+
+
+def test_normalize_target_is_the_largest_canvas():
+    profile = {'name': 'test', 'max_fps': None}
+    target = normalize_target([clip(), clip(width=1920, height=1080, fps=25.0)], profile)
+    assert target == {'width': 1920, 'height': 1920, 'fps': 30.0, 'framing': 'fit'}
+    target = normalize_target([clip(width=1081, height=1921)], profile, framing='fill')
+    assert (target['width'], target['height'], target['framing']) == (1080, 1920, 'fill')
+    with pytest.raises(ValueError):
+        normalize_target([clip()], profile, framing='stretch')
+
+
+def test_concat_command_copies_video_and_trims_the_music():
+    cmd = build_concat_command('inputs.txt', 'out.mp4', music_path='bed.mp3', duration=17.5,
+                               profile={'audio_bitrate': '128k'})
+    assert cmd[cmd.index('-f') + 1] == 'concat'
+    assert cmd[cmd.index('-c:v') + 1] == 'copy'
+    assert ['-map', '0:v', '-map', '1:a'] == cmd[cmd.index('bed.mp3') + 1:cmd.index('bed.mp3') + 5]
+    assert cmd[cmd.index('-t') + 1] == '17.500'
+    assert cmd[-1] == 'out.mp4'
+
+
+def test_concat_command_keeps_clip_audio_without_music():
+    cmd = build_concat_command('inputs.txt', 'out.mp4', profile={'audio_bitrate': None})
+    assert '0:a?' in cmd
+    assert '-t' not in cmd
+
+
+def test_list_file_escapes_quotes(tmp_path):
+    path = concat._list_file(['it\'s.mp4'], str(tmp_path))
+    with open(path, encoding='utf-8') as fh:
+        line = fh.read()
+    assert line.startswith("file '") and line.endswith("it'\\''s.mp4'\n")
@@ -0,0 +1,122 @@
+import json
+
+import pytest
+
+import ffmpeg_backend
+
+
+class FakeRun:
+    # stands in for subprocess.run when ffprobe is called
+    def __init__(self, data):
+        self.stdout = json.dumps(data).encode('utf-8')
+
+
+def probe_with(monkeypatch, tmp_path, data):
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(b'not really a video')
+    ffmpeg_backend._probe.cache_clear()
+    monkeypatch.setattr(ffmpeg_backend.subprocess, 'run', lambda *a, **kw: FakeRun(data))
+    return ffmpeg_backend.probe(str(path))
+
+
+def video_stream(**extra):
+    return dict({'codec_type': 'video', 'codec_name': 'h264', 'width': 1920, 'height': 1080, 'pix_fmt': 'yuv420p',
+                 'avg_frame_rate': '30000/1001', 'time_base': '1/30000', 'profile': 'High', 'level': 40,
+                 'refs': 1, 'has_b_frames': 2}, **extra)
+
+
+def test_probe_reads_video_and_audio_streams(monkeypatch, tmp_path):
+    info = probe_with(monkeypatch, tmp_path, {'streams': [video_stream(duration='12.5'),
+                                                          {'codec_type': 'audio', 'codec_name': 'aac'}]})
+    assert (info['width'], info['height'], info['codec'], info['duration']) == (1920, 1080, 'h264', 12.5)
+    assert info['fps'] == pytest.approx(29.97, abs=0.01)
+    assert info['has_audio'] and info['audio_codec'] == 'aac'
+    assert (info['level'], info['refs'], info['has_b_frames'], info['rotation']) == (40, 1, 2, 0)
+
+
+def test_probe_falls_back_to_the_container_duration(monkeypatch, tmp_path):
+    info = probe_with(monkeypatch, tmp_path, {'streams': [video_stream()], 'format': {'duration': '8.0'}})
+    assert info['duration'] == 8.0
+    assert not info['has_audio']
+
+
+@pytest.mark.parametrize('stream', [
+    video_stream(side_data_list=[{'side_data_type': 'Display Matrix', 'rotation': -90}]),
+    video_stream(tags={'rotate': '90'}),
+    video_stream(side_data_list=[{'side_data_type': 'Display Matrix', 'rotation': 90}]),
+])
+def test_probe_reports_the_displayed_size_of_rotated_clips(monkeypatch, tmp_path, stream):
+    info = probe_with(monkeypatch, tmp_path, {'streams': [stream]})
+    assert (info['width'], info['height']) == (1080, 1920)
+    assert info['rotation'] in (90, 270)
+
+
+def test_upside_down_clips_keep_their_size(monkeypatch, tmp_path):
+    info = probe_with(monkeypatch, tmp_path, {'streams': [video_stream(tags={'rotate': '180'})]})
+    assert (info['width'], info['height'], info['rotation']) == (1920, 1080, 180)
+
+
+def test_reel_command_fills_the_canvas_and_loops_the_music(tmp_path):
+    music = tmp_path / 'bed.mp3'
+    music.write_bytes(b'')
+    cmd = ffmpeg_backend.build_reel_command('in.mp4', 'hook.png', 'out.mp4', 1280, 720, music_path=str(music),
+                                            duration=12.5, fps=30)
+    graph = cmd[cmd.index('-filter_complex') + 1]
+    assert graph == ("[0:v]crop=404:720:438:0,scale=1080:1920:flags=bicubic,setsar=1[base];"
+                     "[base][1:v]overlay=(W-w)/2:(H-h)/2:format=auto[v]")
+    assert cmd[cmd.index('-stream_loop'):cmd.index('-stream_loop') + 4] == ['-stream_loop', '-1', '-i', str(music)]
+    assert cmd[cmd.index('-map', cmd.index('[v]')) + 1] == '2:a'
+    assert cmd[cmd.index('-t') + 1] == '12.500'
+    assert cmd[-1] == 'out.mp4'
+
+
+def test_reel_command_keeps_the_source_audio_without_music():
+    cmd = ffmpeg_backend.build_reel_command('in.mp4', 'hook.png', 'out.mp4', 1080, 1920, music_path=None)
+    assert '-stream_loop' not in cmd
+    assert '0:a?' in cmd
+
+
+def test_fanout_scales_once_per_canvas():
+    outputs = [{'overlay_png': 'a.png', 'output_path': 'a.mp4', 'canvas': (1080, 1920)},
+               {'overlay_png': 'b.png', 'output_path': 'b.mp4', 'canvas': (1080, 1920)},
+               {'overlay_png': 'c.png', 'output_path': 'c_4x5.mp4', 'canvas': (1080, 1350)}]
+    cmd = ffmpeg_backend.build_fanout_command('in.mp4', outputs, 1920, 1080, threads=6)
+    graph = cmd[cmd.index('-filter_complex') + 1].split(';')
+    assert graph[0] == '[0:v]split=2[s0][s1]'
+    assert graph[1].startswith('[s0]crop=') and graph[1].endswith(',split=2[c0][c1]')
+    assert graph[2].startswith('[s1]crop=') and graph[2].endswith('[c2]')
+    assert sum(part.count('overlay=') for part in graph) == 3
+    assert [cmd[i + 1] for i, arg in enumerate(cmd) if arg == '-i'] == ['in.mp4', 'a.png', 'b.png', 'c.png']
+    assert [p for p in cmd if p.endswith('.mp4') and p != 'in.mp4'] == ['a.mp4', 'b.mp4', 'c_4x5.mp4']
+    # the thread budget is split between the three encoders
+    assert [cmd[i + 1] for i, arg in enumerate(cmd) if arg == '-threads'] == ['2', '2', '2']
+
+
+def test_replace_audio_copies_the_video_and_cuts_to_its_length():
+    cmd = ffmpeg_backend.build_replace_audio_command('reel.mp4', 'bed.mp3', 'out.mp4', duration=12.5,
+                                                     profile={'audio_bitrate': '128k'})
+    assert cmd[cmd.index('-c:v') + 1] == 'copy'
+    assert cmd[cmd.index('-stream_loop') + 1] == '-1'
+    assert cmd[cmd.index('-t') + 1] == '12.500'
+    assert '-shortest' not in cmd
+    assert cmd[-1] == 'out.mp4'
+
+
+def test_replace_audio_stops_a_looped_track_with_the_video():
+    # without a known duration the looped input would never end
+    cmd = ffmpeg_backend.build_replace_audio_command('reel.mp4', 'bed.mp3', 'out.mp4', profile={'audio_bitrate': None})
+    assert '-shortest' in cmd
+    assert '-t' not in cmd
+
+
+def test_replace_audio_without_loop_plays_the_track_as_is():
+    cmd = ffmpeg_backend.build_replace_audio_command('reel.mp4', 'bed.mp3', 'out.mp4', loop=False,
+                                                     profile={'audio_bitrate': None})
+    assert '-stream_loop' not in cmd
+    assert '-shortest' not in cmd and '-t' not in cmd
+
+
+def test_replace_audio_needs_a_video_stream(monkeypatch):
+    monkeypatch.setattr(ffmpeg_backend, 'run_ffmpeg', lambda cmd: pytest.fail('ffmpeg should not run'))
+    with pytest.raises(RuntimeError):
+        ffmpeg_backend.replace_audio('song.m4a', 'bed.mp3', 'out.mp4', info={'width': None, 'has_audio': True})
@@ -0,0 +1,74 @@
+import pytest
+
+from geometry import ffmpeg_filter, parse_focus, plan_fill, plan_fit
+
+
+def test_landscape_source_is_cropped_before_scaling():
+    plan = plan_fill(1280, 720, 1080, 1920)
+    assert plan['crop'] == (438, 0, 404, 720)
+    assert plan['size'] == (1080, 1920)
+    assert plan['covers']
+    assert ffmpeg_filter(plan) == 'crop=404:720:438:0,scale=1080:1920:flags=bicubic,setsar=1'
+
+
+@pytest.mark.parametrize('src', [(1080, 1920), (720, 1280), (540, 960)])
+def test_same_aspect_source_is_only_scaled(src):
+    plan = plan_fill(src[0], src[1], 1080, 1920)
+    assert plan['crop'] == (0, 0) + src
+    assert plan['size'] == (1080, 1920)
+    assert plan['covers']
+
+
+@pytest.mark.parametrize('src,canvas', [((1280, 720), (1080, 1920)), ((1920, 1080), (1080, 1350)),
+                                        ((1080, 1080), (1080, 1920)), ((1081, 1921), (1080, 1920)),
+                                        ((640, 1138), (1080, 1080))])
+def test_fill_plan_stays_inside_the_source_and_covers_the_canvas(src, canvas):
+    plan = plan_fill(src[0], src[1], canvas[0], canvas[1])
+    x, y, w, h = plan['crop']
+    assert 0 <= x and 0 <= y and x + w <= src[0] and y + h <= src[1]
+    assert w % 2 == 0 and h % 2 == 0
+    assert plan['size'] == canvas
+    assert plan['covers']
+    assert 'pad=' not in ffmpeg_filter(plan)
+
+
+def test_focus_moves_the_crop_window_up_to_the_source_edges():
+    assert plan_fill(1280, 720, 1080, 1920, focus=(0.0, 0.5))['crop'] == (0, 0, 404, 720)
+    assert plan_fill(1280, 720, 1080, 1920, focus=(1.0, 0.5))['crop'] == (876, 0, 404, 720)
+    assert plan_fill(1280, 720, 1080, 1920, focus=(0.3, 0.5))['crop'] == (182, 0, 404, 720)
+
+
+def test_parse_focus():
+    assert parse_focus('0.3,0.6') == (0.3, 0.6)
+    assert parse_focus('0.25') == (0.25, 0.5)
+    with pytest.raises(ValueError):
+        parse_focus('1.5,0.5')
+
+
+def test_fit_letterboxes_the_whole_source():
+    plan = plan_fit(1280, 720, 1080, 1920)
+    assert plan['crop'] == (0, 0, 1280, 720)
+    assert plan['size'] == (1080, 608)
+    assert plan['position'] == (0, 656)
+    assert not plan['covers']
+    assert ffmpeg_filter(plan) == ('crop=1280:720:0:0,scale=1080:608:flags=bicubic,'
+                                   'pad=1080:1920:(ow-iw)/2:(oh-ih)/2:black,setsar=1')
+
+
+@pytest.mark.parametrize('src,canvas', [((1080, 1920), (1920, 1920)), ((1920, 1080), (1920, 1920)),
+                                        ((1000, 1000), (1080, 1920)), ((1281, 721), (1080, 1920))])
+def test_fit_never_crops_or_overflows(src, canvas):
+    plan = plan_fit(src[0], src[1], canvas[0], canvas[1])
+    w, h = plan['size']
+    assert plan['crop'] == (0, 0) + src
+    assert w <= canvas[0] and h <= canvas[1]
+    assert w % 2 == 0 and h % 2 == 0
+    # one side touches the canvas edges
+    assert w == canvas[0] or h == canvas[1]
+
+
+def test_fit_of_a_same_aspect_source_needs_no_pad():
+    plan = plan_fit(720, 1280, 1080, 1920)
+    assert plan['size'] == (1080, 1920)
+    assert plan['covers']
+    assert 'pad=' not in ffmpeg_filter(plan)
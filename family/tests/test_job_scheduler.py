@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from job_scheduler import JobContext, Scheduler
+from job_store import JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / 'jobs.sqlite3'))
+
+
+def queue(store, *job_ids):
+    for job_id in job_ids:
+        store.create({'id': job_id, 'csv_path': 'rows.csv'})
+
+
+def wait_until(check, timeout=5):
+    deadline = time.time() + timeout
+    while not check():
+        if time.time() > deadline:
+            raise AssertionError('timed out')
+        time.sleep(0.01)
+
+
+def test_queue_position_and_cancel_while_queued(store):
+    queue(store, 'a', 'b', 'c')
+    sched = Scheduler(store, run_job=None, slots=1)
+    for job_id in ('a', 'b', 'c'):
+        sched.submit(job_id)
+    assert [sched.queue_position(j) for j in ('a', 'b', 'c')] == [1, 2, 3]
+    assert sched.cancel('b') == 'cancelled'
+    assert store.get('b')['status'] == 'cancelled'
+    assert sched.queue_position('b') is None
+    assert sched.queue_position('c') == 2
+    # neither queued nor running any more
+    assert sched.cancel('b') is None
+
+
+def test_eta_without_history_is_unknown(store):
+    sched = Scheduler(store, run_job=None, slots=2)
+    sched.submit('a')
+    assert sched.eta('a') is None
+
+
+def test_eta_counts_slot_releases(store):
+    sched = Scheduler(store, run_job=None, slots=1)
+    sched.durations.extend([50.0, 70.0])
+    ctx = JobContext('a', 0, 1)
+    ctx.started = time.time() - 20
+    sched.running['a'] = ctx
+    sched.pending.extend(['b', 'c'])
+    assert sched.eta('a') == pytest.approx(40, abs=1)
+    # 'b' starts when 'a' is done, 'c' one average job later
+    assert sched.eta('b') == pytest.approx(100, abs=1)
+    assert sched.eta('c') == pytest.approx(160, abs=1)
+    assert sched.eta('unknown') is None
+
+
+def test_eta_with_a_free_slot_is_one_average_job(store):
+    sched = Scheduler(store, run_job=None, slots=2)
+    sched.durations.append(30.0)
+    sched.pending.append('a')
+    assert sched.eta('a') == pytest.approx(30)
+
+
+def test_cancel_running_job_leaves_the_eta_history_alone(store):
+    queue(store, 'slow', 'quick')
+    started = threading.Event()
+
+    def run_job(job, ctx):
+        store.update(job['id'], status='running')
+        if job['id'] == 'slow':
+            started.set()
+            ctx.cancelled.wait(5)
+        store.update(job['id'], status='cancelled' if ctx.cancelled.is_set() else 'completed')
+
+    sched = Scheduler(store, run_job, slots=1)
+    # start() picks up jobs that were already queued in the store
+    sched.start()
+    assert started.wait(5)
+    assert sched.queue_position('quick') == 1
+    assert sched.cancel('slow') == 'cancelling'
+    wait_until(lambda: store.get('quick')['status'] == 'completed')
+    wait_until(lambda: not sched.running)
+    assert store.get('slow')['status'] == 'cancelled'
+    # only the job that ran to completion counts towards ETAs
+    assert len(sched.durations) == 1
@@ -0,0 +1,84 @@
+import progress
+
+
+def fold(events, state=None):
+    state = state or progress.new_state()
+    outputs = [progress.apply_event(state, ev) for ev in events]
+    return state, [o for o in outputs if o]
+
+
+def test_apply_event_folds_a_batch():
+    state, outputs = fold([
+        {'event': 'batch_started', 'rows': 3, 'skipped': 1},
+        {'event': 'row_started', 'idx': 0, 'id': 'a', 'output': 'a.mp4'},
+        {'event': 'frames', 'idx': 0, 'done': 50, 'total': 200},
+    ])
+    assert (state['rows_total'], state['skipped'], state['row']) == (3, 1, 1)
+    assert (state['current'], state['percent']) == ('a.mp4', 25)
+    assert state['active']['0']['frames'] == 50
+    assert outputs == []
+
+    state, outputs = fold([
+        {'event': 'output_created', 'idx': 0, 'path': 'a.mp4'},
+        {'event': 'thumbnail_created', 'idx': 0, 'path': 'a.jpg'},
+        {'event': 'row_started', 'idx': 1, 'id': 'b', 'output': 'b.mp4'},
+        {'event': 'row_failed', 'idx': 1, 'output': 'b.mp4', 'error': 'boom'},
+    ], state)
+    assert outputs == ['a.mp4']
+    assert (state['rendered'], state['failed'], state['thumbnails']) == (1, 1, 1)
+    assert state['outputs'] == ['a.mp4']
+    assert state['active'] == {}
+    assert state['failures'] == [{'idx': 1, 'output': 'b.mp4', 'error': 'boom'}]
+
+
+def test_parallel_rows_are_tracked_separately():
+    state, _ = fold([
+        {'event': 'row_started', 'idx': 0, 'output': 'a.mp4'},
+        {'event': 'row_started', 'idx': 1, 'output': 'b.mp4'},
+        {'event': 'frames', 'idx': 0, 'done': 10, 'total': 100},
+        {'event': 'frames', 'idx': 1, 'done': 90, 'total': 100},
+    ])
+    assert set(state['active']) == {'0', '1'}
+    # the headline follows the row that reported last
+    assert (state['current'], state['percent']) == ('b.mp4', 90)
+
+
+def test_batch_finished_has_the_last_word():
+    state, _ = fold([
+        {'event': 'batch_started', 'rows': 2, 'skipped': 0},
+        {'event': 'row_started', 'idx': 0, 'output': 'a.mp4'},
+        {'event': 'batch_finished', 'rendered': 2, 'skipped': 0, 'failed': 0},
+    ])
+    assert (state['rendered'], state['failed'], state['active']) == (2, 0, {})
+
+
+def test_failures_are_capped():
+    n = progress.MAX_FAILURES + 5
+    state, _ = fold([{'event': 'row_failed', 'idx': i, 'output': f"{i}.mp4", 'error': 'x'} for i in range(n)])
+    assert state['failed'] == n
+    assert len(state['failures']) == progress.MAX_FAILURES
+    assert state['failures'][-1]['idx'] == n - 1
+
+
+def test_unknown_events_are_ignored():
+    state, outputs = fold([{'event': 'something_new', 'idx': 0}, {'no_event': True}])
+    assert state == progress.new_state()
+    assert outputs == []
+
+
+def test_emitted_events_reach_the_tail(tmp_path):
+    path = str(tmp_path / 'events.jsonl')
+    tail = progress.EventTail(path)
+    assert tail.read() == []
+    progress.configure(path)
+    try:
+        progress.emit('row_started', idx=0, output='a.mp4')
+        # a line still being written is held back until it is complete
+        with open(path, 'ab') as fh:
+            fh.write(b'{"event": "frames", "idx": 0')
+        assert [ev['event'] for ev in tail.read()] == ['row_started']
+        with open(path, 'ab') as fh:
+            fh.write(b', "done": 1, "total": 2}\n')
+        assert tail.read() == [{'event': 'frames', 'idx': 0, 'done': 1, 'total': 2}]
+    finally:
+        progress.configure(None)
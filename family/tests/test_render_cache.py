@@ -0,0 +1,77 @@
+import render_cache
+from render_cache import MANIFEST_NAME, RenderManifest, render_key
+
+STYLE = {'font_size': 40, 'canvas': [1080, 1920]}
+
+
+def write(path, data=b'x'):
+    with open(path, 'wb') as fh:
+        fh.write(data)
+
+
+def quiet(msg):
+    pass
+
+
+def test_render_key_follows_every_input(tmp_path, monkeypatch):
+    clip = str(tmp_path / 'clip.mp4')
+    music = str(tmp_path / 'bed.mp3')
+    write(clip)
+    write(music)
+    key = render_key('hook', clip, music, STYLE)
+    assert key == render_key('hook', clip, music, STYLE)
+    assert key != render_key('other hook', clip, music, STYLE)
+    assert key != render_key('hook', clip, None, STYLE)
+    assert key != render_key('hook', clip, music, dict(STYLE, font_size=41))
+    assert key != render_key('hook', clip, music, STYLE, extra={'focus': [0.3, 0.5]})
+    monkeypatch.setattr(render_cache, 'RECIPE_VERSION', render_cache.RECIPE_VERSION + 1)
+    assert key != render_key('hook', clip, music, STYLE)
+
+
+def test_render_key_changes_when_the_source_is_replaced(tmp_path):
+    clip = str(tmp_path / 'clip.mp4')
+    write(clip)
+    key = render_key('hook', clip, None, STYLE)
+    write(clip, b'a longer file')
+    assert key != render_key('hook', clip, None, STYLE)
+
+
+def test_is_fresh_needs_key_output_and_done_marker(tmp_path):
+    out = str(tmp_path / 'reel.mp4')
+    manifest = RenderManifest(str(tmp_path), log=quiet)
+    manifest.record(out, 'k1')
+    assert not manifest.is_fresh(out, 'k1')
+    write(out)
+    # an output without its .done marker may be a half-written file
+    assert not manifest.is_fresh(out, 'k1')
+    write(out + '.done', b'')
+    assert manifest.is_fresh(out, 'k1')
+    assert not manifest.is_fresh(out, 'k2')
+    assert not manifest.is_fresh(str(tmp_path / 'other.mp4'), 'k1')
+
+
+def test_manifest_survives_a_reload(tmp_path):
+    out = str(tmp_path / 'reel.mp4')
+    write(out)
+    write(out + '.done', b'')
+    manifest = RenderManifest(str(tmp_path), batch_size=100, log=quiet)
+    manifest.record(out, 'k1')
+    assert not (tmp_path / MANIFEST_NAME).exists()
+    manifest.save()
+    assert RenderManifest(str(tmp_path), log=quiet).is_fresh(out, 'k1')
+
+
+def test_manifest_saves_every_batch_size_records(tmp_path):
+    manifest = RenderManifest(str(tmp_path), batch_size=2, log=quiet)
+    manifest.record(str(tmp_path / 'a.mp4'), 'k')
+    assert not (tmp_path / MANIFEST_NAME).exists()
+    manifest.record(str(tmp_path / 'b.mp4'), 'k')
+    assert (tmp_path / MANIFEST_NAME).exists()
+
+
+def test_unreadable_manifest_starts_empty(tmp_path):
+    (tmp_path / MANIFEST_NAME).write_text('{not json', encoding='utf-8')
+    logged = []
+    manifest = RenderManifest(str(tmp_path), log=logged.append)
+    assert manifest.entries == {}
+    assert logged
@@ -0,0 +1,91 @@
+import os
+import subprocess
+import sys
+import threading
+from multiprocessing.connection import Listener
+
+import render_worker
+
+# stand-in for app.py: prints from the worker process and from a process pool. The pool uses
+# spawn, whose children share no Python state with the worker (only its stdio).
+STUB_APP = '''
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from stub_rows import shout
+
+
+def main(argv):
+    print('job', *argv)
+    print('warning', file=sys.stderr)
+    with ProcessPoolExecutor(4, mp_context=multiprocessing.get_context('spawn')) as pool:
+        list(pool.map(shout, range(4)))
+    return 3 if argv == ['fail'] else 0
+'''
+
+STUB_ROWS = '''
+def shout(i):
+    for n in range(200):
+        print(f"child {i} line {n} " + 'x' * 100)
+    return i
+'''
+
+# serve() imports app after putting family/ on sys.path; the stub is already imported by then
+RUNNER = '''
+import sys
+
+if __name__ == '__main__':
+    sys.path[0:0] = [sys.argv[1], sys.argv[2]]
+    import app
+    import render_worker
+    host, port = sys.argv[3].rsplit(':', 1)
+    render_worker.serve((host, int(port)), bytes.fromhex(sys.argv[4]), max_jobs=2)
+'''
+
+
+def run(conn, argv):
+    # one job: (log lines, final message)
+    conn.send(('job', argv))
+    lines = []
+    while True:
+        assert conn.poll(60), 'worker went quiet'
+        msg = conn.recv()
+        if msg[0] != 'log':
+            return lines, msg
+        lines.append(msg[1])
+
+
+def test_worker_forwards_pool_output_and_retires(tmp_path):
+    (tmp_path / 'app.py').write_text(STUB_APP, encoding='utf-8')
+    (tmp_path / 'stub_rows.py').write_text(STUB_ROWS, encoding='utf-8')
+    (tmp_path / 'runner.py').write_text(RUNNER, encoding='utf-8')
+    authkey = os.urandom(16)
+    listener = Listener(('127.0.0.1', 0), authkey=authkey)
+    host, port = listener.address
+    proc = subprocess.Popen([sys.executable, str(tmp_path / 'runner.py'), str(tmp_path), render_worker.BASE_DIR,
+                             f"{host}:{port}", authkey.hex()])
+    try:
+        accepted = {}
+        t = threading.Thread(target=lambda: accepted.update(conn=listener.accept()), daemon=True)
+        t.start()
+        t.join(60)
+        conn = accepted['conn']
+        assert conn.recv()[0] == 'ready'
+
+        lines, msg = run(conn, ['one'])
+        assert msg == ('exit', 0, False)
+        assert 'job one' in lines and 'warning' in lines
+        # every line from every pool process arrives whole
+        children = sorted(line for line in lines if line.startswith('child'))
+        assert children == sorted(f"child {i} line {n} " + 'x' * 100 for i in range(4) for n in range(200))
+
+        lines, msg = run(conn, ['fail'])
+        # exit code passed through; max_jobs=2 reached, so the worker retires
+        assert msg == ('exit', 3, True)
+        assert 'job fail' in lines
+        assert proc.wait(30) == 0
+    finally:
+        listener.close()
+        if proc.poll() is None:
+            proc.kill()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# Hook overlay rendering shared by app.py, quick_preview.py and the root app.py.
+#
+# Fonts are resolved once per (size, bold) and kept in an LRU cache, including
+# which entry of the Arial fallback chain actually loaded. Word wrapping
+# measures every distinct word once and lays lines out from cumulative widths
+# instead of re-measuring the growing line for each added word.
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+FONT_CANDIDATES = {
+    False: ("arial.ttf", r"C:\Windows\Fonts\arial.ttf"),
+    True: ("arialbd.ttf", r"C:\Windows\Fonts\arialbd.ttf"),
+}
+
+# scratch surface for measuring text
+_measure = ImageDraw.Draw(Image.new("RGBA", (10, 10)))
+
+
+@lru_cache(maxsize=2)
+def _font_path(bold):
+    # first candidate that loads; None means fall back to PIL's built-in font
+    for candidate in FONT_CANDIDATES[bool(bold)]:
+        try:
+            ImageFont.truetype(candidate, 10)
+            return candidate
+        except Exception:
+            continue
+    return None
+
+
+@lru_cache(maxsize=64)
+def get_font_variant(size, bold=False):
+    path = _font_path(bool(bold))
+    if path is not None:
+        try:
+            return ImageFont.truetype(path, size)
+        except Exception:
+            pass
+    return ImageFont.load_default()
+
+
+@lru_cache(maxsize=8192)
+def text_width(font, text):
+    try:
+        return _measure.textlength(text, font=font)
+    except Exception:
+        try:
+            return _measure.textbbox((0, 0), text, font=font)[2]
+        except Exception:
+            return len(text) * 6
+
+
+def wrap_words(words, font, max_width):
+    # greedy wrap using one measurement per word plus the width of a space
+    space_w = text_width(font, " ")
+    lines_words = []
+    cur = []
+    cur_w = 0.0
+    for w in words:
+        w_w = text_width(font, w)
+        test_w = cur_w + space_w + w_w if cur else w_w
+        if test_w <= max_width:
+            cur.append(w)
+            cur_w = test_w
+        else:
+            if cur:
+                lines_words.append(cur)
+            cur = [w]
+            cur_w = w_w
+    if cur:
+        lines_words.append(cur)
+    return lines_words
+
+
+def _bbox(d, text, font):
+    try:
+        return d.textbbox((0, 0), text, font=font)
+    except Exception:
+        return (0, 0, len(text) * 6, 12)
+
+
+def make_rounded_text_image(text, max_width, font_size=16, padding=(12, 8), radius=3, bg_color=(255, 255, 255, 128), text_color=(0, 0, 0, 255), prefix_words=2, prefix_color=(102, 0, 153, 255)):
+    words = text.split()
+    normal_font = get_font_variant(font_size, bold=False)
+    prefix_font = get_font_variant(font_size, bold=True)
+    lines_words = wrap_words(words, normal_font, max_width - 2 * padding[0])
+
+    line_heights = []
+    line_widths = []
+    text_w = 0
+    for lw in lines_words:
+        bbox = _bbox(_measure, " ".join(lw), normal_font)
+        line_heights.append(bbox[3] - bbox[1])
+        line_widths.append(bbox[2] - bbox[0])
+        text_w = max(text_w, bbox[2] - bbox[0])
+    text_h = sum(line_heights) + (len(lines_words) - 1) * 4
+
+    img_w = text_w + 2 * padding[0]
+    img_h = text_h + 2 * padding[1]
+    img = Image.new("RGBA", (img_w, img_h), (0, 0, 0, 0))
+    d = ImageDraw.Draw(img)
+
+    rect = [0, 0, img_w, img_h]
+    try:
+        d.rounded_rectangle(rect, radius=radius, fill=bg_color)
+    except Exception:
+        d.rectangle(rect, fill=bg_color)
+
+    remaining_prefix = prefix_words
+    y = padding[1]
+    space_w = _bbox(d, " ", normal_font)[2]
+    for i, lw in enumerate(lines_words):
+        line_text = " ".join(lw)
+        x = (img_w - line_widths[i]) // 2
+
+        if remaining_prefix > 0:
+            num_prefix = min(remaining_prefix, len(lw))
+            prefix_text = " ".join(lw[:num_prefix])
+            rest_text = " ".join(lw[num_prefix:]) if num_prefix < len(lw) else ""
+            d.text((x, y), prefix_text, font=prefix_font, fill=prefix_color)
+            prefix_bbox = _bbox(d, prefix_text, prefix_font)
+            prefix_w = prefix_bbox[2] - prefix_bbox[0]
+            if rest_text:
+                d.text((x + prefix_w + space_w, y), rest_text, font=normal_font, fill=text_color)
+            remaining_prefix -= num_prefix
+        else:
+            d.text((x, y), line_text, font=normal_font, fill=text_color)
+
+        y += line_heights[i] + 4
+
+    return img
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# Thumbnail stage for the family reels.
+#
+# A thumbnail is one source frame with the row's first long-tail keyword drawn
+# as a rotated, outlined text layer. Frames are grabbed with ffmpeg's input
+# seek (-ss before -i: jump to the keyframe before t, decode only up to t);
+# the rotated text layer is cached per (text, frame width), so repeated
+# keywords and same-size sources skip font fitting entirely.
+#
+# app.py calls make_thumbnail() after each encode. This script regenerates
+# thumbnails for a whole sheet, in parallel, without touching the encodes:
+#
+#   python thumbnails.py --csv hooks.csv --src reels --out output_reel --workers 4 --at 1.5
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+from PIL import Image, ImageDraw
+
+import ffmpeg_backend
+from text_overlay import get_font_variant
+
+
+def thumbnail_text(row):
+    # first longtail keyword (or hook fallback), uppercased
+    ltk = (row.get('LongTailKeywords') or '').split(',')
+    text = ltk[0].strip() if ltk and ltk[0].strip() else (row.get('Hook') or '')
+    return (text or '').upper()
+
+
+@lru_cache(maxsize=256)
+def text_layer(text, frame_width):
+    # rotated RGBA keyword layer sized for a frame `frame_width` wide; None for empty text
+    # target: text wraps to 3 words per line and occupies up to 75% width
+    max_text_width = int(frame_width * 0.75)
+    # start with a very large font and scale down as needed
+    target_font_size = max(32, int(frame_width * 0.95))
+
+    words = [w for w in text.split() if w]
+    if not words:
+        return None
+    lines = [' '.join(words[i:i+3]) for i in range(0, len(words), 3)]
+
+    # pick starting font and measure each line
+    font_size = target_font_size
+    font = get_font_variant(font_size, bold=True)
+    measure = Image.new('RGBA', (10, 10), (0, 0, 0, 0))
+    md = ImageDraw.Draw(measure)
+
+    line_widths = []
+    line_heights = []
+    for ln in lines:
+        bb = md.textbbox((0,0), ln, font=font)
+        line_widths.append(bb[2] - bb[0])
+        line_heights.append(bb[3] - bb[1])
+
+    max_line_w = max(line_widths)
+    # if the widest line exceeds allowed width, scale font down
+    if max_line_w > 0 and max_line_w > max_text_width:
+        scale = max_text_width / float(max_line_w)
+        font_size = max(10, int(font_size * scale))
+        font = get_font_variant(font_size, bold=True)
+        line_widths = []
+        line_heights = []
+        for ln in lines:
+            bb = md.textbbox((0,0), ln, font=font)
+            line_widths.append(bb[2]-bb[0])
+            line_heights.append(bb[3]-bb[1])
+        max_line_w = max(line_widths)
+
+    # line-height increase by 30%
+    base_line_h = int(sum(line_heights) / float(len(line_heights))) if line_heights else font_size
+    line_height = int(round(base_line_h * 1.3))
+
+    pad_x, pad_y = 12, 8
+    rect_w = max_line_w + pad_x * 2
+    rect_h = line_height * len(lines) + pad_y * 2
+
+    # stroke width proportional to font size
+    stroke_w = max(2, int(round(font_size * 0.12)))
+
+    # create text layer and draw each wrapped line centered in the layer
+    layer = Image.new('RGBA', (rect_w, rect_h), (0,0,0,0))
+    td = ImageDraw.Draw(layer)
+    try:
+        for i, ln in enumerate(lines):
+            x = (rect_w - line_widths[i]) // 2
+            y = pad_y + i * line_height
+            td.text((x, y), ln, font=font, fill=(48,0,96,255), stroke_width=stroke_w, stroke_fill=(200,200,200,255))
+    except TypeError:
+        # fallback outline emulation per-line
+        sw = int(stroke_w)
+        for i, ln in enumerate(lines):
+            x = (rect_w - line_widths[i]) // 2
+            y = pad_y + i * line_height
+            ox = [(-sw,0),(sw,0),(0,-sw),(0,sw),(-sw,-sw),(sw,sw),(-sw,sw),(sw,-sw)]
+            for dx,dy in ox:
+                td.text((x+dx, y+dy), ln, font=font, fill=(200,200,200,255))
+            td.text((x, y), ln, font=font, fill=(48,0,96,255))
+
+    # rotate the text layer 30 degrees
+    return layer.rotate(30, expand=True, resample=Image.BICUBIC)
+
+
+def thumbnail_path(output_path, thumbs_dir):
+    return os.path.join(thumbs_dir, os.path.splitext(os.path.basename(output_path))[0] + '.jpg')
+
+
+def make_thumbnail(src_frame, row, output_path, thumbs_dir):
+    # src_frame: HxWx3 uint8 array; returns the written .jpg path, or None when the row has no text
+    os.makedirs(thumbs_dir, exist_ok=True)
+    thumb_img = Image.fromarray(src_frame.astype('uint8'))
+    if thumb_img.mode != 'RGBA':
+        thumb_img = thumb_img.convert('RGBA')
+    rotated = text_layer(thumbnail_text(row), thumb_img.width)
+    if rotated is None:
+        return None
+    tx = (thumb_img.width - rotated.width) // 2
+    ty = (thumb_img.height - rotated.height) // 2
+    thumb_img.paste(rotated, (tx, ty), rotated)
+
+    out_path = thumbnail_path(output_path, thumbs_dir)
+    thumb_img.convert('RGB').save(out_path, quality=90)
+    return out_path
+
+
+def grab_frame(video_path, t=0.0, info=None):
+    # fast input seek with ffmpeg; MoviePy only when ffmpeg can't be run
+    try:
+        return ffmpeg_backend.extract_frame(video_path, t, info)
+    except FileNotFoundError:
+        try:
+            from moviepy.editor import VideoFileClip
+        except Exception:
+            from moviepy import VideoFileClip
+        clip = VideoFileClip(video_path)
+        try:
+            return clip.get_frame(min(t, max(0.0, (clip.duration or 0) - 0.05)))
+        finally:
+            clip.close()
+
+
+def thumbnail_job(job, t=0.0):
+    # worker entry point: returns (idx, thumbnail path or None, error or None)
+    try:
+        info = job.get('media')
+        if info and info.get('duration'):
+            t = min(t, max(0.0, info['duration'] - 0.05))
+        frame = grab_frame(job['video_path'], t, info)
+        return job['idx'], make_thumbnail(frame, job['row'], job['output_path'], job['thumbs_dir']), None
+    except Exception as e:
+        return job['idx'], None, str(e)
+
+
+def run_thumbnails(jobs, workers=1, t=0.0, on_result=None):
+    results = []
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            res = thumbnail_job(job, t)
+            results.append(res)
+            if on_result:
+                on_result(job, res)
+        return results
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(thumbnail_job, job, t): job for job in jobs}
+        for fut in as_completed(futures):
+            job = futures[fut]
+            try:
+                res = fut.result()
+            except Exception as e:
+                res = (job['idx'], None, f"worker failed: {e}")
+            results.append(res)
+            if on_result:
+                on_result(job, res)
+    return results
+
+
+def main(argv=None):
+    import app  # plan rows exactly like the render does
+
+    ap = argparse.ArgumentParser(description='Regenerate reel thumbnails for a sheet without re-encoding')
+    ap.add_argument('--csv', default=app.csv_file_path, help='hooks CSV')
+    ap.add_argument('--src', default=app.video_src_dir, help='directory of source reels')
+    ap.add_argument('--out', default=app.target_dir, help='output directory (thumbnails go to <out>/thumbnails)')
+    ap.add_argument('--rows', type=int, default=None, help='at most this many of the selected rows')
+    ap.add_argument('--range', dest='row_range', type=app.parse_range, default=None, help='1-based inclusive row range')
+    ap.add_argument('--ids', type=app.parse_id_list, default=None, help='only rows with these IDs, e.g. 3,7,10-12')
+    ap.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='parallel thumbnail processes')
+    ap.add_argument('--at', type=float, default=0.0, help='source time in seconds to grab the frame from')
+    ap.add_argument('--all', action='store_true', help='also rows whose reel has not been rendered yet')
+    args = ap.parse_args(argv)
+
+    rows, _ = app.load_rows(args.csv)
+    sources = app.list_source_videos(args.src)
+    selected = set(app.select_rows(rows, args.rows, args.row_range, args.ids))
+    jobs = [j for j in app.plan_jobs(rows, sources, args.src, args.out, None)
+            if j['idx'] in selected and (args.all or os.path.isfile(j['output_path']))]
+    print(f"Generating {len(jobs)} thumbnails with {args.workers} workers (frame at {args.at:g}s)")
+
+    failed = []
+
+    def on_result(job, res):
+        if res[2]:
+            failed.append(job)
+            print(f"Warning: could not create thumbnail for {job['output_path']}: {res[2]}")
+        elif res[1]:
+            print(f"Thumbnail created: {res[1]}")
+
+    t0 = time.perf_counter()
+    run_thumbnails(jobs, args.workers, args.at, on_result)
+    took = time.perf_counter() - t0
+    print(f"{len(jobs) - len(failed)} thumbnails in {took:.2f}s ({len(failed)} failed)")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
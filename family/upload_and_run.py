@@ -1,4 +1,5 @@
-import requests, time, json, os
+import requests, json, os
+from sse_client import follow_job
 BASE='http://127.0.0.1:5001'
 csv_path=os.path.join(os.path.dirname(__file__),'..','..','test_upload_ui.csv')
 csv_path=os.path.abspath(csv_path)
@@ -38,20 +39,11 @@ job_id=j.get('job_id')
 if not job_id:
     raise SystemExit('failed to queue job: '+r.text)
 print('queued', job_id)
-# poll
-deadline=time.time()+300
-while time.time()<deadline:
-    r=requests.get(BASE+f'/status/{job_id}')
-    if r.status_code!=200:
-        print('status err', r.status_code, r.text)
-        break
-    s=r.json()
-    print('status', s.get('status'))
-    if s.get('status') in ('completed','failed'):
-        print('final outputs:', s.get('outputs'))
-        print('log tail:\n', s.get('log','')[-1000:])
-        break
-    time.sleep(3)
+# follow the job over server-sent events
+final=follow_job(requests, BASE, job_id, timeout=300, on_progress=lambda p: print('status', p.get('status'), 'row', p.get('row'), 'percent', p.get('percent')))
+if final:
+    print('final outputs:', final.get('outputs'))
+    print('log tail:\n', final.get('log','')[-1000:])
 else:
     print('timeout waiting for job')
 
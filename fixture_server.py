@@ -0,0 +1,198 @@
+# Local stand-in for mixkit.co, for benchmarking scrape.py offline.
+#
+# Serves listing pages (/free-stock-video/<category>/?page=N) with the same
+# anchor markup scrape.py parses, a video page per link, and the videos
+# themselves (/videos/<id>-720.mp4) with HTTP Range support for
+# download-vid-woman.py. Videos are files from --video-dir when given,
+# otherwise deterministic filler bytes of --video-kb. Pages carry an ETag and
+# Last-Modified and answer conditional requests with 304. --latency adds a
+# per-request delay, --fail-rate returns random 503s to exercise retries and
+# --truncate-rate cuts video transfers short to exercise resume.
+#
+#   python fixture_server.py --port 8765 --pages 29 --per-page 15 --latency 100
+#   python fixture_server.py --video-dir family/reels --truncate-rate 0.3
+import argparse
+import email.utils
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+STARTED = email.utils.formatdate(time.time(), usegmt=True)
+RANGE_RE = re.compile(r'bytes=(\d*)-(\d*)$')
+
+
+def video_slug(category, n):
+    return f"{category}-fixture-clip-number-{n}-{10000 + n}"
+
+
+def listing_html(category, page, per_page):
+    items = []
+    for i in range(per_page):
+        n = (page - 1) * per_page + i + 1
+        items.append(
+            '<div class="item-grid-card">'
+            f'<a class="item-grid-video-player__overlay-link" href="/free-stock-video/{video_slug(category, n)}/"></a>'
+            f'<h2 class="item-grid-card__title">Fixture clip {n}</h2></div>')
+    return ('<!doctype html><html><head><title>Free stock video</title></head><body>'
+            '<div class="item-grid">' + ''.join(items) + '</div></body></html>')
+
+
+def video_html(slug, host):
+    clip_id = slug.rsplit('-', 1)[-1]
+    return ('<!doctype html><html><body>'
+            f'<video class="video-player__viewer" src="http://{host}/videos/{clip_id}-720.mp4"></video>'
+            '</body></html>')
+
+
+def video_bytes(srv, name):
+    # the n-th file of --video-dir (by the clip id), or seeded filler bytes
+    with srv.lock:
+        data = srv.videos.get(name)
+        if data is None:
+            clip_id = int(re.sub(r'\D', '', name.split('-', 1)[0]) or 0)
+            if srv.video_files:
+                with open(srv.video_files[clip_id % len(srv.video_files)], 'rb') as fh:
+                    data = fh.read()
+            else:
+                data = random.Random(clip_id).randbytes(srv.video_kb * 1024)
+            srv.videos[name] = data
+        return data
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'MixkitFixture/1.0'
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def send_body(self, status, body, content_type='text/html; charset=utf-8', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def send_page(self, html):
+        body = html.encode('utf-8')
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if self.headers.get('If-None-Match') == etag or (
+                'If-None-Match' not in self.headers and self.headers.get('If-Modified-Since') == STARTED):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_body(200, body, headers={'ETag': etag, 'Last-Modified': STARTED})
+
+    def send_video(self, name):
+        data = video_bytes(self.server, name)
+        total = len(data)
+        start, end = 0, total - 1
+        status = 200
+        m = RANGE_RE.match(self.headers.get('Range') or '')
+        if m and (m.group(1) or m.group(2)):
+            if m.group(1):
+                start = int(m.group(1))
+                end = min(int(m.group(2)), total - 1) if m.group(2) else total - 1
+            else:
+                start = max(0, total - int(m.group(2)))
+            if start >= total or start > end:
+                self.send_body(416, b'', 'text/plain', {'Content-Range': f"bytes */{total}"})
+                return
+            status = 206
+        body = data[start:end + 1]
+        headers = {'Accept-Ranges': 'bytes', 'ETag': '"' + hashlib.sha1(data).hexdigest()[:16] + '"'}
+        if status == 206:
+            headers['Content-Range'] = f"bytes {start}-{end}/{total}"
+        self.send_response(status)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command == 'HEAD':
+            return
+        if self.server.truncate_rate and len(body) > 1 and random.random() < self.server.truncate_rate:
+            # send part of the body and drop the connection
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def do_GET(self):
+        srv = self.server
+        if srv.latency:
+            time.sleep(srv.latency)
+        if srv.fail_rate and random.random() < srv.fail_rate:
+            self.send_body(503, b'try again', 'text/plain', {'Retry-After': '0'})
+            return
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        if len(parts) == 2 and parts[0] == 'videos' and parts[1].endswith('.mp4'):
+            self.send_video(parts[1])
+            return
+        if len(parts) == 2 and parts[0] == 'free-stock-video':
+            page = int((parse_qs(url.query).get('page') or ['1'])[0] or 1)
+            if parts[1].rsplit('-', 1)[-1].isdigit():
+                self.send_page(video_html(parts[1], self.headers.get('Host') or f"127.0.0.1:{srv.server_port}"))
+            elif 1 <= page <= srv.pages:
+                self.send_page(listing_html(parts[1], page, srv.per_page))
+            else:
+                self.send_body(404, b'not found', 'text/plain')
+            return
+        self.send_body(404, b'not found', 'text/plain')
+
+    do_HEAD = do_GET
+
+
+def make_server(port=8765, pages=29, per_page=15, latency_ms=0, fail_rate=0.0, verbose=False, video_dir=None, video_kb=512,
+                truncate_rate=0.0):
+    srv = ThreadingHTTPServer(('127.0.0.1', port), FixtureHandler)
+    srv.daemon_threads = True
+    srv.pages = pages
+    srv.per_page = per_page
+    srv.latency = latency_ms / 1000.0
+    srv.fail_rate = fail_rate
+    srv.verbose = verbose
+    srv.video_kb = video_kb
+    srv.truncate_rate = truncate_rate
+    srv.video_files = sorted(os.path.join(video_dir, f) for f in os.listdir(video_dir)
+                             if f.lower().endswith('.mp4')) if video_dir else []
+    srv.videos = {}
+    srv.lock = threading.Lock()
+    return srv
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Serve Mixkit-like pages for offline scraper benchmarks')
+    ap.add_argument('--port', type=int, default=8765)
+    ap.add_argument('--pages', type=int, default=29, help='listing pages per category')
+    ap.add_argument('--per-page', type=int, default=15, help='video links per listing page')
+    ap.add_argument('--latency', type=float, default=0, help='added delay per request in ms')
+    ap.add_argument('--fail-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    ap.add_argument('--video-dir', default=None, help='serve these .mp4 files as the videos (default: filler bytes)')
+    ap.add_argument('--video-kb', type=int, default=512, help='size of each filler video')
+    ap.add_argument('--truncate-rate', type=float, default=0.0, help='fraction of video transfers cut off halfway')
+    ap.add_argument('--verbose', action='store_true', help='log every request')
+    args = ap.parse_args()
+    srv = make_server(args.port, args.pages, args.per_page, args.latency, args.fail_rate, args.verbose,
+                      args.video_dir, args.video_kb, args.truncate_rate)
+    print(f"Fixture server on http://127.0.0.1:{srv.server_port}/free-stock-video/girl/?page=1")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -3,45 +3,88 @@
 # This script automatically generates 20 new videos by randomly selecting and combining two videos 
 # from a specified directory for each output. After combining, it overlays a specified audio track (samsmith.mp3), 
 # trimming the audio to match the duration of the combined video. The resulting videos are saved in a new combined subdirectory. 
-# The script uses the MoviePy library for video and audio processing, ensuring efficient batch creation of multimedia content 
-# for your project.
+# Clips are joined with ffmpeg's concat demuxer (family/concat.py): the video stream is copied when the two clips match
+# and only the music is encoded; mismatched clips are normalized once first, and MoviePy remains as a fallback.
+# Run from the repo root: python -m mindfulness.app
 
 
 
 import os
 import random
-from moviepy.editor import VideoFileClip, AudioFileClip, concatenate_videoclips
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from moviepy.editor import VideoFileClip, concatenate_videoclips
+
+import family  # noqa: F401  (puts the shared helpers on sys.path)
+from audio_bed import AudioBed
+from concat import combine
+from encoder_profiles import get_profile, moviepy_kwargs, output_fps
+from media_index import get_index, usable
 
 # Paths
 audio_path = r"C:\Users\manar\OneDrive\Documents\FitnessFanatiks\Audio\samsmith.mp3"
 videos_dir = r"D:\FitnessFanatiks\Etsy - TheMindsetBoutique\TheMindsetBoutique\videos"
 output_dir = os.path.join(videos_dir, "combined")
 os.makedirs(output_dir, exist_ok=True)
+# encoder settings shared with the other pipelines (REELS_PROFILE overrides the default)
+profile = get_profile()
+# each output is one ffmpeg process that mostly copies packets, so a few can run side by side
+workers = 4
+
+# Usable video files, validated against the media index without opening any clip
+video_files = [r['name'] for r in usable(get_index().refresh(videos_dir))]
 
-# Get all video files
-video_files = [f for f in os.listdir(videos_dir) if f.lower().endswith(('.mp4', '.mov', '.avi', '.mkv'))]
+# Decoded lazily: only the MoviePy fallback needs the PCM
+audio_bed = None
 
-# Load audio once
-audio_clip = AudioFileClip(audio_path)
 
-for i in range(1, 21):
-    # Pick two random videos
-    selected_files = random.sample(video_files, 2)
+def combine_moviepy(selected_files, output_path):
+    # old path: decode, compose and re-encode everything
+    global audio_bed
+    if audio_bed is None:
+        audio_bed = AudioBed.decode(audio_path)
     clips = [VideoFileClip(os.path.join(videos_dir, f)) for f in selected_files]
     # Combine videos
     combined_clip = concatenate_videoclips(clips, method="compose")
     # Trim audio to combined video duration
-    audio_for_video = audio_clip.subclip(0, min(audio_clip.duration, combined_clip.duration))
+    audio_for_video = audio_bed.clip_for(min(audio_bed.duration, combined_clip.duration))
     # Set audio
     final_clip = combined_clip.set_audio(audio_for_video)
-    # Output path
-    output_path = os.path.join(output_dir, f"combined_{i:02d}.mp4")
-    final_clip.write_videofile(output_path, codec="libx264", audio_codec="aac")
+    final_clip.write_videofile(output_path, fps=output_fps(profile, combined_clip.fps), **moviepy_kwargs(profile))
     # Cleanup
     for clip in clips:
         clip.close()
     combined_clip.close()
     final_clip.close()
 
-audio_clip.close()
-print("20 combined videos created in:", output_dir)
\ No newline at end of file
+
+def output_path_for(i):
+    return os.path.join(output_dir, f"combined_{i:02d}.mp4")
+
+
+def concat_one(i, selected_files):
+    t0 = time.time()
+    # concat demuxer: video packets copied when the clips match, music trimmed and muxed in the same run
+    mode = combine([os.path.join(videos_dir, f) for f in selected_files], output_path_for(i), audio_path, profile)
+    return mode, time.time() - t0
+
+
+# Pick two random videos per output up front
+picks = [(i, random.sample(video_files, 2)) for i in range(1, 21)]
+fallback = []
+with ThreadPoolExecutor(max_workers=workers) as pool:
+    futures = {pool.submit(concat_one, i, files): (i, files) for i, files in picks}
+    for fut in as_completed(futures):
+        i, files = futures[fut]
+        try:
+            mode, secs = fut.result()
+            print(f"combined_{i:02d}.mp4: {' + '.join(files)} ({mode}, {secs:.1f}s)")
+        except Exception as e:
+            print(f"ffmpeg concat failed for combined_{i:02d}.mp4 ({e}); re-encoding with MoviePy")
+            fallback.append((i, files))
+
+# MoviePy fallback runs serially in this process
+for i, files in fallback:
+    combine_moviepy(files, output_path_for(i))
+
+print("20 combined videos created in:", output_dir)
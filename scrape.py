@@ -1,34 +1,268 @@
 
-# Scrape Mixkit video links from page 29 to 100 for the 'woman' category
+# Scrape Mixkit video links for the 'girl' category into video_links.txt
+#
+# Listing pages are fetched concurrently over one pooled requests.Session,
+# with a shared rate limit, retry/backoff on errors, and an on-disk HTML cache
+# revalidated with ETag / Last-Modified (unchanged pages come back as 304s).
+# --incremental walks from page 1 and stops at the first page with no new
+# links, then merges the new links into the existing video_links.txt.
+#
+#   python scrape.py                          # pages 1-29, full rewrite
+#   python scrape.py --incremental            # only what's new since last run
+#   python fixture_server.py &                # offline benchmark target
+#   python scrape.py --base-url "http://127.0.0.1:8765/free-stock-video/girl/?page={}" --out /tmp/links.txt
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 
 base_url = "https://mixkit.co/free-stock-video/girl/?page={}"
-endpoint = []  # Store links as they are acquired
+links_file = "video_links.txt"
+cache_dir = os.path.join(".cache", "mixkit")
+USER_AGENT = "AutoReels-scraper/1.0"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RateLimiter:
+    # spaces request starts at least 1/rate seconds apart across all threads
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_at = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            at = max(now, self.next_at)
+            self.next_at = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+class HtmlCache:
+    # <key>.html holds the body, <key>.json the validators (etag / last_modified)
+    def __init__(self, root):
+        self.root = root
+        if root:
+            os.makedirs(root, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, key + '.html'), os.path.join(self.root, key + '.json')
+
+    def get(self, url):
+        if not self.root:
+            return None, {}
+        html_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as fh:
+                meta = json.load(fh)
+            with open(html_path, 'r', encoding='utf-8') as fh:
+                return fh.read(), meta
+        except (OSError, ValueError):
+            return None, {}
+
+    def put(self, url, text, headers):
+        if not self.root:
+            return
+        meta = {'url': url, 'etag': headers.get('ETag'), 'last_modified': headers.get('Last-Modified'), 'fetched': time.time()}
+        if not meta['etag'] and not meta['last_modified']:
+            return
+        html_path, meta_path = self._paths(url)
+        for path, data in ((html_path, text), (meta_path, json.dumps(meta))):
+            tmp = path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+
+
+def make_session(pool_size):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+
+class Crawler:
+    def __init__(self, session, limiter, cache, retries=4, backoff=0.5, timeout=15):
+        self.session = session
+        self.limiter = limiter
+        self.cache = cache
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'not_modified': 0, 'retries': 0, 'failed': 0, 'bytes': 0}
+
+    def _count(self, key, n=1):
+        with self.lock:
+            self.stats[key] += n
+
+    def fetch(self, url):
+        # returns the page HTML (from the cache on 304), or None when the page doesn't exist
+        cached, meta = self.cache.get(url)
+        headers = {}
+        if cached is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        for attempt in range(self.retries + 1):
+            self.limiter.wait()
+            self._count('requests')
+            try:
+                resp = self.session.get(url, headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                resp = None
+                error = str(e)
+            if resp is not None:
+                if resp.status_code == 304 and cached is not None:
+                    self._count('not_modified')
+                    return cached
+                if resp.status_code == 200:
+                    self._count('bytes', len(resp.content))
+                    self.cache.put(url, resp.text, resp.headers)
+                    return resp.text
+                if resp.status_code == 404:
+                    return None
+                if resp.status_code not in RETRY_STATUSES:
+                    raise RuntimeError(f"HTTP {resp.status_code} for {url}")
+                error = f"HTTP {resp.status_code}"
+            if attempt == self.retries:
+                break
+            self._count('retries')
+            delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+            retry_after = resp.headers.get('Retry-After') if resp is not None else None
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            print(f"  retrying {url} in {delay:.1f}s ({error})")
+            time.sleep(delay)
+        self._count('failed')
+        raise RuntimeError(f"giving up on {url}: {error}")
+
 
-for page in range(1, 30):
-    url = base_url.format(page)
-    print(f"Scraping {url} ...")
+def parse_links(html, origin):
+    soup = BeautifulSoup(html, "html.parser")
+    links = []
+    for a in soup.find_all("a", class_="item-grid-video-player__overlay-link"):
+        link = a.get("href")
+        if link and link.startswith("/free-stock-video/"):
+            links.append(origin + link)
+    return links
+
+
+def crawl_page(crawler, url_template, origin, page):
+    url = url_template.format(page)
     try:
-        resp = requests.get(url)
-        if resp.status_code != 200:
-            print(f"Failed to load page {page}")
-            continue
-        soup = BeautifulSoup(resp.text, "html.parser")
-        anchors = soup.find_all("a", class_="item-grid-video-player__overlay-link")
-        for a in anchors:
-            link = a.get("href")
-            if link and link.startswith("/free-stock-video/"):
-                full_link = "https://mixkit.co" + link
-                endpoint.append(full_link)
-                print(full_link)
+        html = crawler.fetch(url)
     except Exception as e:
-        print(f"Exception while parsing page {page}: {e}")
+        print(f"Failed to load page {page}: {e}")
+        return page, None
+    if html is None:
+        return page, []
+    links = parse_links(html, origin)
+    print(f"Scraped {url}: {len(links)} links")
+    return page, links
+
+
+def crawl(crawler, url_template, pages, workers, known=None):
+    # full mode (known=None): every page in `pages`, results kept in page order.
+    # incremental mode: pages in waves of `workers`, stopping after the first page with no unknown links.
+    origin = "{0.scheme}://{0.netloc}".format(urlsplit(url_template.format(1)))
+    found = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if known is None:
+            for _, links in pool.map(lambda p: crawl_page(crawler, url_template, origin, p), pages):
+                found.extend(links or [])
+            return found
+        pages = list(pages)
+        for start in range(0, len(pages), workers):
+            wave = pages[start:start + workers]
+            for page, links in pool.map(lambda p: crawl_page(crawler, url_template, origin, p), wave):
+                if links is None:
+                    continue
+                new = [l for l in links if l not in known]
+                found.extend(new)
+                if not new:
+                    print(f"Page {page} has no new links; stopping")
+                    return found
+    return found
+
+
+def dedupe(links):
+    seen = set()
+    return [l for l in links if not (l in seen or seen.add(l))]
+
+
+def read_links(path):
+    if not os.path.isfile(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def write_links(path, links):
+    tmp = path + '.tmp'
+    with open(tmp, "w", encoding="utf-8") as f:
+        for link in links:
+            f.write(link + "\n")
+    os.replace(tmp, path)
+
+
+def parse_pages(value):
+    # "1-29" or "5"
+    lo, _, hi = value.partition('-')
+    return range(int(lo), int(hi or lo) + 1)
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Scrape Mixkit listing pages into video_links.txt')
+    ap.add_argument('--base-url', default=base_url, help='listing URL with {} for the page number')
+    ap.add_argument('--pages', type=parse_pages, default=parse_pages('1-29'), help='page range, e.g. 1-29')
+    ap.add_argument('--out', default=links_file, help='links file (rewritten, or merged with --incremental)')
+    ap.add_argument('--workers', type=int, default=4, help='concurrent requests')
+    ap.add_argument('--rate', type=float, default=4.0, help='max requests per second (0 = unlimited)')
+    ap.add_argument('--retries', type=int, default=4)
+    ap.add_argument('--cache-dir', default=cache_dir, help='HTML cache for conditional requests')
+    ap.add_argument('--no-cache', action='store_true', help='always fetch full pages')
+    ap.add_argument('--incremental', action='store_true', help='stop at already-known links and merge into --out')
+    args = ap.parse_args()
+
+    workers = max(1, args.workers)
+    crawler = Crawler(make_session(workers), RateLimiter(args.rate), HtmlCache(None if args.no_cache else args.cache_dir),
+                      retries=args.retries)
+    existing = read_links(args.out)
+    t0 = time.perf_counter()
+    found = crawl(crawler, args.base_url, args.pages, workers, known=set(existing) if args.incremental else None)
+    elapsed = time.perf_counter() - t0
+
+    if args.incremental:
+        new = dedupe(found)
+        # listing pages are newest first, so new links go ahead of the known ones
+        links = new + existing
+        print(f"\nNew video links: {len(new)} (total {len(links)})")
+    else:
+        links = dedupe(found)
+        print(f"\nTotal video links found: {len(links)}")
+    write_links(args.out, links)
+    s = crawler.stats
+    print(f"{s['requests']} requests ({s['not_modified']} not modified, {s['retries']} retries, {s['failed']} failed), "
+          f"{s['bytes'] / 1024.0:.0f} KB in {elapsed:.2f}s ({s['requests'] / max(elapsed, 1e-9):.1f} req/s)")
+    print(f"Saved all links to {args.out}")
 
-print(f"\nTotal video links found: {len(endpoint)}")
 
-# Save endpoint list to file
-with open("video_links.txt", "w", encoding="utf-8") as f:
-    for link in endpoint:
-        f.write(link + "\n")
-print(f"Saved all links to video_links.txt")
\ No newline at end of file
+if __name__ == '__main__':
+    main()